@@ -3,6 +3,10 @@ ASGI config for TopFive project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with any ASGI server (e.g. ``uvicorn TopFive.asgi:application``) to
+get the live match stream at /api/matches/<id>/live/; under WSGI that view
+has to buffer the whole game before sending anything.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
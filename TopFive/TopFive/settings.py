@@ -21,6 +21,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that its timings cover the whole stack (see TopFiveBack/metrics.py).
+    'TopFiveBack.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -74,6 +76,38 @@ USE_TZ = True
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Live match streaming: game seconds played per wall-clock second.
+TOPFIVE_LIVE_SPEED = 24
+# Binary play-by-play store (see TopFiveBack/eventstore.py).
+TOPFIVE_EVENT_STORE = BASE_DIR / 'event_store'
+
+# Request metrics (TopFiveBack/metrics.py), served at /api/metrics. Requests
+# slower than TOPFIVE_SLOW_REQUEST_MS are logged with their SQL (None: off).
+# Only scrapers sending TOPFIVE_METRICS_TOKEN as a bearer token and staff
+# logged in to the admin may read the metrics. For local scraping without a
+# token, set TOPFIVE_METRICS_PUBLIC = True (never on a public host).
+TOPFIVE_SLOW_REQUEST_MS = None
+TOPFIVE_METRICS_TOKEN = None
+TOPFIVE_METRICS_PUBLIC = False
+
+# 'responses' holds the versioned response cache of the read endpoints (see
+# TopFiveBack/responsecache.py) and the roster snapshot version. Its versions
+# are bumped by the commands (simulate_round, daily_tick, match_bids, ...) as
+# well as by the API, so every process must share it: files on one host, or
+# memcached/redis (django.core.cache.backends.redis.RedisCache) across hosts.
+# LocMem is only safe when a single process serves the API and also does all
+# of the writing (no management commands against a running server).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'response_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
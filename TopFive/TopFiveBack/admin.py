@@ -4,14 +4,53 @@
 #              the new, sortable calculated market value.
 # ==============================================================================
 from django.contrib import admin
-from .models import League, Team, Player, Match, TeamSeasonStats
-from django.db.models import F, Case, When, Value, FloatField
-from django.db.models.functions import Power, Greatest
+from django.db import transaction
+from django.db.models import Count
+from . import responsecache, snapshot
+from .models import League, Team, Player, Match, TeamSeasonStats, PlayerSeasonStats, TransferBid
+
+# ModelAdmins declare ``query_budgets``: the most queries per admin page
+# ('changelist', 'change'), whatever the number of rows. Enforced by
+# test_query_budgets.py.
+
+
+class CachedModelAdmin(admin.ModelAdmin):
+    """
+    Admin writes bypass the API views, so they invalidate the response cache
+    themselves: ``cache_scopes(objs)`` gives the ``responsecache.invalidate``
+    arguments for the rows about to be saved or deleted. Admins of simulation
+    inputs set ``invalidates_snapshot``.
+    """
+    invalidates_snapshot = False
+
+    def cache_scopes(self, objs):
+        return {}
+
+    def invalidate(self, scopes):
+        responsecache.invalidate(**scopes)
+        if self.invalidates_snapshot:
+            transaction.on_commit(snapshot.invalidate)
+
+    def save_model(self, request, obj, form, change):
+        scopes = self.cache_scopes([obj])
+        super().save_model(request, obj, form, change)
+        self.invalidate(scopes)
+
+    def delete_model(self, request, obj):
+        scopes = self.cache_scopes([obj])
+        super().delete_model(request, obj)
+        self.invalidate(scopes)
+
+    def delete_queryset(self, request, queryset):
+        scopes = self.cache_scopes(list(queryset))
+        super().delete_queryset(request, queryset)
+        self.invalidate(scopes)
 
 # פילטר טווח דירוגים (ללא שינוי)
 class RatingRangeFilter(admin.SimpleListFilter):
     title = 'Player Rating'
     parameter_name = 'rating_range'
+    field = 'rating'
 
     def lookups(self, request, model_admin):
         return (
@@ -22,17 +61,22 @@ class RatingRangeFilter(admin.SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
-        # ודא שה-queryset כבר מכיל את calculated_rating
-        if self.value() == '90+':
-            return queryset.filter(calculated_rating__gte=90)
-        if self.value() == '80-89':
-            return queryset.filter(calculated_rating__gte=80, calculated_rating__lt=90)
-        if self.value() == '70-79':
-            return queryset.filter(calculated_rating__gte=70, calculated_rating__lt=80)
-        if self.value() == '60-69':
-            return queryset.filter(calculated_rating__gte=60, calculated_rating__lt=70)
+        # Filters on the stored (indexed) rating column.
+        ranges = {'90+': (90, None), '80-89': (80, 90), '70-79': (70, 80), '60-69': (60, 70)}
+        if self.value() not in ranges:
+            return queryset
+        low, high = ranges[self.value()]
+        queryset = queryset.filter(**{f'{self.field}__gte': low})
+        if high is not None:
+            queryset = queryset.filter(**{f'{self.field}__lt': high})
         return queryset
 
+
+class TeamRatingRangeFilter(RatingRangeFilter):
+    title = 'Overall Rating'
+    parameter_name = 'overall_rating_range'
+    field = 'overall_rating'
+
 # תצוגות Inline (ללא שינוי)
 class PlayerInline(admin.TabularInline):
     model = Player
@@ -44,102 +88,84 @@ class PlayerInline(admin.TabularInline):
 
 class TeamInline(admin.TabularInline):
     model = Team
-    fields = ('name', 'coach_name', 'get_overall_rating', 'get_player_count')
-    readonly_fields = ('name', 'coach_name', 'get_overall_rating', 'get_player_count')
+    fields = ('name', 'coach_name', 'overall_rating', 'get_player_count')
+    readonly_fields = ('name', 'coach_name', 'overall_rating', 'get_player_count')
     show_change_link = True
     extra = 0
     can_delete = False
 
-    def get_overall_rating(self, obj):
-        return obj.overall_rating
-    get_overall_rating.short_description = 'Overall Rating'
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(player_count=Count('players'))
 
+    @admin.display(description='Number of Players')
     def get_player_count(self, obj):
-        return obj.players.count()
-    get_player_count.short_description = 'Number of Players'
+        return obj.player_count
 
 
 @admin.register(Player)
-class PlayerAdmin(admin.ModelAdmin):
+class PlayerAdmin(CachedModelAdmin):
     # --- תיקון: הוספת שווי השוק לתצוגה ---
     list_display = ('full_name', 'team', 'position_primary', 'age', 'rating_display', 'market_value_display', 'contract_years')
-    list_filter = ('team', 'position_primary', 'is_injured', RatingRangeFilter)
+    list_filter = ('team', 'position_primary', 'is_injured', 'training_focus', RatingRangeFilter)
+    list_select_related = ('team',)
     search_fields = ('first_name', 'last_name', 'team__name')
     list_per_page = 20
+    query_budgets = {'changelist': 6}
+    invalidates_snapshot = True
     
+
+    def cache_scopes(self, objs):
+        # The team the player was loaded with, too, when the form moves them.
+        teams = {obj.team_id for obj in objs} | {getattr(obj, '_loaded_team_id', None) for obj in objs}
+        return {'teams': teams, 'market': True}
+
     @admin.display(description='Full Name', ordering=('last_name', 'first_name'))
     def full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
     
-    @admin.display(description='Rating', ordering='calculated_rating') 
+    @admin.display(description='Rating', ordering='rating')
     def rating_display(self, obj):
-        # ודא שהשדה המחושב קיים לפני גישה אליו
-        return round(obj.calculated_rating) if hasattr(obj, 'calculated_rating') else 'N/A'
+        return obj.rating
 
     # --- תיקון: מתודה נפרדת לשווי שוק ---
-    @admin.display(description='Market Value ($)', ordering='calculated_market_value') 
+    @admin.display(description='Market Value ($)', ordering='market_value')
     def market_value_display(self, obj):
-        return f"{obj.calculated_market_value:,.0f}" if hasattr(obj, 'calculated_market_value') else "N/A"
-    
-    # --- תיקון: מתודת get_queryset אחת שכוללת את שני החישובים ---
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        
-        # חישוב דירוג
-        rating_calc = (
-            (F('shooting_2p') + F('shooting_3p') + F('free_throws') + F('rebound_def') + 
-             F('rebound_off') + F('passing') + F('blocking') + F('defense') + 
-             F('game_iq') + F('speed') + F('jumping') + F('strength') + F('stamina')) / 13.0
-        )
-        
-        # חישוב שווי שוק (מבוסס על הנוסחה שקבענו)
-        base_value_calc = Power(rating_calc / 55.0, 4.5) * 650000
-        age_factor_calc = Greatest(
-            Case(
-                When(age__lte=27, then=Value(1.0) + (Value(27.0) - F('age')) * Value(0.06)),
-                default=Value(1.0) - (F('age') - Value(27.0)) * Value(0.09),
-                output_field=FloatField()
-            ),
-            Value(0.2)
-        )
-        contract_factor_calc = Case(
-            When(contract_years=0, then=Value(1.0)),
-            default=Value(1.0) + (F('contract_years') * Value(0.15)),
-            output_field=FloatField()
-        )
-        
-        # הוספת שני השדות המחושבים ל-queryset
-        return queryset.annotate(
-            calculated_rating=rating_calc,
-            calculated_market_value=(
-                base_value_calc * age_factor_calc * contract_factor_calc / 3.0
-            )
-        )
+        return f"{obj.market_value:,}"
 
 # הגדרות Admin אחרות (ללא שינוי)
 @admin.register(Team)
-class TeamAdmin(admin.ModelAdmin):
-    list_display = ('name', 'league', 'coach_name', 'get_overall_rating', 'get_player_count')
-    list_filter = ('league',)
+class TeamAdmin(CachedModelAdmin):
+    list_display = ('name', 'league', 'coach_name', 'overall_rating', 'get_player_count')
+    list_filter = ('league', TeamRatingRangeFilter)
+    list_select_related = ('league',)
     search_fields = ('name', 'coach_name')
+    readonly_fields = ('overall_rating',)
     inlines = [PlayerInline]
+    query_budgets = {'changelist': 6, 'change': 9}
 
-    @admin.display(description='Overall Rating')
-    def get_overall_rating(self, obj):
-        return obj.overall_rating
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(player_count=Count('players'))
 
+    def cache_scopes(self, objs):
+        # Team names show in the standings and match lists, budgets in the squad pages.
+        return {'leagues': {obj.league_id for obj in objs}, 'teams': {obj.id for obj in objs}}
+
+    @admin.display(description='Number of Players', ordering='player_count')
     def get_player_count(self, obj):
-        return obj.players.count()
-    get_player_count.short_description = 'Number of Players'
+        return obj.player_count
 
 @admin.register(League)
-class LeagueAdmin(admin.ModelAdmin):
+class LeagueAdmin(CachedModelAdmin):
     list_display = ('name', 'level', 'status', 'current_season_year')
     list_filter = ('level', 'status')
     inlines = [TeamInline]
+    query_budgets = {'change': 5}
+
+    def cache_scopes(self, objs):
+        return {'leagues': {obj.id for obj in objs}}
 
 @admin.register(Match)
-class MatchAdmin(admin.ModelAdmin):
+class MatchAdmin(CachedModelAdmin):
     list_display = [
         'league', 'match_round', 'match_date',
         'home_team', 'away_team',
@@ -147,11 +173,37 @@ class MatchAdmin(admin.ModelAdmin):
         'completed', 'current_quarter', 'possession_team'
     ]
     list_filter = ['league', 'completed', 'match_round']
+    # possession_team is nullable, so Django doesn't select it on its own.
+    list_select_related = ('league', 'home_team', 'away_team', 'possession_team')
     search_fields = ['home_team__name', 'away_team__name']
     ordering = ['match_date']
+    query_budgets = {'changelist': 7}
+
+    def cache_scopes(self, objs):
+        return {'leagues': {obj.league_id for obj in objs}}
 
 @admin.register(TeamSeasonStats)
-class TeamSeasonStatsAdmin(admin.ModelAdmin):
+class TeamSeasonStatsAdmin(CachedModelAdmin):
     list_display = ('id', 'team', 'league', 'season', 'wins', 'losses')
     list_filter = ('league', 'season')
     search_fields = ('team__name',)
+    query_budgets = {'changelist': 7}
+
+    def cache_scopes(self, objs):
+        return {'leagues': {obj.league_id for obj in objs}}
+
+@admin.register(PlayerSeasonStats)
+class PlayerSeasonStatsAdmin(admin.ModelAdmin):
+    list_display = ('id', 'player', 'team', 'league', 'season', 'games_played', 'points', 'rebounds', 'assists')
+    list_filter = ('league', 'season')
+    search_fields = ('player__first_name', 'player__last_name')
+    list_select_related = ('player', 'team', 'league')
+    query_budgets = {'changelist': 7}
+
+@admin.register(TransferBid)
+class TransferBidAdmin(admin.ModelAdmin):
+    list_display = ('id', 'player', 'team', 'price', 'contract_years', 'status', 'created_at', 'filled_at')
+    list_filter = ('status',)
+    search_fields = ('player__first_name', 'player__last_name', 'team__name')
+    list_select_related = ('player', 'team')
+    query_budgets = {'changelist': 5}
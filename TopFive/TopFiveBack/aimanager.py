@@ -0,0 +1,196 @@
+# file: TopFiveBack/aimanager.py
+"""
+Transfer activity for teams without a manager (``Team.user`` is null).
+
+One pass signs free agents for every AI team in the world at once:
+
+1. Every AI team's roster is reduced to per-position counts (all players and
+   starters) with one aggregate query, and the free-agent pool is loaded as
+   NumPy columns with another.
+2. A team's need at a position is the number of players it is short of
+   ``TARGET_PER_POSITION`` there, plus ``STARTER_GAP`` when nobody starts
+   there.
+3. Scores are computed for a block of teams against the whole pool as one
+   array expression: ``need * (rating - PRICE_PENALTY * price / budget)``,
+   masked to players the team can afford and only while it has squad room.
+4. Each round every team puts forward its ``CANDIDATES`` best-scoring
+   players; claims are granted best score first, one signing per team per
+   round, so a team that loses a player to a stronger claim falls back to its
+   next choice. A team signs at most ``max_signings`` players per pass.
+
+Purchases are written set-based: one ``UPDATE`` per (role, contract length)
+group for the players and one ``UPDATE ... CASE`` for the budgets.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, Count, Q, Value, When
+
+from . import responsecache, snapshot
+from .models import Player, Team
+from .transfers import MAX_SQUAD_SIZE, apply_budget_deltas, sale_price
+
+POSITIONS = [code for code, _ in Player.POSITION_CHOICES]
+TARGET_PER_POSITION = 2
+STARTER_GAP = 2
+# Spending the whole budget on one player costs this many rating points of score.
+PRICE_PENALTY = 20.0
+# An AI team never spends more than this share of its budget on one player.
+MAX_BUDGET_SHARE = 0.5
+MAX_SIGNINGS = 2
+CONTRACT_YEARS = (1, 3)
+# Teams scored against the pool at once (bounds the score matrix's memory).
+TEAM_BLOCK = 256
+# Players each team puts forward per round, so a team that loses its first
+# choice to a better claim still signs someone in the same round.
+CANDIDATES = 64
+BATCH_SIZE = 500
+
+
+@dataclass
+class Signing:
+    team_id: int
+    player_id: int
+    price: int
+    role: str
+    contract_years: int
+
+
+@dataclass
+class AIReport:
+    teams: int = 0
+    pool: int = 0
+    rounds: int = 0
+    signings: list = field(default_factory=list)
+
+
+def _team_needs(team_ids):
+    """(counts, starters): (teams, positions) arrays of players and starters per position."""
+    row = {team_id: i for i, team_id in enumerate(team_ids)}
+    column = {position: j for j, position in enumerate(POSITIONS)}
+    counts = np.zeros((len(team_ids), len(POSITIONS)), dtype=np.int32)
+    starters = np.zeros_like(counts)
+    rows = (Player.objects.filter(team__user__isnull=True, team__isnull=False)
+            .values('team_id', 'position_primary')
+            .annotate(n=Count('id'), n_starters=Count('id', filter=Q(role=Player.STARTER)))
+            .values_list('team_id', 'position_primary', 'n', 'n_starters'))
+    for team_id, position, n, n_starters in rows:
+        if team_id in row and position in column:
+            counts[row[team_id], column[position]] = n
+            starters[row[team_id], column[position]] = n_starters
+    return counts, starters
+
+
+def _need(counts, starters):
+    return np.maximum(TARGET_PER_POSITION - counts, 0) + STARTER_GAP * (starters == 0)
+
+
+def run_ai_transfers(max_signings=MAX_SIGNINGS, seed=None):
+    """Runs one AI transfer pass in a transaction and returns an ``AIReport``."""
+    rng = np.random.default_rng(seed)
+    report = AIReport()
+    with transaction.atomic():
+        teams = list(Team.objects.select_for_update().filter(user__isnull=True)
+                     .order_by('id').values_list('id', 'budget'))
+        pool = list(Player.objects.select_for_update()
+                    .filter(team__isnull=True, is_retired=False, is_injured=False)
+                    .order_by('id')
+                    .values_list('id', 'position_primary', 'rating', 'asking_price', 'market_value'))
+        report.teams, report.pool = len(teams), len(pool)
+        if not teams or not pool:
+            return report
+
+        team_ids = np.array([team_id for team_id, _ in teams], dtype=np.int64)
+        budgets = np.array([budget for _, budget in teams], dtype=np.float64)
+        counts, starters = _team_needs(team_ids.tolist())
+        squad = counts.sum(axis=1)
+        signed = np.zeros(len(teams), dtype=np.int32)
+
+        position_index = {position: j for j, position in enumerate(POSITIONS)}
+        player_ids = np.array([p[0] for p in pool], dtype=np.int64)
+        positions = np.array([position_index.get(p[1], 0) for p in pool], dtype=np.int64)
+        ratings = np.array([p[2] for p in pool], dtype=np.float32)
+        prices = np.array([sale_price(p[3], p[4]) for p in pool], dtype=np.float64)
+        available = np.ones(len(pool), dtype=bool)
+
+        while True:
+            active = np.flatnonzero((signed < max_signings) & (squad < MAX_SQUAD_SIZE))
+            if not len(active) or not available.any():
+                break
+            # Each active team's CANDIDATES best-scoring players, as flat
+            # (score, team row, pool index) triples.
+            need = _need(counts, starters)
+            scores, rows, picks = [], [], []
+            for start in range(0, len(active), TEAM_BLOCK):
+                block = active[start:start + TEAM_BLOCK]
+                block_need = need[block][:, positions]                      # (block, pool)
+                affordable = prices[None, :] <= budgets[block, None] * MAX_BUDGET_SHARE
+                score = block_need * (ratings[None, :]
+                                      - PRICE_PENALTY * prices[None, :] / np.maximum(budgets[block, None], 1))
+                score = np.where(affordable & available[None, :] & (block_need > 0), score, -np.inf)
+                k = min(CANDIDATES, score.shape[1])
+                top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(score, top, axis=1)
+                keep = np.isfinite(top_scores) & (top_scores > 0)
+                scores.append(top_scores[keep])
+                rows.append(np.broadcast_to(block[:, None], top.shape)[keep])
+                picks.append(top[keep])
+            scores, rows, picks = np.concatenate(scores), np.concatenate(rows), np.concatenate(picks)
+            if not len(scores):
+                break
+
+            # Best claims first: a team signs at most one player per round and a
+            # player goes to the first team that claims it.
+            report.rounds += 1
+            signed_this_round = set()
+            for i in np.argsort(-scores, kind='stable').tolist():
+                t, p = int(rows[i]), int(picks[i])
+                if t in signed_this_round or not available[p]:
+                    continue
+                signed_this_round.add(t)
+                position = positions[p]
+                role = (Player.STARTER if starters[t, position] == 0
+                        else Player.BENCH if counts[t, position] < TARGET_PER_POSITION
+                        else Player.RESERVE)
+                report.signings.append(Signing(
+                    int(team_ids[t]), int(player_ids[p]), int(prices[p]), role,
+                    int(rng.integers(CONTRACT_YEARS[0], CONTRACT_YEARS[1] + 1)),
+                ))
+                available[p] = False
+                budgets[t] -= prices[p]
+                counts[t, position] += 1
+                starters[t, position] += role == Player.STARTER
+                squad[t] += 1
+                signed[t] += 1
+
+        if report.signings:
+            _apply_signings(report.signings)
+    return report
+
+
+def _apply_signings(signings):
+    # One UPDATE per (role, contract) group, moving each player to its team
+    # with a single CASE; the other columns are the same for the whole group.
+    groups = {}
+    for s in signings:
+        groups.setdefault((s.role, s.contract_years), []).append(s)
+    for (role, contract_years), group in groups.items():
+        for start in range(0, len(group), BATCH_SIZE):
+            batch = group[start:start + BATCH_SIZE]
+            Player.objects.filter(id__in=[s.player_id for s in batch]).update(
+                team_id=Case(*[When(id=s.player_id, then=Value(s.team_id)) for s in batch]),
+                role=role, contract_years=contract_years, assigned_minutes=0,
+                is_on_transfer_list=False, asking_price=None,
+            )
+    # Contract years feed the market value; this also refreshes the buyers' ratings.
+    player_ids = [s.player_id for s in signings]
+    for start in range(0, len(player_ids), BATCH_SIZE):
+        Player.objects.filter(id__in=player_ids[start:start + BATCH_SIZE]).refresh_values()
+
+    deltas = {}
+    for s in signings:
+        deltas[s.team_id] = deltas.get(s.team_id, 0) - s.price
+    apply_budget_deltas(deltas, BATCH_SIZE)
+    transaction.on_commit(snapshot.invalidate)
+    responsecache.invalidate(teams=deltas, market=True)
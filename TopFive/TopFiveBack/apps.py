@@ -1,7 +1,17 @@
 # file: TopFiveBack/apps.py
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 class TopFiveBackConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'TopFiveBack'
 
+    def ready(self):
+        from django.db import connections
+
+        from . import metrics
+        # Request metrics count the queries of every connection (see metrics.py).
+        connection_created.connect(metrics.install)
+        for connection in connections.all(initialized_only=True):
+            metrics.install(connection=connection)
+
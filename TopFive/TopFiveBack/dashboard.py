@@ -0,0 +1,144 @@
+# file: TopFiveBack/dashboard.py
+"""
+The manager's dashboard in one payload.
+
+``team_dashboard`` reads everything the dashboard screen shows with a fixed
+number of queries, whatever the size of the league or the squad:
+
+1. the team's standing;
+2. its rank in the league (one aggregate over the standings);
+3. the next uncompleted match;
+4. the last ``LAST_RESULTS`` completed matches;
+5. the squad (the financial summary, roster health and alerts are reduced
+   from these rows in Python);
+6. the team's top scorer this season.
+"""
+from django.db.models import Count, Q
+
+from . import transfers
+from .models import Player, PlayerSeasonStats, TeamSeasonStats, team_matches
+from .serializers import MatchSerializer
+
+LAST_RESULTS = 5
+LOW_FITNESS = 60
+# Fewer healthy players than this and the team can't field a full rotation.
+MIN_HEALTHY_PLAYERS = 8
+
+SQUAD_FIELDS = ('id', 'first_name', 'last_name', 'fitness', 'is_injured', 'injury_duration',
+                'contract_years', 'market_value', 'is_on_transfer_list', 'asking_price')
+
+
+def _standing(team, season):
+    stats = TeamSeasonStats.objects.filter(team=team, league_id=team.league_id, season=season).first()
+    if stats is None:
+        return None
+    rank = TeamSeasonStats.objects.filter(league_id=team.league_id, season=season).aggregate(
+        teams=Count('id'),
+        ahead=Count('id', filter=Q(wins__gt=stats.wins) | Q(wins=stats.wins, points_for__gt=stats.points_for)),
+    )
+    return {
+        'games_played': stats.games_played,
+        'wins': stats.wins,
+        'losses': stats.losses,
+        'points_for': stats.points_for,
+        'points_against': stats.points_against,
+        'points_difference': stats.points_difference,
+        'win_percentage': stats.win_percentage,
+        'rank': rank['ahead'] + 1,
+        'teams': rank['teams'],
+    }
+
+
+def _result(match, team_id):
+    home = match.home_team_id == team_id
+    scored, conceded = ((match.home_team_score, match.away_team_score) if home
+                        else (match.away_team_score, match.home_team_score))
+    opponent = match.away_team if home else match.home_team
+    return {
+        'match_id': match.id,
+        'match_date': match.match_date,
+        'home': home,
+        'opponent_id': opponent.id,
+        'opponent_name': opponent.name,
+        'points_for': scored,
+        'points_against': conceded,
+        'won': scored > conceded,
+    }
+
+
+def _player(row, *fields):
+    return {'id': row['id'], 'name': f"{row['first_name']} {row['last_name']}",
+            **{field: row[field] for field in fields}}
+
+
+def _alerts(squad, injured, low_fitness):
+    alerts = []
+    if injured:
+        alerts.append({'level': 'danger', 'code': 'injuries', 'message': f'{len(injured)} player(s) injured.'})
+    healthy = len(squad) - len(injured)
+    if healthy < MIN_HEALTHY_PLAYERS:
+        alerts.append({'level': 'danger', 'code': 'short_squad',
+                       'message': f'Only {healthy} healthy player(s) available.'})
+    if low_fitness:
+        alerts.append({'level': 'warning', 'code': 'low_fitness',
+                       'message': f'{len(low_fitness)} player(s) below {LOW_FITNESS}% fitness.'})
+    expiring = sum(1 for row in squad if row['contract_years'] <= 1)
+    if expiring:
+        alerts.append({'level': 'warning', 'code': 'expiring_contracts',
+                       'message': f'{expiring} contract(s) expiring soon.'})
+    if len(squad) >= transfers.MAX_SQUAD_SIZE:
+        alerts.append({'level': 'info', 'code': 'squad_full',
+                       'message': f'Your squad is full ({transfers.MAX_SQUAD_SIZE} players).'})
+    return alerts
+
+
+def team_dashboard(team):
+    """Dashboard payload of ``team`` (loaded with its league)."""
+    season = team.league.current_season_year
+    matches = team_matches(team.id).select_related('league', 'home_team', 'away_team')
+    next_match = matches.filter(completed=False).order_by('match_date', 'id').first()
+    last = list(matches.filter(completed=True).order_by('-match_date', '-id')[:LAST_RESULTS])
+
+    squad = list(Player.objects.filter(team=team).order_by('id').values(*SQUAD_FIELDS))
+    injured = [_player(row, 'injury_duration') for row in squad if row['is_injured']]
+    low_fitness = [_player(row, 'fitness') for row in squad
+                   if not row['is_injured'] and row['fitness'] < LOW_FITNESS]
+    listed = [row for row in squad if row['is_on_transfer_list']]
+
+    top_scorer = (PlayerSeasonStats.objects
+                  .filter(team=team, league_id=team.league_id, season=season, games_played__gt=0)
+                  .select_related('player').order_by('-points', 'player_id').first())
+
+    return {
+        'team': {
+            'id': team.id,
+            'name': team.name,
+            'league_id': team.league_id,
+            'league_name': team.league.name,
+            'season': season,
+            'overall_rating': team.overall_rating,
+        },
+        'standing': _standing(team, season),
+        'next_match': MatchSerializer(next_match).data if next_match else None,
+        'last_results': [_result(match, team.id) for match in last],
+        'financial': {
+            'budget': team.budget,
+            'squad_value': sum(row['market_value'] for row in squad),
+            'squad_size': len(squad),
+            'max_squad_size': transfers.MAX_SQUAD_SIZE,
+            'players_listed': len(listed),
+            'listed_value': sum(transfers.sale_price(row['asking_price'], row['market_value']) for row in listed),
+        },
+        'roster_health': {
+            'average_fitness': round(sum(row['fitness'] for row in squad) / len(squad)) if squad else 0,
+            'injured': injured,
+            'low_fitness': low_fitness,
+        },
+        'top_scorer': {
+            'id': top_scorer.player_id,
+            'name': f'{top_scorer.player.first_name} {top_scorer.player.last_name}',
+            'points': top_scorer.points,
+            'points_per_game': round(top_scorer.points / top_scorer.games_played, 1),
+        } if top_scorer else None,
+        'alerts': _alerts(squad, injured, low_fitness),
+    }
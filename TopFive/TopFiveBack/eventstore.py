@@ -0,0 +1,263 @@
+# file: TopFiveBack/eventstore.py
+"""
+Append-only binary play-by-play store.
+
+Events are never stored as ORM rows. Each game is a run of fixed-width
+``simulation.EVENT_DTYPE`` records (22 bytes per event) in a file on local
+disk, so a reader can ``np.memmap`` the file and slice the events it needs
+without copying or parsing the rest of the game.
+
+Layout under ``settings.TOPFIVE_EVENT_STORE``::
+
+    matches/<match_id>.evt          events of one game, seq 0..n-1
+    seasons/<league>-<season>.ids   uint32 match ids written that season
+    archive/<league>-<season>.evt   compacted season: every game back to back
+    archive/<league>-<season>.idx   (match_id, start, count) per game, sorted
+
+``compact_season`` folds a finished season's per-match files into one archive
+segment (one file instead of hundreds), and ``drop_season`` is the retention
+step that deletes a season altogether.
+
+Readers name the game's league and season, so a lookup opens at most the one
+loose file and the one segment of that season, however many are stored.
+Compaction may move a game while it is being read: a loose file that is gone
+is looked up again in the archive.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .simulation import EVENT_DTYPE, EVENT_MINUTES, EVENT_NAMES, EVENT_PERIOD_END
+
+INDEX_DTYPE = np.dtype([('match_id', '<u4'), ('start', '<u8'), ('count', '<u4')])
+MATCH_ID_DTYPE = np.dtype('<u4')
+
+_archives = {}
+
+
+def root():
+    return Path(getattr(settings, 'TOPFIVE_EVENT_STORE', settings.BASE_DIR / 'event_store'))
+
+
+def _match_path(match_id):
+    return root() / 'matches' / f'{match_id}.evt'
+
+
+def _season_name(league_id, season):
+    return f'{league_id}-{season}'
+
+
+def write_games(games):
+    """
+    Appends the events of finished games. ``games`` is an iterable of
+    ``(match_id, league_id, season, events)``; a game that is already in the
+    store is left untouched.
+    """
+    written = {}
+    for match_id, league_id, season, events in games:
+        path = _match_path(match_id)
+        if path.exists() or locate_archived(match_id, league_id, season) is not None:
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name and rename, so readers never see half a game.
+        partial = path.with_suffix('.part')
+        with open(partial, 'wb') as f:
+            f.write(np.ascontiguousarray(events, dtype=EVENT_DTYPE).tobytes())
+        os.replace(partial, path)
+        written.setdefault((league_id, season), []).append(match_id)
+
+    for (league_id, season), match_ids in written.items():
+        ids_path = root() / 'seasons' / f'{_season_name(league_id, season)}.ids'
+        ids_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(ids_path, 'ab') as f:
+            f.write(np.array(match_ids, dtype=MATCH_ID_DTYPE).tobytes())
+    return sum(len(ids) for ids in written.values())
+
+
+def _memmap(path, dtype, offset=0, count=None):
+    size = path.stat().st_size - offset * dtype.itemsize
+    if count is None:
+        count = size // dtype.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset * dtype.itemsize, shape=(count,))
+
+
+def _archive_index(league_id, season):
+    """Memory-mapped index of a season's archive segment (None if it has none), reloaded when it changes."""
+    path = root() / 'archive' / f'{_season_name(league_id, season)}.idx'
+    try:
+        mtime = path.stat().st_mtime_ns
+        cached = _archives.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _archives[path] = (mtime, _memmap(path, INDEX_DTYPE))
+    except FileNotFoundError:
+        _archives.pop(path, None)
+        return None
+    return cached[1]
+
+
+def locate_archived(match_id, league_id, season):
+    """``(segment path, start, count)`` of a game in its season's archive segment, or None."""
+    index = _archive_index(league_id, season)
+    if index is None:
+        return None
+    i = int(np.searchsorted(index['match_id'], match_id))
+    if i < len(index) and index['match_id'][i] == match_id:
+        segment = root() / 'archive' / f'{_season_name(league_id, season)}.evt'
+        return segment, int(index['start'][i]), int(index['count'][i])
+    return None
+
+
+def _read_archived(match_id, league_id, season):
+    archived = locate_archived(match_id, league_id, season)
+    if archived is None:
+        return None
+    segment, offset, count = archived
+    try:
+        return _memmap(segment, EVENT_DTYPE, offset=offset, count=count)
+    except FileNotFoundError:
+        return None  # dropped by retention in the meantime
+
+
+def read_events(match_id, league_id, season, start=0, limit=None):
+    """
+    Events of ``match_id`` (a game of ``league_id``'s ``season``) from sequence
+    number ``start`` on (at most ``limit``), as a read-only view into the
+    memory-mapped file. Returns None when the store has nothing for the match.
+    """
+    start = max(int(start), 0)
+    try:
+        events = _memmap(_match_path(match_id), EVENT_DTYPE)
+    except FileNotFoundError:
+        # Archived, possibly by a compaction that ran since the game was written.
+        events = _read_archived(match_id, league_id, season)
+        if events is None:
+            return None
+    end = None if limit is None else start + limit
+    return events[start:end]
+
+
+def iter_season(league_id, season):
+    """
+    Yields ``(match_id, events)`` for every stored game of a season, archived
+    games first, each as a memory-mapped view.
+    """
+    name = _season_name(league_id, season)
+    # The loose ids are read first: a compaction that runs meanwhile moves
+    # those games into the archive, where they are looked up again below.
+    try:
+        loose = np.unique(np.fromfile(root() / 'seasons' / f'{name}.ids', dtype=MATCH_ID_DTYPE)).tolist()
+    except FileNotFoundError:
+        loose = []
+    index = _archive_index(league_id, season)
+    archived = set()
+    if index is not None:
+        try:
+            events = _memmap(root() / 'archive' / f'{name}.evt', EVENT_DTYPE)
+        except FileNotFoundError:
+            return  # the season was dropped by retention
+        for match_id, start, count in index.tolist():
+            archived.add(match_id)
+            yield match_id, events[start:start + count]
+    for match_id in loose:
+        if match_id in archived:
+            continue
+        try:
+            events = _memmap(_match_path(match_id), EVENT_DTYPE)
+        except FileNotFoundError:
+            events = _read_archived(match_id, league_id, season)
+        if events is not None:
+            yield match_id, events
+
+
+def event_payload(event, team_ids):
+    """JSON-ready dict for one event record; ``team_ids`` is (home, away)."""
+    seq, period, kind, clock, side, points, home_score, away_score, player, other = event
+    if kind == EVENT_MINUTES:
+        return {'seq': seq, 'kind': EVENT_NAMES[kind], 'team_id': team_ids[side],
+                'player_id': player, 'minutes': points}
+    return {
+        'seq': seq,
+        'kind': EVENT_NAMES[kind],
+        'team_id': team_ids[side] if kind != EVENT_PERIOD_END else None,
+        'player_id': player or None,
+        'other_player_id': other or None,
+        'points': points,
+        'quarter': period,
+        'clock': clock / 10.0,
+        'home_score': home_score,
+        'away_score': away_score,
+    }
+
+
+def stored_seasons():
+    """
+    ``(league_id, season, loose)`` for every season the store knows about;
+    ``loose`` is True while some of its games are still per-match files.
+    """
+    seasons = {}
+    for directory, suffix, loose in (('archive', '.idx', False), ('seasons', '.ids', True)):
+        for path in (root() / directory).glob(f'*{suffix}'):
+            league_id, season = path.stem.split('-')
+            key = (int(league_id), int(season))
+            seasons[key] = seasons.get(key, False) or loose
+    return sorted(key + (loose,) for key, loose in seasons.items())
+
+
+def compact_season(league_id, season):
+    """
+    Folds the per-match files of a season into its archive segment (merging
+    with an existing segment) and deletes them. Returns the number of games
+    moved.
+    """
+    name = _season_name(league_id, season)
+    ids_path = root() / 'seasons' / f'{name}.ids'
+    if not ids_path.exists():
+        return 0
+    match_ids = np.unique(np.fromfile(ids_path, dtype=MATCH_ID_DTYPE))
+    loose = [int(m) for m in match_ids if _match_path(int(m)).exists()]
+
+    archive = root() / 'archive'
+    archive.mkdir(parents=True, exist_ok=True)
+    segment, index_path = archive / f'{name}.evt', archive / f'{name}.idx'
+    parts = []
+    if index_path.exists():
+        old_index = np.fromfile(index_path, dtype=INDEX_DTYPE)
+        old_events = np.fromfile(segment, dtype=EVENT_DTYPE)
+        parts = [(int(row['match_id']), old_events[row['start']:row['start'] + row['count']])
+                 for row in old_index if int(row['match_id']) not in loose]
+    parts += [(match_id, np.fromfile(_match_path(match_id), dtype=EVENT_DTYPE)) for match_id in loose]
+    parts.sort(key=lambda part: part[0])
+
+    index = np.zeros(len(parts), dtype=INDEX_DTYPE)
+    index['match_id'] = [match_id for match_id, _ in parts]
+    index['count'] = [len(events) for _, events in parts]
+    index['start'][1:] = np.cumsum(index['count'])[:-1]
+    events = np.concatenate([events for _, events in parts]) if parts else np.zeros(0, dtype=EVENT_DTYPE)
+
+    # Segment first, then index, so an index never points past the end of
+    # the segment it describes.
+    for path, data in ((segment, events), (index_path, index)):
+        partial = path.with_suffix(path.suffix + '.part')
+        data.tofile(partial)
+        os.replace(partial, path)
+    for match_id in loose:
+        _match_path(match_id).unlink()
+    ids_path.unlink()
+    return len(loose)
+
+
+def drop_season(league_id, season):
+    """Deletes everything stored for a season (loose files and archive)."""
+    name = _season_name(league_id, season)
+    ids_path = root() / 'seasons' / f'{name}.ids'
+    if ids_path.exists():
+        for match_id in np.fromfile(ids_path, dtype=MATCH_ID_DTYPE):
+            _match_path(int(match_id)).unlink(missing_ok=True)
+        ids_path.unlink()
+    for suffix in ('.evt', '.idx'):
+        (root() / 'archive' / f'{name}{suffix}').unlink(missing_ok=True)
+    _archives.pop(root() / 'archive' / f'{name}.idx', None)
@@ -0,0 +1,104 @@
+# file: TopFiveBack/lifecycle.py
+"""
+Day-to-day player lifecycle: injuries heal, fitness recovers, players get
+hurt and expired contracts run out.
+
+Every step is a single ``UPDATE`` over the ``Player`` table with ``F()``
+expressions, so a tick issues a fixed number of statements no matter how many
+players there are; nothing is loaded into Python.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Cast, Least, Random
+
+from . import responsecache, snapshot
+from .models import Player, Team, refresh_team_ratings
+
+# Fitness points recovered per day (injured players recover at half the rate).
+FITNESS_RECOVERY = 8
+MAX_FITNESS = 100
+# Daily injury chance of a rostered player at full fitness; every missing
+# fitness point adds INJURY_FATIGUE_RISK on top.
+INJURY_CHANCE = 0.002
+INJURY_FATIGUE_RISK = 0.0002
+MAX_INJURY_DAYS = 21
+
+
+@dataclass
+class TickReport:
+    healed: int = 0
+    still_injured: int = 0
+    recovered: int = 0
+    injured: int = 0
+    contracts_expired: int = 0
+
+
+def heal_injuries(days=1):
+    """Counts injuries down by ``days``; players at zero are fit again."""
+    players = Player.objects.filter(is_injured=True, is_retired=False)
+    healed = players.filter(injury_duration__lte=days).update(is_injured=False, injury_duration=0)
+    still_injured = players.update(injury_duration=F('injury_duration') - days)
+    return healed, still_injured
+
+
+def recover_fitness(days=1):
+    """Fitness goes back up towards ``MAX_FITNESS``, slower while injured."""
+    gain = Case(
+        When(is_injured=True, then=Value(FITNESS_RECOVERY * days // 2)),
+        default=Value(FITNESS_RECOVERY * days),
+        output_field=IntegerField(),
+    )
+    return (Player.objects
+            .filter(is_retired=False, fitness__lt=MAX_FITNESS)
+            .update(fitness=Least(F('fitness') + gain, Value(MAX_FITNESS))))
+
+
+def new_injuries(days=1):
+    """
+    Rostered, healthy players get hurt with a chance that grows with fatigue.
+    The dice are rolled by the database (``RANDOM()``), one per row.
+    """
+    chance = (Value(INJURY_CHANCE * days)
+              + (Value(MAX_FITNESS) - F('fitness')) * Value(INJURY_FATIGUE_RISK * days))
+    return (Player.objects
+            .filter(is_injured=False, is_retired=False, team__isnull=False)
+            .alias(roll=Random())
+            .filter(roll__lt=chance)
+            .update(
+                is_injured=True,
+                injury_duration=Cast(Random() * MAX_INJURY_DAYS, IntegerField()) + 1,
+            ))
+
+
+def expire_contracts():
+    """
+    Players whose contract has run out (0 years left) become free agents, and
+    teams stop designating players they no longer have.
+    """
+    players = Player.objects.filter(team__isnull=False, contract_years=0)
+    team_ids = set(players.order_by().values_list('team_id', flat=True).distinct())
+    expired = players.update(team=None, is_on_transfer_list=False, asking_price=None,
+                             role=Player.RESERVE, assigned_minutes=0)
+    if expired:
+        refresh_team_ratings(team_ids)
+        Team.objects.filter(go_to_guy__isnull=False).exclude(go_to_guy__team=F('id')).update(go_to_guy=None)
+        Team.objects.filter(defensive_stopper__isnull=False).exclude(
+            defensive_stopper__team=F('id')).update(defensive_stopper=None)
+    return expired
+
+
+def daily_tick(days=1, injuries=True):
+    """Runs one tick (covering ``days`` days) in a transaction and reports the counts."""
+    report = TickReport()
+    with transaction.atomic():
+        report.healed, report.still_injured = heal_injuries(days)
+        report.recovered = recover_fitness(days)
+        if injuries:
+            report.injured = new_injuries(days)
+        report.contracts_expired = expire_contracts()
+        # Fitness and injuries are simulation inputs.
+        transaction.on_commit(snapshot.invalidate)
+        responsecache.invalidate(world=True)
+    return report
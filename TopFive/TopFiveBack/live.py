@@ -0,0 +1,271 @@
+# file: TopFiveBack/live.py
+"""
+Live play-by-play over Server-Sent Events (served by the ASGI application).
+
+One producer task per match plays the game and appends pre-encoded SSE frames
+to a shared, append-only list. Viewers never get their own copy of the game:
+each one holds a read position into that list and sleeps on a shared
+``asyncio.Event`` until the producer publishes again. A frame is serialised
+once no matter how many viewers there are, so 1,000 viewers of one game cost
+about as much as one.
+
+The broker is in-process; when the site runs several ASGI workers, each worker
+has its own producers. They all play the same game: the engine is seeded with
+the match id and the snapshot version its rosters come from, and
+``results.record_results`` makes sure a match is only ingested once.
+"""
+import asyncio
+import contextvars
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import eventstore, responsecache, simulation, snapshot
+from .models import Match
+from .results import MatchResult, record_results
+
+# Game seconds played per wall-clock second (24 plays a 48-minute game in 2 minutes).
+LIVE_SPEED = getattr(settings, 'TOPFIVE_LIVE_SPEED', 24)
+# Minimum wall-clock seconds between writes of the live fields on ``Match``.
+STATE_SAVE_INTERVAL = 5.0
+# Comment frame sent to idle connections so proxies keep them open.
+KEEPALIVE_SECONDS = 15
+# How long a finished feed stays in memory for late viewers.
+FINISHED_FEED_TTL = 60
+
+_POSSESSION_CHANGES = {
+    simulation.EVENT_MADE_2, simulation.EVENT_MADE_3, simulation.EVENT_FT_MADE,
+    simulation.EVENT_TURNOVER,
+}
+
+
+def sse_frame(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def game_seconds(period, clock_tenths):
+    """Elapsed game time at an event, in seconds."""
+    if period <= simulation.REGULATION_PERIODS:
+        start = (period - 1) * simulation.QUARTER_SECONDS
+        length = simulation.QUARTER_SECONDS
+    else:
+        start = (simulation.REGULATION_PERIODS * simulation.QUARTER_SECONDS
+                 + (period - simulation.REGULATION_PERIODS - 1) * simulation.OVERTIME_SECONDS)
+        length = simulation.OVERTIME_SECONDS
+    return start + length - clock_tenths / 10.0
+
+
+class MatchFeed:
+    """Shared, append-only stream of SSE frames for one match."""
+
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.frames = []
+        self.state = None
+        self.finished = False
+        self.finished_at = None
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event, data, state=None):
+        """Encodes ``data`` once; the frame id is its position in the feed."""
+        self.frames.append(sse_frame(event, data, event_id=len(self.frames)))
+        if state is not None:
+            self.state = state
+        self._wake()
+
+    def finish(self):
+        self.finished = True
+        self.finished_at = time.monotonic()
+        self._wake()
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def stream(self, start=0):
+        """Yields frames from position ``start`` on until the match is over."""
+        position = max(start, 0)
+        if self.state is not None and position:
+            # A resuming viewer gets the current scoreboard first.
+            yield sse_frame('state', self.state)
+        while True:
+            changed = self._changed
+            if position < len(self.frames):
+                end = len(self.frames)
+                yield ''.join(self.frames[position:end])
+                position = end
+                continue
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+
+
+class LiveBroker:
+    """Keeps one ``MatchFeed`` and one producer task per live match."""
+
+    def __init__(self):
+        self._feeds = {}
+
+    async def open(self, match_id, start=0):
+        """
+        Returns an async iterator of SSE frames for ``match_id``, starting at
+        frame position ``start``. Starts the producer for a live match that
+        nobody is watching yet.
+
+        Raises ``Match.DoesNotExist`` for unknown matches. Matches that are
+        over or not due yet get a single ``state`` frame.
+        """
+        self._evict_finished()
+        feed = self._feeds.get(match_id)
+        if feed is None:
+            state, home, away, seed = await sync_to_async(_load_live_match)(match_id)
+            if home is None:
+                return _single_frame(sse_frame('state', state))
+            # Another viewer may have started it while we were loading.
+            feed = self._feeds.get(match_id)
+            if feed is None:
+                feed = self._feeds[match_id] = MatchFeed(match_id)
+                feed.publish('state', state, state=state)
+                # A fresh context: the producer serves every viewer and outlives
+                # this request, so its queries aren't this request's metrics.
+                feed.task = asyncio.get_running_loop().create_task(
+                    self._produce(feed, home, away, state, seed), context=contextvars.Context())
+        return feed.stream(start)
+
+    def _evict_finished(self):
+        now = time.monotonic()
+        for match_id, feed in list(self._feeds.items()):
+            if feed.finished and now - feed.finished_at > FINISHED_FEED_TTL:
+                del self._feeds[match_id]
+
+    async def _produce(self, feed, home, away, state, seed):
+        try:
+            await self._play(feed, home, away, state, seed)
+        except Exception as exc:  # the viewers must not hang on a dead producer
+            feed.publish('error', {'detail': str(exc)})
+        finally:
+            feed.finish()
+
+    async def _play(self, feed, home, away, state, seed):
+        result = simulation.simulate_games([home], [away], seed=seed, record_events=True)
+        events = result.events_for(0)
+        team_ids = (state['home_team'], state['away_team'])
+        elapsed = 0.0
+        last_saved = time.monotonic()
+        possession = None
+
+        for event in events.tolist():
+            seq, period, kind, clock, side, points, home_score, away_score, player, other = event
+            if kind == simulation.EVENT_MINUTES:
+                continue  # box-score records, not plays
+            at = game_seconds(period, clock)
+            if at > elapsed:
+                await asyncio.sleep((at - elapsed) / LIVE_SPEED)
+                elapsed = at
+
+            if kind == simulation.EVENT_PERIOD_END:
+                possession = None
+            elif kind in _POSSESSION_CHANGES:
+                possession = team_ids[1 - side]
+            else:
+                possession = team_ids[side]
+
+            state = dict(
+                state, status='live', home_score=home_score, away_score=away_score,
+                quarter=period, clock=clock / 10.0, possession_team=possession,
+            )
+            play = eventstore.event_payload(event, team_ids)
+            play['possession_team'] = possession
+            feed.publish('play', play, state=state)
+
+            if time.monotonic() - last_saved >= STATE_SAVE_INTERVAL:
+                await sync_to_async(_save_live_state)(feed.match_id, state)
+                last_saved = time.monotonic()
+
+        stored = await sync_to_async(record_results)([MatchResult(
+            match_id=feed.match_id, league_id=state['league'], season=state['season'],
+            home_team_id=team_ids[0], away_team_id=team_ids[1],
+            home_score=int(result.home_score[0]), away_score=int(result.away_score[0]),
+            periods=int(result.periods[0]), events=events,
+            player_ids=result.player_ids[0], box=result.box[0],
+        )])
+        await sync_to_async(eventstore.write_games)(
+            [(r.match_id, r.league_id, r.season, r.events) for r in stored]
+        )
+        final = await sync_to_async(_match_state)(feed.match_id)
+        feed.publish('final', final, state=final)
+
+
+broker = LiveBroker()
+
+
+def _match_state(match_id):
+    match = (Match.objects
+             .only('id', 'league_id', 'season', 'home_team_id', 'away_team_id', 'match_date',
+                   'home_team_score', 'away_team_score', 'completed', 'current_quarter',
+                   'game_clock', 'possession_team_id')
+             .get(id=match_id))
+    if match.completed:
+        status = 'final'
+    elif match.match_date > timezone.now():
+        status = 'scheduled'
+    else:
+        status = 'live'
+    return {
+        'match_id': match.id,
+        'league': match.league_id,
+        'season': match.season,
+        'home_team': match.home_team_id,
+        'away_team': match.away_team_id,
+        'status': status,
+        'home_score': match.home_team_score,
+        'away_score': match.away_team_score,
+        'quarter': match.current_quarter,
+        'clock': match.game_clock.total_seconds(),
+        'possession_team': match.possession_team_id,
+    }
+
+
+def _load_live_match(match_id):
+    """
+    Current state plus engine inputs and seed (None when the match is not
+    live). The seed is the match id and the snapshot version, so every worker
+    that starts the match plays it the same way.
+    """
+    state = _match_state(match_id)
+    if state['status'] != 'live':
+        return state, None, None, None
+    version = snapshot.version()
+    rosters = snapshot.get_snapshot([state['league']])
+    return (state, rosters.side(state['home_team']), rosters.side(state['away_team']),
+            (match_id, version))
+
+
+def _save_live_state(match_id, state):
+    Match.objects.filter(id=match_id, completed=False).update(
+        home_team_score=state['home_score'],
+        away_team_score=state['away_score'],
+        current_quarter=state['quarter'],
+        game_clock=timedelta(seconds=state['clock']),
+        possession_team_id=state['possession_team'],
+    )
+    # The match lists show the running score.
+    responsecache.invalidate(leagues=[state['league']])
+
+
+async def _single_frame(frame):
+    yield frame
+
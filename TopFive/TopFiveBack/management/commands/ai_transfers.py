@@ -0,0 +1,30 @@
+# In file: TopFiveBack/management/commands/ai_transfers.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from TopFiveBack import aimanager
+
+
+class Command(BaseCommand):
+    help = "Signs free agents for every team without a manager, in one batch pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-signings', type=int, default=aimanager.MAX_SIGNINGS,
+                            help='Most players one team signs in this pass.')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for contract lengths.')
+        parser.add_argument('--verbose-signings', action='store_true', help='Print every signing.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        report = aimanager.run_ai_transfers(options['max_signings'], options['seed'])
+        elapsed = time.perf_counter() - start
+        if options['verbose_signings']:
+            for signing in report.signings:
+                self.stdout.write(f"  - Team {signing.team_id} signs player {signing.player_id} "
+                                  f"({signing.role}) for ${signing.price:,}, {signing.contract_years}y")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(report.signings)} signings by {report.teams} AI teams from a pool of "
+            f"{report.pool} free agents ({report.rounds} rounds, {elapsed:.2f}s)."
+        ))
@@ -0,0 +1,342 @@
+# In file: TopFiveBack/management/commands/benchmark.py
+
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import IntegerField
+from django.db.models.functions import Cast, Random
+from django.utils import timezone
+
+from TopFiveBack import aimanager, lifecycle, orderbook, schedule, simulation, snapshot, worldgen
+from TopFiveBack.models import League, Match, Player, Team, TransferBid
+
+
+class Rollback(Exception):
+    """Raised to roll back the transaction a benchmark prepared its data in."""
+
+
+class Command(BaseCommand):
+    help = 'Runs micro-benchmarks for the simulation and data-loading code paths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(self.targets()), help='What to benchmark.')
+        parser.add_argument('--games', type=int, default=5000, help='Games to simulate (simulation).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Games per engine batch (simulation).')
+        parser.add_argument('--events', action='store_true', help='Also record play-by-play (simulation).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only load this league id (snapshot, repeatable).')
+        parser.add_argument('--repeat', type=int, default=5, help='Loads per path (snapshot).')
+        parser.add_argument('--players', type=int, default=1000000,
+                            help='Player table size to benchmark against (tick).')
+        parser.add_argument('--market', type=int, default=5000, help='Players on the market (orderbook).')
+        parser.add_argument('--bids', type=int, default=50000, help='Open bids (orderbook).')
+        parser.add_argument('--teams', type=int, default=1000, help='AI teams (ai).')
+        parser.add_argument('--new-leagues', type=int, default=1000, help='Leagues to schedule or generate (schedule, world).')
+        parser.add_argument('--league-size', type=int, default=10, help='Teams per league (schedule, world).')
+        parser.add_argument('--roster-size', type=int, default=12, help='Players per team (world).')
+        parser.add_argument('--legacy-leagues', type=int, default=50,
+                            help='Leagues written one match at a time for comparison (schedule).')
+
+    def targets(self):
+        return {
+            'simulation': self.bench_simulation,
+            'snapshot': self.bench_snapshot,
+            'tick': self.bench_tick,
+            'orderbook': self.bench_orderbook,
+            'ai': self.bench_ai,
+            'schedule': self.bench_schedule,
+            'world': self.bench_world,
+        }
+
+    def handle(self, *args, **options):
+        self.targets()[options['target']](options)
+
+    def report(self, label, elapsed, count, unit):
+        rate = count / elapsed if elapsed else float('inf')
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {count} {unit} in {elapsed:.3f}s ({rate:,.0f} {unit}/s)"
+        ))
+
+    # --- simulation ---
+
+    def bench_simulation(self, options):
+        """Single-core engine throughput on synthetic 12-man rosters (no DB access)."""
+        rng = np.random.default_rng(options['seed'])
+        roles = [Player.STARTER] * 5 + [Player.BENCH] * 5 + [Player.RESERVE] * 2
+        sides = []
+        for team_id in range(1, 21):
+            rows = [
+                (team_id * 100 + i, *rng.uniform(60, 99, simulation.N_SKILLS), 100, False,
+                 roles[i], 0, Player.ROLE_PLAYER)
+                for i in range(len(roles))
+            ]
+            sides.append(simulation.build_side(team_id, rows, go_to_guy_id=team_id * 100))
+
+        games, batch_size = options['games'], options['batch_size']
+        simulated = 0
+        start = time.perf_counter()
+        while simulated < games:
+            n = min(batch_size, games - simulated)
+            home_idx = rng.integers(0, len(sides), n)
+            away_idx = (home_idx + rng.integers(1, len(sides), n)) % len(sides)
+            simulation.simulate_games(
+                [sides[i] for i in home_idx], [sides[i] for i in away_idx],
+                seed=options['seed'] + simulated, record_events=options['events'],
+            )
+            simulated += n
+        self.report('simulation', time.perf_counter() - start, simulated, 'games')
+
+    # --- snapshot ---
+
+    def measure(self, load, repeat):
+        """Best wall time over ``repeat`` runs and peak traced memory of one run."""
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load()
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        result = load()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, best, peak
+
+    def bench_snapshot(self, options):
+        """Roster loading: ORM model instances vs. the struct-of-arrays snapshot."""
+        leagues, repeat = options['leagues'], options['repeat']
+
+        def orm_path():
+            teams = Team.objects.prefetch_related('players').order_by('id')
+            if leagues:
+                teams = teams.filter(league_id__in=leagues)
+            return {team.id: simulation.side_from_team(team) for team in teams}
+
+        def snapshot_path():
+            rosters = snapshot.RosterSnapshot.load(leagues)
+            return rosters, rosters.sides(rosters.team_ids.tolist())
+
+        orm_sides, orm_time, orm_peak = self.measure(orm_path, repeat)
+        (rosters, _), snap_time, snap_peak = self.measure(snapshot_path, repeat)
+        _, load_time, load_peak = self.measure(lambda: snapshot.RosterSnapshot.load(leagues), repeat)
+
+        teams, players = len(rosters.team_ids), len(rosters)
+        self.stdout.write(f"{teams} teams, {players} players; snapshot arrays hold {rosters.nbytes / 1024:.1f} KiB.")
+        for label, elapsed, peak in (
+            ('ORM models -> sides', orm_time, orm_peak),
+            ('snapshot -> sides', snap_time, snap_peak),
+            ('snapshot load only', load_time, load_peak),
+        ):
+            self.stdout.write(f"  {label:<22} {elapsed * 1000:8.1f} ms   peak {peak / 1024:8.1f} KiB")
+        self.stdout.write(self.style.SUCCESS(f"snapshot: {orm_time / snap_time:.1f}x faster, "
+                                             f"{orm_peak / max(snap_peak, 1):.1f}x less peak memory"))
+
+    # --- daily tick ---
+
+    def bench_tick(self, options):
+        """
+        Daily tick over a Player table padded with synthetic players up to
+        --players rows. Runs in a transaction that is rolled back.
+        """
+        if not Player.objects.filter(team__isnull=False).exists():
+            self.stdout.write(self.style.WARNING("No rostered player to copy; seed a league first."))
+            return
+
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                self.pad_players(options['players'] - Player.objects.count())
+                # Spread fitness and injuries so every step of the tick has work to do.
+                Player.objects.update(fitness=Cast(Random() * 60, IntegerField()) + 40)
+                Player.objects.alias(roll=Random()).filter(roll__lt=0.05).update(is_injured=True, injury_duration=5)
+                self.stdout.write(f"Prepared {Player.objects.count()} players in {time.perf_counter() - start:.1f}s.")
+
+                start = time.perf_counter()
+                report = lifecycle.daily_tick()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {report}")
+                self.report('daily tick', elapsed, Player.objects.count(), 'players')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def pad_players(self, missing):
+        """
+        Adds ``missing`` copies of rostered players by copying the table onto
+        itself (doubling it) with INSERT ... SELECT. Meant for rolled-back runs.
+        """
+        qn = connection.ops.quote_name
+        table = qn(Player._meta.db_table)
+        columns = ', '.join(qn(f.column) for f in Player._meta.concrete_fields if not f.primary_key)
+        with connection.cursor() as cursor:
+            while missing > 0:
+                cursor.execute(
+                    f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table} "
+                    f"WHERE {qn('team_id')} IS NOT NULL LIMIT %s", [missing],
+                )
+                missing -= cursor.rowcount
+
+    # --- transfer order books ---
+
+    def bench_orderbook(self, options):
+        """
+        One matching pass over --bids open bids spread over --market players on
+        the market. Runs in a transaction that is rolled back.
+        """
+        team_ids = list(Team.objects.values_list('id', flat=True))
+        if not team_ids or not Player.objects.filter(team__isnull=False).exists():
+            self.stdout.write(self.style.WARNING("No rostered player to copy; seed a league first."))
+            return
+        rng = np.random.default_rng(options['seed'])
+
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                TransferBid.objects.filter(status=TransferBid.OPEN).update(status=TransferBid.CANCELLED)
+                last_id = Player.objects.order_by('-id').values_list('id', flat=True).first()
+                self.pad_players(options['market'])
+                Player.objects.filter(id__gt=last_id).update(team=None, is_on_transfer_list=False, asking_price=None)
+                market = list(Player.objects.filter(id__gt=last_id).values_list('id', 'market_value'))
+
+                # Distinct (player, team) pairs, bids between 70% and 150% of the player's value.
+                n_bids = min(options['bids'], len(market) * len(team_ids))
+                pairs = rng.choice(len(market) * len(team_ids), n_bids, replace=False)
+                factors = rng.uniform(0.7, 1.5, n_bids)
+                TransferBid.objects.bulk_create([
+                    TransferBid(player_id=market[pair // len(team_ids)][0], team_id=team_ids[pair % len(team_ids)],
+                                price=max(int(market[pair // len(team_ids)][1] * factor), 1), contract_years=2)
+                    for pair, factor in zip(pairs.tolist(), factors.tolist())
+                ], batch_size=2000)
+                self.stdout.write(f"Prepared {len(market)} players on the market and {n_bids} bids "
+                                  f"in {time.perf_counter() - start:.1f}s.")
+
+                start = time.perf_counter()
+                report = orderbook.match_bids()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {len(report.fills)} transfers, {report.expired} bids expired")
+                self.report('order book pass', elapsed, report.open_bids, 'bids')
+                raise Rollback
+        except Rollback:
+            pass
+
+    # --- AI transfers ---
+
+    def bench_ai(self, options):
+        """
+        One AI transfer pass for --teams manager-less teams (empty copies of the
+        existing teams are added as needed) against --market free agents. Runs
+        in a transaction that is rolled back.
+        """
+        if not Player.objects.filter(team__isnull=False).exists():
+            self.stdout.write(self.style.WARNING("No rostered player to copy; seed a league first."))
+            return
+        qn = connection.ops.quote_name
+        table = qn(Team._meta.db_table)
+        copied = [f for f in Team._meta.concrete_fields if not f.primary_key and f.name not in ('name', 'user')]
+        columns = ', '.join(qn(f.column) for f in copied)
+
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    missing = options['teams'] - Team.objects.filter(user__isnull=True).count()
+                    while missing > 0:
+                        # Team names are unique: suffix the copies with their source id and a counter.
+                        cursor.execute(
+                            f"INSERT INTO {table} ({qn('name')}, {columns}) "
+                            f"SELECT {qn('name')} || ' ' || %s || '-' || {qn('id')}, {columns} FROM {table} LIMIT %s",
+                            [missing, missing],
+                        )
+                        missing -= cursor.rowcount
+                last_id = Player.objects.order_by('-id').values_list('id', flat=True).first()
+                self.pad_players(options['market'])
+                Player.objects.filter(id__gt=last_id).update(team=None, is_on_transfer_list=False, asking_price=None,
+                                                             is_injured=False)
+                self.stdout.write(f"Prepared {Team.objects.filter(user__isnull=True).count()} AI teams and "
+                                  f"{Player.objects.filter(team__isnull=True).count()} free agents "
+                                  f"in {time.perf_counter() - start:.1f}s.")
+
+                start = time.perf_counter()
+                report = aimanager.run_ai_transfers(seed=options['seed'])
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {len(report.signings)} signings in {report.rounds} rounds")
+                self.report('AI transfer pass', elapsed, report.teams, 'teams')
+                raise Rollback
+        except Rollback:
+            pass
+
+    # --- schedules ---
+
+    def bench_schedule(self, options):
+        """
+        Schedules --new-leagues fresh leagues of --league-size teams with
+        ``schedule.create_schedules``, against the old command's one
+        ``Match.objects.create`` per fixture on --legacy-leagues of them. Runs
+        in a transaction that is rolled back, so the old path is measured
+        without its per-row commits (it is slower still in real use).
+        """
+        size = options['league_size']
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                leagues = League.objects.bulk_create(
+                    [League(name=f'Benchmark league {i}', level=99) for i in range(options['new_leagues'])],
+                    batch_size=2000)
+                league_ids = [league.id for league in leagues]
+                Team.objects.bulk_create([
+                    Team(name=f'Benchmark team {league_id}-{i}', league_id=league_id, coach_name='-',
+                         arena_name='-', home_jersey_color='-', away_jersey_color='-')
+                    for league_id in league_ids for i in range(size)
+                ], batch_size=2000)
+                self.stdout.write(f"Prepared {len(league_ids)} leagues of {size} teams "
+                                  f"in {time.perf_counter() - start:.1f}s.")
+
+                legacy = league_ids[:options['legacy_leagues']]
+                teams = {}
+                for league_id, team_id in Team.objects.filter(league_id__in=legacy).values_list('league_id', 'id'):
+                    teams.setdefault(league_id, []).append(team_id)
+                start = time.perf_counter()
+                created = 0
+                for league_id in legacy:
+                    for round_index, pairs in enumerate(schedule.double_round_robin(teams[league_id])):
+                        for home, away in pairs:
+                            Match.objects.create(league_id=league_id, season=1, home_team_id=home,
+                                                 away_team_id=away, match_date=timezone.now(),
+                                                 match_round=round_index + 1)
+                            created += 1
+                legacy_time = time.perf_counter() - start
+                self.report('one create() per match', legacy_time, created, 'matches')
+                Match.objects.filter(league_id__in=legacy).delete()
+
+                start = time.perf_counter()
+                report = schedule.create_schedules(league_ids, seed=options['seed'])
+                elapsed = time.perf_counter() - start
+                self.report('create_schedules', elapsed, report.matches, 'matches')
+                self.stdout.write(self.style.SUCCESS(
+                    f"schedule: {(report.matches / elapsed) / (created / legacy_time):.1f}x the matches/s"))
+                raise Rollback
+        except Rollback:
+            pass
+
+    # --- world generation ---
+
+    def bench_world(self, options):
+        """
+        Generates --new-leagues leagues of --league-size teams with
+        --roster-size players each with ``worldgen.generate_world``, in a
+        transaction that is rolled back.
+        """
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                report = worldgen.generate_world(options['new_leagues'], options['league_size'],
+                                                 options['roster_size'], seed=options['seed'])
+                elapsed = time.perf_counter() - start
+                self.report('generate_world', elapsed, report.players, 'players')
+                self.stdout.write(f"{report.leagues} leagues, {report.teams} teams in {elapsed:.1f}s.")
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,38 @@
+# In file: TopFiveBack/management/commands/compact_events.py
+
+from django.core.management.base import BaseCommand
+
+from TopFiveBack import eventstore
+from TopFiveBack.models import League
+
+
+class Command(BaseCommand):
+    help = "Compacts the play-by-play of finished seasons into archive segments and applies retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-seasons', type=int, default=None,
+                            help='Delete play-by-play of seasons more than this many seasons '
+                                 'before the current one (default: keep everything).')
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only this league id (repeatable).')
+
+    def handle(self, *args, **options):
+        current = dict(League.objects.values_list('id', 'current_season_year'))
+        keep = options['keep_seasons']
+        compacted = dropped = 0
+
+        for league_id, season, loose in eventstore.stored_seasons():
+            if options['leagues'] and league_id not in options['leagues']:
+                continue
+            if league_id not in current or season >= current[league_id]:
+                continue  # the season is still being played (or its league is unknown)
+            if keep is not None and season < current[league_id] - keep:
+                eventstore.drop_season(league_id, season)
+                dropped += 1
+                self.stdout.write(f"  - Dropped league {league_id}, season {season}")
+            elif loose:
+                games = eventstore.compact_season(league_id, season)
+                compacted += 1
+                self.stdout.write(f"  - Compacted {games} games of league {league_id}, season {season}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Compacted {compacted} seasons, dropped {dropped}."))
@@ -1,112 +1,31 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import timedelta
-import random
-
-from TopFiveBack.models import League, Match
+# In file: TopFiveBack/management/commands/create_schedule.py
 
+import time
 
-class Command(BaseCommand):
-    help = "Create a round-robin schedule for each league"
-
-    def handle(self, *args, **kwargs):
-        print("==> create_schedule command is running...")
+from django.core.management.base import BaseCommand
 
-        leagues = League.objects.all().order_by('-id')
-        for league in leagues:
-            self.stdout.write(f"Creating schedule for league: {league.name}")
-            self.create_schedule_for_league(league)
+from TopFiveBack import schedule
 
-    def create_schedule_for_league(self, league):
-        teams = list(league.teams.all())
-        num_teams = len(teams)
 
-        if num_teams < 2 or num_teams % 2 != 0:
+class Command(BaseCommand):
+    help = ("Creates the double round-robin schedule of every league's current season. "
+            "Leagues that already have fixtures for the season are skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only schedule this league id (repeatable).')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for the team order.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        report = schedule.create_schedules(options['leagues'], seed=options['seed'])
+        elapsed = time.perf_counter() - start
+        for league_id, n_teams in report.invalid:
             self.stdout.write(self.style.ERROR(
-                f"League {league.name} must have even number of teams >= 2. Currently: {num_teams}"
+                f"League {league_id} must have an even number of teams >= 2. Currently: {n_teams}"
             ))
-            return
-
-        base_date = timezone.now() + timedelta(days=10)
-        days_between_rounds = 3
-
-        random.shuffle(teams)
-
-        rounds = []
-        num_rounds = num_teams - 1
-        half = num_teams // 2
-
-        # שלב 1: צור זוגות למחזורי הליגה
-        for round_index in range(num_rounds):
-            round_matches = []
-            for i in range(half):
-                home = teams[i]
-                away = teams[num_teams - 1 - i]
-                round_matches.append((home, away))
-            rounds.append(round_matches)
-            teams = [teams[0]] + [teams[-1]] + teams[1:-1]
-
-        current_round = 1
-        current_date = base_date
-        first_rounds = []
-
-        # שלב 2: צור סיבוב ראשון עם איזון רנדומלי של בית/חוץ
-        for round_matches in rounds:
-            balanced_round = []
-            home_count = 0
-            away_count = 0
-
-            for home, away in round_matches:
-                if home_count >= 5:
-                    balanced_round.append((away, home))
-                    away_count += 1
-                elif away_count >= 5:
-                    balanced_round.append((home, away))
-                    home_count += 1
-                else:
-                    if random.choice([True, False]):
-                        balanced_round.append((home, away))
-                        home_count += 1
-                    else:
-                        balanced_round.append((away, home))
-                        away_count += 1
-
-            first_rounds.append(balanced_round)
-
-            for home, away in balanced_round:
-                Match.objects.create(
-                    league=league,
-                    home_team=home,
-                    away_team=away,
-                    match_date=current_date,
-                    match_round=current_round,
-                    home_team_score=0,
-                    away_team_score=0,
-                    completed=False,
-                    current_quarter=1,
-                    game_clock=timedelta(minutes=10),
-                    possession_team=None
-                )
-            current_round += 1
-            current_date += timedelta(days=days_between_rounds)
-
-        # שלב 3: צור סיבוב שני – היפוך בית/חוץ
-        for round_matches in first_rounds:
-            for home, away in round_matches:
-                Match.objects.create(
-                    league=league,
-                    home_team=away,  # היפוך
-                    away_team=home,
-                    match_date=current_date,
-                    match_round=current_round,
-                    home_team_score=0,
-                    away_team_score=0,
-                    completed=False,
-                    current_quarter=1,
-                    game_clock=timedelta(minutes=10),
-                    possession_team=None
-                )
-            current_round += 1
-            current_date += timedelta(days=days_between_rounds)
-
-        self.stdout.write(self.style.SUCCESS(f"✅ Schedule created for league: {league.name}"))
+        if report.already_scheduled:
+            self.stdout.write(f"Skipped {len(report.already_scheduled)} leagues that are already scheduled.")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report.matches} matches scheduled for {len(report.scheduled)} leagues ({elapsed:.2f}s)."
+        ))
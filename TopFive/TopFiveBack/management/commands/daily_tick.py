@@ -0,0 +1,25 @@
+# In file: TopFiveBack/management/commands/daily_tick.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from TopFiveBack import lifecycle
+
+
+class Command(BaseCommand):
+    help = "Advances player fitness, injuries and contracts by one day (set-based updates)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help='Number of days the tick covers.')
+        parser.add_argument('--no-injuries', action='store_true', help="Don't roll for new injuries.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = lifecycle.daily_tick(days=max(options['days'], 1), injuries=not options['no_injuries'])
+        self.stdout.write(
+            f"Healed {report.healed} (still injured: {report.still_injured}), "
+            f"fitness recovered for {report.recovered}, new injuries {report.injured}, "
+            f"contracts expired {report.contracts_expired}."
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Daily tick done in {time.perf_counter() - started:.2f}s."))
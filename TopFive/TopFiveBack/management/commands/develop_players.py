@@ -0,0 +1,27 @@
+# In file: TopFiveBack/management/commands/develop_players.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from TopFiveBack import progression
+
+
+class Command(BaseCommand):
+    help = ("Runs one season of player development (age, minutes played, game IQ and training focus) "
+            "over every active player. Use --dry-run to only print what would change.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible development.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Print the distribution of the changes without writing them.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary = progression.develop_players(seed=options['seed'], dry_run=options['dry_run'])
+        for line in summary.lines():
+            self.stdout.write(line)
+        verb = 'Simulated (dry run)' if options['dry_run'] else 'Applied'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} development of {summary.players} players in {time.perf_counter() - started:.2f}s."
+        ))
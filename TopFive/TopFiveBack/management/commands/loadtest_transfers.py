@@ -0,0 +1,145 @@
+# In file: TopFiveBack/management/commands/loadtest_transfers.py
+
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from TopFiveBack import responsecache, snapshot, transfers
+from TopFiveBack.models import Player, Team, refresh_team_ratings
+
+PLAYER_STATE_FIELDS = ('team_id', 'is_on_transfer_list', 'asking_price', 'contract_years', 'market_value')
+
+
+def run_attempts(attempts):
+    """
+    Fires ``(buyer_id, player_id, contract_years)`` purchases one after the
+    other; returns one ``(outcome, buyer_id, player_id, seller_id, price)``
+    per attempt. Runs in a worker thread or process.
+    """
+    outcomes = []
+    try:
+        for buyer_id, player_id, contract_years in attempts:
+            try:
+                purchase = transfers.buy_player(buyer_id, player_id, contract_years)
+            except transfers.TransferError as e:
+                outcomes.append((f'rejected ({e.status})', buyer_id, player_id, None, 0))
+            except OperationalError:
+                # e.g. SQLite's "database is locked" once the busy timeout runs out.
+                outcomes.append(('db error', buyer_id, player_id, None, 0))
+            else:
+                outcomes.append(('bought', buyer_id, player_id, purchase.seller_id, purchase.price))
+    finally:
+        connections.close_all()
+    return outcomes
+
+
+class Command(BaseCommand):
+    help = ("Fires concurrent transfer purchases at the database and checks the invariants "
+            "(no player sold twice, no negative budget, money conserved). Restores the touched "
+            "rows afterwards unless --keep is given; run it against a scratch copy of the database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buys', type=int, default=5000, help='Purchase attempts in total.')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent workers.')
+        parser.add_argument('--processes', action='store_true', help='Use worker processes instead of threads.')
+        parser.add_argument('--players', type=int, default=200,
+                            help='Size of the pool of on-market players everybody competes for.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keep', action='store_true', help='Keep the purchases instead of restoring.')
+
+    def handle(self, *args, **options):
+        player_ids = list(Player.objects.on_market().order_by('id')
+                          .values_list('id', flat=True)[:options['players']])
+        team_ids = list(Team.objects.order_by('id').values_list('id', flat=True))
+        if not player_ids or len(team_ids) < 2:
+            raise CommandError("Need at least one player on the market and two teams.")
+
+        budgets_before = dict(Team.objects.values_list('id', 'budget'))
+        players_before = {row[0]: row[1:] for row in
+                          Player.objects.filter(id__in=player_ids).values_list('id', *PLAYER_STATE_FIELDS)}
+        squads_before = Counter(Player.objects.filter(team__isnull=False).values_list('team_id', flat=True))
+
+        rng = np.random.default_rng(options['seed'])
+        attempts = list(zip(
+            rng.choice(team_ids, options['buys']).tolist(),
+            rng.choice(player_ids, options['buys']).tolist(),
+            rng.integers(transfers.MIN_CONTRACT_YEARS, transfers.MAX_CONTRACT_YEARS + 1, options['buys']).tolist(),
+        ))
+        workers = max(options['workers'], 1)
+        chunks = [attempts[i::workers] for i in range(workers)]
+
+        connections.close_all()
+        if options['processes']:
+            executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+        else:
+            executor = ThreadPoolExecutor(workers)
+        start = time.perf_counter()
+        with executor:
+            outcomes = [outcome for chunk in executor.map(run_attempts, chunks) for outcome in chunk]
+        elapsed = time.perf_counter() - start
+
+        counts = Counter(outcome[0] for outcome in outcomes)
+        mode = 'processes' if options['processes'] else 'threads'
+        self.stdout.write(f"{len(outcomes)} attempts on {len(player_ids)} players by {len(team_ids)} teams, "
+                          f"{workers} {mode}: {elapsed:.2f}s ({len(outcomes) / elapsed:,.0f} attempts/s)")
+        for outcome, count in sorted(counts.items()):
+            self.stdout.write(f"  - {outcome}: {count}")
+
+        violations = self.check_invariants(outcomes, budgets_before, players_before, squads_before)
+        for violation in violations[:20]:
+            self.stdout.write(self.style.ERROR(f"  ! {violation}"))
+
+        if not options['keep']:
+            self.restore(budgets_before, players_before)
+
+        if violations:
+            raise CommandError(f"{len(violations)} invariant violations.")
+        self.stdout.write(self.style.SUCCESS("✅ No invariant violations."))
+
+    def check_invariants(self, outcomes, budgets_before, players_before, squads_before):
+        bought = [outcome for outcome in outcomes if outcome[0] == 'bought']
+        budgets_after = dict(Team.objects.values_list('id', 'budget'))
+        owners_after = dict(Player.objects.filter(id__in=list(players_before)).values_list('id', 'team_id'))
+        squads_after = Counter(Player.objects.filter(team__isnull=False).values_list('team_id', flat=True))
+        violations = []
+
+        # A bought player leaves the market, so it can be sold at most once.
+        sales = Counter(player_id for _, _, player_id, _, _ in bought)
+        violations += [f"player {player_id} sold {n} times" for player_id, n in sales.items() if n > 1]
+        for _, buyer_id, player_id, _, _ in bought:
+            if owners_after[player_id] != buyer_id:
+                violations.append(f"player {player_id} bought by team {buyer_id} but owned by {owners_after[player_id]}")
+
+        # Every team's budget moved by exactly what it paid and received.
+        expected = dict(budgets_before)
+        for _, buyer_id, _, seller_id, price in bought:
+            expected[buyer_id] -= price
+            if seller_id is not None:
+                expected[seller_id] += price
+        for team_id, budget in budgets_after.items():
+            if budget < 0:
+                violations.append(f"team {team_id} has a negative budget ({budget})")
+            if budget != expected.get(team_id):
+                violations.append(f"team {team_id} budget is {budget}, expected {expected.get(team_id)}")
+
+        for team_id in {buyer_id for _, buyer_id, _, _, _ in bought}:
+            if squads_after[team_id] > max(transfers.MAX_SQUAD_SIZE, squads_before[team_id]):
+                violations.append(f"team {team_id} has {squads_after[team_id]} players")
+        return violations
+
+    def restore(self, budgets_before, players_before):
+        teams = [Team(id=team_id, budget=budget) for team_id, budget in budgets_before.items()]
+        Team.objects.bulk_update(teams, ['budget'], batch_size=500)
+        players = [Player(id=player_id, **dict(zip(PLAYER_STATE_FIELDS, state)))
+                   for player_id, state in players_before.items()]
+        Player.objects.bulk_update(players, list(PLAYER_STATE_FIELDS), batch_size=500)
+        # The buyers aren't known to bulk_update; refresh every team.
+        refresh_team_ratings(budgets_before)
+        snapshot.invalidate()
+        responsecache.bump(responsecache.WORLD)
+        self.stdout.write("Restored budgets and players.")
@@ -0,0 +1,24 @@
+# In file: TopFiveBack/management/commands/match_bids.py
+
+from django.core.management.base import BaseCommand
+
+from TopFiveBack import orderbook
+
+
+class Command(BaseCommand):
+    help = "Runs one matching pass over the transfer order books (meant to run periodically)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-fills', action='store_true', help='Print every fill.')
+
+    def handle(self, *args, **options):
+        report = orderbook.match_bids()
+        if options['verbose_fills']:
+            for fill in report.fills:
+                seller = f"team {fill.seller_id}" if fill.seller_id else "free agency"
+                self.stdout.write(f"  - Player {fill.player_id}: {seller} -> team {fill.buyer_id} "
+                                  f"for ${fill.price:,} ({fill.contract_years}y)")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report.open_bids} open bids on {report.books} players: "
+            f"{len(report.fills)} transfers, {report.expired} bids expired."
+        ))
@@ -0,0 +1,110 @@
+# In file: TopFiveBack/management/commands/rebuild_player_stats.py
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from TopFiveBack import eventstore, simulation
+from TopFiveBack.models import Match, Player, PlayerSeasonStats, Team
+
+# Games whose events are reduced to player lines at a time.
+GAME_BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = "Rebuilds PlayerSeasonStats from the play-by-play in the event store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only this league id (repeatable).')
+        parser.add_argument('--season', type=int, default=None, help='Only this season.')
+        parser.add_argument('--allow-missing', action='store_true',
+                            help='Rebuild seasons even when some completed matches have no play-by-play '
+                                 '(their stats are lost).')
+
+    def handle(self, *args, **options):
+        seasons = sorted({
+            (league_id, season) for league_id, season, _ in eventstore.stored_seasons()
+            if (not options['leagues'] or league_id in options['leagues'])
+            and (options['season'] is None or season == options['season'])
+        })
+        if not seasons:
+            self.stdout.write(self.style.WARNING("No play-by-play stored for the requested seasons."))
+            return
+        rebuilt = 0
+        for league_id, season in seasons:
+            games, rows, missing = self.rebuild(league_id, season, options['allow_missing'])
+            if missing and not options['allow_missing']:
+                self.stdout.write(self.style.WARNING(
+                    f"  - League {league_id}, season {season}: skipped, {missing} completed matches have "
+                    f"no play-by-play (--allow-missing rebuilds it anyway)"))
+                continue
+            rebuilt += 1
+            self.stdout.write(f"  - League {league_id}, season {season}: {games} games, {rows} players")
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt player stats for {rebuilt} of {len(seasons)} seasons."))
+
+    def rebuild(self, league_id, season, allow_missing=False):
+        """
+        Replaces one season's rows with totals recomputed from its games,
+        reading them a batch at a time. Returns ``(games, rows, missing)``;
+        the rows are left alone when ``missing`` completed matches have no
+        play-by-play, unless ``allow_missing``.
+        """
+        matches = {
+            match_id: (home, away, completed) for match_id, home, away, completed in
+            Match.objects.filter(league_id=league_id, season=season)
+            .values_list('id', 'home_team_id', 'away_team_id', 'completed')
+        }
+        stored, last_team, batch, partials = set(), {}, [], []
+        for match_id, events in eventstore.iter_season(league_id, season):
+            stored.add(match_id)
+            home, away, _ = matches.get(match_id, (None, None, False))
+            played = events[events['kind'] == simulation.EVENT_MINUTES]
+            for player_id, side in zip(played['player'].tolist(), played['side'].tolist()):
+                last_team[player_id] = away if side else home
+            batch.append(events)
+            if len(batch) == GAME_BATCH_SIZE:
+                partials.append(simulation.player_lines(np.concatenate(batch)))
+                batch = []
+        if batch:
+            partials.append(simulation.player_lines(np.concatenate(batch)))
+
+        missing = sum(1 for match_id, (_, _, completed) in matches.items()
+                      if completed and match_id not in stored)
+        if missing and not allow_missing:
+            return len(stored), 0, missing
+
+        player_ids, lines, appearances = _merge_lines(partials)
+        existing_players = set(Player.objects.filter(id__in=player_ids.tolist()).values_list('id', flat=True))
+        existing_teams = set(Team.objects.filter(id__in=set(last_team.values()) - {None})
+                             .values_list('id', flat=True))
+
+        rows = []
+        for player_id, line, games in zip(player_ids.tolist(), lines.tolist(), appearances.tolist()):
+            if player_id not in existing_players or not games:
+                continue
+            team_id = last_team.get(player_id)
+            totals = {name: line[simulation.BOX_INDEX[name]] for name in PlayerSeasonStats.TOTAL_FIELDS}
+            rows.append(PlayerSeasonStats(
+                player_id=player_id, league_id=league_id, season=season,
+                team_id=team_id if team_id in existing_teams else None,
+                games_played=games, rebounds=totals['oreb'] + totals['dreb'], **totals,
+            ))
+
+        with transaction.atomic():
+            PlayerSeasonStats.objects.filter(league_id=league_id, season=season).delete()
+            PlayerSeasonStats.objects.bulk_create(rows, batch_size=500)
+        return len(stored), len(rows), missing
+
+
+def _merge_lines(partials):
+    """Sums the ``player_lines`` of several batches of games, per player."""
+    if not partials:
+        return (np.zeros(0, dtype=np.int64), np.zeros((0, len(simulation.BOX_FIELDS)), dtype=np.int64),
+                np.zeros(0, dtype=np.int64))
+    player_ids, rows = np.unique(np.concatenate([ids for ids, _, _ in partials]), return_inverse=True)
+    lines = np.zeros((len(player_ids), len(simulation.BOX_FIELDS)), dtype=np.int64)
+    np.add.at(lines, rows, np.concatenate([batch_lines for _, batch_lines, _ in partials]))
+    appearances = np.bincount(rows, np.concatenate([games for _, _, games in partials]),
+                              minlength=len(player_ids)).astype(np.int64)
+    return player_ids, lines, appearances
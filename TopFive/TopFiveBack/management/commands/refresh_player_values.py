@@ -0,0 +1,25 @@
+# In file: TopFiveBack/management/commands/refresh_player_values.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from TopFiveBack import responsecache
+from TopFiveBack.models import Player
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stored rating and market value of every player (set-based backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only players of teams in this league id (repeatable).')
+
+    def handle(self, *args, **options):
+        players = Player.objects.all()
+        if options['leagues']:
+            players = players.filter(team__league_id__in=options['leagues'])
+        with transaction.atomic():
+            updated = players.refresh_values()
+            # Ratings and values show in squads, the market and the team ratings everywhere.
+            responsecache.invalidate(world=True)
+        self.stdout.write(self.style.SUCCESS(f"✅ Refreshed rating and market value of {updated} players."))
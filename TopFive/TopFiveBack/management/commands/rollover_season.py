@@ -0,0 +1,31 @@
+# In file: TopFiveBack/management/commands/rollover_season.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from TopFiveBack import seasons
+
+
+class Command(BaseCommand):
+    help = ("Ends the current season of every league: players develop, age, retire and lose a contract year, "
+            "expired contracts go to free agency and the next season's standings are created.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=None, help='Seed for a reproducible rollover.')
+        parser.add_argument('--force', action='store_true',
+                            help='Roll over even if some matches of the current seasons are not played.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            report = seasons.rollover_season(seed=options['seed'], force=options['force'])
+        except seasons.RolloverError as e:
+            raise CommandError(f"{e} Play them first or use --force.")
+        self.stdout.write(
+            f"{report.players} players developed, {report.retired} retired, "
+            f"{report.released} released to free agency; {report.teams} teams set up for the new season."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report.leagues} leagues rolled over in {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,54 @@
+# In file: TopFiveBack/management/commands/simulate_round.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from TopFiveBack import eventstore, rounds, snapshot
+from TopFiveBack.results import record_results
+
+
+class Command(BaseCommand):
+    help = "Simulates the next round of every league and stores the results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=rounds.default_workers(),
+                            help='Worker processes (1 runs everything in-process).')
+        parser.add_argument('--chunk-size', type=int, default=rounds.DEFAULT_CHUNK_SIZE,
+                            help='Games per engine batch / pool task.')
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only simulate this league id (repeatable).')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible results.')
+        parser.add_argument('--no-events', action='store_true',
+                            help="Don't record play-by-play in the event store.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        fixtures = rounds.next_round_fixtures(options['leagues'])
+        if not fixtures:
+            self.stdout.write(self.style.WARNING("No uncompleted matches found."))
+            return
+
+        team_ids = {f[3] for f in fixtures} | {f[4] for f in fixtures}
+        sides = snapshot.get_snapshot(options['leagues']).sides(team_ids)
+        loaded = time.perf_counter()
+
+        results = rounds.simulate_fixtures(
+            fixtures, sides,
+            workers=options['workers'], chunk_size=options['chunk_size'], seed=options['seed'],
+            record_events=not options['no_events'],
+        )
+        simulated = time.perf_counter()
+
+        stored = record_results(results)
+        eventstore.write_games(
+            (r.match_id, r.league_id, r.season, r.events) for r in stored if r.events is not None
+        )
+        finished = time.perf_counter()
+
+        leagues = len({f[1] for f in fixtures})
+        self.stdout.write(
+            f"Loaded {len(fixtures)} matches in {leagues} leagues ({loaded - started:.2f}s), "
+            f"simulated ({simulated - loaded:.2f}s), saved ({finished - simulated:.2f}s)."
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Round simulated: {len(results)} matches."))
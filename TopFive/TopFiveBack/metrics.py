@@ -0,0 +1,230 @@
+# file: TopFiveBack/metrics.py
+"""
+Per-endpoint request metrics, exported in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and counts its database queries
+and their time. Every database connection gets one execute wrapper when it
+opens (``install``, connected in ``apps.py``), which hands each query to the
+``QueryProbe`` of the current request, found through a context variable.
+That works in the WSGI and the ASGI chains alike: asgiref carries context
+variables into ``sync_to_async`` threads, so the queries of sync views under
+ASGI and of async views (the live SSE stream) are counted wherever they run.
+The live match producer is shared by its viewers and outlives the request
+that started it, so it runs outside any request (see ``live.py``). The
+numbers go into
+in-process histograms keyed by the resolved URL name and the HTTP method.
+Recording a request takes a few microseconds: a handful of ``perf_counter``
+calls and bucket increments under a lock. Nothing is formatted until
+``/api/metrics`` is scraped.
+
+Setting ``TOPFIVE_SLOW_REQUEST_MS`` also keeps the SQL of each request, and
+any request slower than that many milliseconds is logged to
+``TopFiveBack.slow_requests`` with its statements and their timings.
+
+The histograms are per process. Under several workers, scrape each one, or
+aggregate in Prometheus.
+
+Reading ``/api/metrics`` takes ``TOPFIVE_METRICS_TOKEN`` or a staff session
+(see ``views.metrics_view`` and settings).
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import responsecache
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+UNRESOLVED = '<unresolved>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger('TopFiveBack.slow_requests')
+
+
+class Histogram:
+    """Cumulative-on-export histogram: ``counts[i]`` holds the values in ``(buckets[i-1], buckets[i]]``."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """(le, cumulative count) pairs, ending with ``+Inf``."""
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            yield ('+Inf' if bound == float('inf') else repr(bound)), total
+
+
+class EndpointMetrics:
+    __slots__ = ('statuses', 'duration', 'queries', 'db_time')
+
+    def __init__(self):
+        self.statuses = {}
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, view, method, status, duration, queries, db_time):
+        with self._lock:
+            endpoint = self._endpoints.get((view, method))
+            if endpoint is None:
+                endpoint = self._endpoints[(view, method)] = EndpointMetrics()
+            endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+            endpoint.duration.observe(duration)
+            endpoint.queries.observe(queries)
+            endpoint.db_time.observe(db_time)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = ['# HELP topfive_http_requests_total Requests by URL name, method and status.',
+                     '# TYPE topfive_http_requests_total counter']
+            for (view, method), endpoint in endpoints:
+                for status, count in sorted(endpoint.statuses.items()):
+                    lines.append(f'topfive_http_requests_total{_labels(view, method, status=status)} {count}')
+            for name, attribute, help_text in (
+                ('topfive_http_request_duration_seconds', 'duration', 'Wall time per request.'),
+                ('topfive_http_request_queries', 'queries', 'Database queries per request.'),
+                ('topfive_http_request_db_seconds', 'db_time', 'Database time per request.'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (view, method), endpoint in endpoints:
+                    histogram = getattr(endpoint, attribute)
+                    for le, count in histogram.samples():
+                        lines.append(f'{name}_bucket{_labels(view, method, le=le)} {count}')
+                    lines.append(f'{name}_sum{_labels(view, method)} {histogram.sum!r}')
+                    lines.append(f'{name}_count{_labels(view, method)} {histogram.count}')
+
+        cache = responsecache.stats()
+        for key, help_text in (('hits', 'Responses served from the response cache.'),
+                               ('misses', 'Responses built and stored in the response cache.'),
+                               ('not_modified', 'Conditional GETs answered 304 from the response cache.')):
+            name = f'topfive_response_cache_{key}_total'
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {cache[key]}']
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(view, method, **extra):
+    pairs = {'view': view, 'method': method, **extra}
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items()) + '}'
+
+
+registry = Registry()
+
+
+class QueryProbe:
+    """Counts and times queries, and optionally keeps their SQL."""
+    __slots__ = ('queries', 'time', 'statements')
+
+    def __init__(self, capture=False):
+        self.queries = 0
+        self.time = 0.0
+        self.statements = [] if capture else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.time += elapsed
+            if self.statements is not None:
+                self.statements.append((elapsed, sql))
+
+
+# The probe of the request being served, if any.
+_probe = contextvars.ContextVar('topfive_query_probe', default=None)
+
+
+def _dispatch(execute, sql, params, many, context):
+    probe = _probe.get()
+    if probe is None:
+        return execute(sql, params, many, context)
+    return probe(execute, sql, params, many, context)
+
+
+def install(sender=None, connection=None, **kwargs):
+    """``connection_created`` receiver: routes the connection's queries to the current probe."""
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+class MetricsMiddleware:
+    """
+    Records every request into ``registry``; goes first in ``MIDDLEWARE``.
+    Runs natively in both the sync and the async chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'TOPFIVE_SLOW_REQUEST_MS', None)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        probe = QueryProbe(capture=self.slow_ms is not None)
+        token = _probe.set(probe)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _probe.reset(token)
+        self.record(request, response, time.perf_counter() - start, probe)
+        return response
+
+    async def __acall__(self, request):
+        probe = QueryProbe(capture=self.slow_ms is not None)
+        token = _probe.set(probe)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _probe.reset(token)
+        self.record(request, response, time.perf_counter() - start, probe)
+        return response
+
+    def record(self, request, response, duration, probe):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else UNRESOLVED
+        registry.record(view, request.method, response.status_code, duration, probe.queries, probe.time)
+        if self.slow_ms is not None and duration * 1000 >= self.slow_ms:
+            logger.warning(
+                "Slow request: %s %s (%s) took %.1f ms, %d queries in %.1f ms\n%s",
+                request.method, request.get_full_path(), view, duration * 1000, probe.queries, probe.time * 1000,
+                '\n'.join(f'  [{elapsed * 1000:.2f} ms] {sql}' for elapsed, sql in probe.statements),
+            )
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0009_player_asking_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerSeasonStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.PositiveIntegerField(verbose_name='Season Year')),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('fgm', models.PositiveIntegerField(default=0, verbose_name='Field Goals Made')),
+                ('fga', models.PositiveIntegerField(default=0, verbose_name='Field Goals Attempted')),
+                ('tpm', models.PositiveIntegerField(default=0, verbose_name='Threes Made')),
+                ('tpa', models.PositiveIntegerField(default=0, verbose_name='Threes Attempted')),
+                ('ftm', models.PositiveIntegerField(default=0, verbose_name='Free Throws Made')),
+                ('fta', models.PositiveIntegerField(default=0, verbose_name='Free Throws Attempted')),
+                ('oreb', models.PositiveIntegerField(default=0, verbose_name='Offensive Rebounds')),
+                ('dreb', models.PositiveIntegerField(default=0, verbose_name='Defensive Rebounds')),
+                ('rebounds', models.PositiveIntegerField(default=0)),
+                ('assists', models.PositiveIntegerField(default=0)),
+                ('steals', models.PositiveIntegerField(default=0)),
+                ('blocks', models.PositiveIntegerField(default=0)),
+                ('turnovers', models.PositiveIntegerField(default=0)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_season_stats', to='TopFiveBack.league')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='season_stats', to='TopFiveBack.player')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='player_season_stats', to='TopFiveBack.team')),
+            ],
+            options={
+                'verbose_name': 'Player Season Stats',
+                'verbose_name_plural': 'Player Season Stats',
+                'indexes': [models.Index(fields=['league', 'season', '-points'], name='pss_league_points_idx')],
+                'unique_together': {('player', 'league', 'season')},
+            },
+        ),
+    ]
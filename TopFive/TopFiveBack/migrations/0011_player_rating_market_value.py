@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:06
+
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, Greatest, Power, Round
+
+# Frozen copies of the rating and market value formulas as of this
+# migration; later changes to models.py must not change what it computes.
+SKILL_FIELDS = (
+    'shooting_2p', 'shooting_3p', 'free_throws', 'rebound_def',
+    'rebound_off', 'passing', 'blocking', 'defense',
+    'game_iq', 'speed', 'jumping', 'strength', 'stamina',
+)
+
+
+def rating_expression():
+    skills = sum((F(field) for field in SKILL_FIELDS[1:]), F(SKILL_FIELDS[0]))
+    return Round(skills / Value(float(len(SKILL_FIELDS))))
+
+
+def market_value_expression(rating):
+    base_value = Power(Cast(rating, FloatField()) / Value(55.0), Value(4.5)) * Value(650000.0)
+    age_factor = Case(
+        When(age__lte=27, then=Value(1.0) + (Value(27.0) - F('age')) * Value(0.06)),
+        default=Greatest(Value(1.0) - (F('age') - Value(27.0)) * Value(0.09), Value(0.2)),
+        output_field=FloatField(),
+    )
+    contract_factor = Case(
+        When(contract_years=0, then=Value(1.0)),
+        default=Value(1.0) + F('contract_years') * Value(0.15),
+        output_field=FloatField(),
+    )
+    return Round(Round(base_value * age_factor * contract_factor / Value(1000.0)) * Value(1000.0) / Value(3.0))
+
+
+def backfill_values(apps, schema_editor):
+    Player = apps.get_model('TopFiveBack', 'Player')
+    Player.objects.update(rating=rating_expression())
+    Player.objects.update(market_value=market_value_expression(F('rating')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0010_playerseasonstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='market_value',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='rating',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_values, migrations.RunPython.noop),
+    ]
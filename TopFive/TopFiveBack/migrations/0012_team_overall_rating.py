@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+def team_overall_rating(ratings):
+    """Frozen copy of ``models.team_overall_rating`` as of this migration."""
+    ordered = sorted(ratings, reverse=True)
+    groups = ((ordered[:5], 0.60), (ordered[5:10], 0.30), (ordered[10:], 0.10))
+    weighted_sum = sum(sum(group) / len(group) * weight for group, weight in groups if group)
+    total_weight = sum(weight for group, weight in groups if group)
+    if total_weight == 0:
+        return 0
+    return round(weighted_sum / total_weight)
+
+
+def backfill_overall_ratings(apps, schema_editor):
+    Team = apps.get_model('TopFiveBack', 'Team')
+    Player = apps.get_model('TopFiveBack', 'Player')
+    ratings = {}
+    for team_id, rating in Player.objects.filter(team__isnull=False).values_list('team_id', 'rating'):
+        ratings.setdefault(team_id, []).append(rating)
+    teams = list(Team.objects.only('id'))
+    for team in teams:
+        team.overall_rating = team_overall_rating(ratings.get(team.id, []))
+    Team.objects.bulk_update(teams, ['overall_rating'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0011_player_rating_market_value'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='overall_rating',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_overall_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:09
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0012_team_overall_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR'), fields=['-rating', '-id'], name='player_market_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR'), fields=['position_primary', '-rating', '-id'], name='player_market_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR'), fields=['age'], name='player_market_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('asking_price', 'market_value'), condition=models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR'), name='player_market_price_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0013_player_market_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferBid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.PositiveIntegerField(verbose_name='Bid (in $)')),
+                ('contract_years', models.PositiveSmallIntegerField(default=1)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('FILLED', 'Filled'), ('CANCELLED', 'Cancelled'), ('EXPIRED', 'Expired')], default='OPEN', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('filled_at', models.DateTimeField(blank=True, null=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfer_bids', to='TopFiveBack.player')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfer_bids', to='TopFiveBack.team')),
+            ],
+            options={
+                'verbose_name': 'Transfer Bid',
+                'verbose_name_plural': 'Transfer Bids',
+                'indexes': [models.Index(condition=models.Q(('status', 'OPEN')), fields=['player', '-price', 'created_at', 'id'], name='bid_book_idx'), models.Index(fields=['team', 'status'], name='bid_team_status_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'OPEN')), fields=('player', 'team'), name='bid_one_open_per_team')],
+            },
+        ),
+    ]
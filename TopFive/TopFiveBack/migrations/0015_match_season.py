@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_seasons(apps, schema_editor):
+    League = apps.get_model('TopFiveBack', 'League')
+    Match = apps.get_model('TopFiveBack', 'Match')
+    Match.objects.update(season=Subquery(
+        League.objects.filter(id=OuterRef('league_id')).values('current_season_year')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0014_transferbid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='season',
+            field=models.PositiveIntegerField(default=0, verbose_name='Season Year'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_seasons, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['league', 'season', 'match_round'], name='match_league_season_idx'),
+        ),
+    ]
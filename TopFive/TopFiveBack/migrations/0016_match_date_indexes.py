@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0015_match_season'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='match',
+            name='away_team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='away_matches', to='TopFiveBack.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='home_team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='home_matches', to='TopFiveBack.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='league',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='TopFiveBack.league'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['league', 'match_date'], name='match_league_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['home_team', 'match_date'], name='match_home_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['away_team', 'match_date'], name='match_away_date_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0016_match_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='player',
+            name='player_market_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='player',
+            name='player_market_position_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='player',
+            name='player_market_age_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='player',
+            name='player_market_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('is_retired', False), models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR')), fields=['-rating', '-id'], name='player_market_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('is_retired', False), models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR')), fields=['position_primary', '-rating', '-id'], name='player_market_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('is_retired', False), models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR')), fields=['age'], name='player_market_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('asking_price', 'market_value'), condition=models.Q(('is_retired', False), models.Q(('team__isnull', True), ('is_on_transfer_list', True), _connector='OR')), name='player_market_price_idx'),
+        ),
+    ]
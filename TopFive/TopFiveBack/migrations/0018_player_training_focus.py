@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0017_player_market_not_retired'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='training_focus',
+            field=models.CharField(choices=[('BALANCED', 'Balanced'), ('SHOOTING', 'Shooting'), ('PLAYMAKING', 'Playmaking'), ('DEFENDING', 'Defending'), ('INSIDE', 'Inside Game'), ('CONDITIONING', 'Conditioning')], default='BALANCED', max_length=12, verbose_name='Training Focus'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TopFiveBack', '0018_player_training_focus'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_league_season_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('league', 'season', 'match_round', 'home_team'), name='match_unique_home_fixture'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 # In TopFiveBack/models.py
 from datetime import timedelta
+import math
 import random
 from django.db import models
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Power, Round
 from django.contrib.auth.models import User
 
 
@@ -25,6 +28,53 @@ class League(models.Model):
         verbose_name_plural = "Leagues"
         ordering = ['level', 'name']
 
+def team_overall_rating(ratings):
+    """
+    Overall rating of a roster from its player ratings: the average of the top
+    five weighs 60%, the next five 30% and everybody else 10%.
+    """
+    ordered = sorted(ratings, reverse=True)
+    groups = ((ordered[:5], 0.60), (ordered[5:10], 0.30), (ordered[10:], 0.10))
+    weighted_sum = sum(sum(group) / len(group) * weight for group, weight in groups if group)
+    total_weight = sum(weight for group, weight in groups if group)
+    if total_weight == 0:
+        return 0
+    return round(weighted_sum / total_weight)
+
+
+class TeamQuerySet(models.QuerySet):
+    def refresh_overall_ratings(self):
+        """
+        Recomputes the stored ``overall_rating`` of every team in the queryset
+        from its players' stored ratings: one read, one batched update.
+        """
+        teams = list(self.only('id', 'overall_rating'))
+        ratings = {team.id: [] for team in teams}
+        for team_id, rating in (Player.objects.filter(team_id__in=list(ratings)).order_by()
+                                .values_list('team_id', 'rating').iterator(chunk_size=5000)):
+            ratings[team_id].append(rating)
+        changed = []
+        for team in teams:
+            overall = team_overall_rating(ratings[team.id])
+            if overall != team.overall_rating:
+                team.overall_rating = overall
+                changed.append(team)
+        self.model.objects.bulk_update(changed, ['overall_rating'], batch_size=500)
+        return len(changed)
+
+
+# Teams refreshed per batch, so that ``id__in`` stays within the database's
+# parameter limit.
+TEAM_REFRESH_BATCH_SIZE = 5000
+
+
+def refresh_team_ratings(team_ids):
+    """Refreshes ``Team.overall_rating`` for the given ids (``None`` entries are ignored)."""
+    team_ids = sorted({team_id for team_id in team_ids if team_id is not None})
+    for first in range(0, len(team_ids), TEAM_REFRESH_BATCH_SIZE):
+        Team.objects.filter(id__in=team_ids[first:first + TEAM_REFRESH_BATCH_SIZE]).refresh_overall_ratings()
+
+
 class Team(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name="Team Name")
     league = models.ForeignKey(League, on_delete=models.CASCADE, related_name="teams", verbose_name="League")
@@ -65,6 +115,13 @@ class Team(models.Model):
         verbose_name="Defensive Stopper"
     )
     
+    # Weighted roster rating (see ``team_overall_rating``), stored so that logins
+    # and admin lists don't load whole rosters. Refreshed whenever a player
+    # joins or leaves the team or a player's rating changes.
+    overall_rating = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
+
+    objects = TeamQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -72,37 +129,6 @@ class Team(models.Model):
     def is_available(self):
         return self.user is None
 
-    @property
-    def overall_rating(self):
-        all_players = self.players.all()
-        if not all_players.exists():
-            return 0
-        
-        all_players_list = list(all_players)
-        ordered_players = sorted(all_players_list, key=lambda p: p.rating, reverse=True)
-        
-        starters, bench, reserves = ordered_players[:5], ordered_players[5:10], ordered_players[10:]
-        
-        starters_avg = sum(p.rating for p in starters) / len(starters) if starters else 0
-        bench_avg = sum(p.rating for p in bench) / len(bench) if bench else 0
-        reserves_avg = sum(p.rating for p in reserves) / len(reserves) if reserves else 0
-        
-        starters_weight, bench_weight, reserves_weight = 0.60, 0.30, 0.10
-        total_weight, weighted_sum = 0, 0
-        
-        if starters:
-            weighted_sum += starters_avg * starters_weight
-            total_weight += starters_weight
-        if bench:
-            weighted_sum += bench_avg * bench_weight
-            total_weight += bench_weight
-        if reserves:
-            weighted_sum += reserves_avg * reserves_weight
-            total_weight += reserves_weight
-            
-        if total_weight == 0: return 0
-        return round(weighted_sum / total_weight)
-
     class Meta:
         verbose_name = "Team"
         verbose_name_plural = "Teams"
@@ -142,6 +168,100 @@ class TeamSeasonStats(models.Model):
         ordering = ['-wins', '-points_for'] # Default ordering for standings
 
 
+PLAYER_SKILL_FIELDS = (
+    'shooting_2p', 'shooting_3p', 'free_throws', 'rebound_def',
+    'rebound_off', 'passing', 'blocking', 'defense',
+    'game_iq', 'speed', 'jumping', 'strength', 'stamina',
+)
+# Columns the stored rating / market value are derived from.
+PLAYER_VALUE_INPUTS = frozenset(PLAYER_SKILL_FIELDS + ('age', 'contract_years'))
+
+
+def player_rating(skills):
+    """Rating from the 13 skill values: their average, rounded half up."""
+    return int(math.floor(sum(skills) / len(skills) + 0.5))
+
+
+def player_market_value(rating, age, contract_years):
+    base_value = (rating / 55) ** 4.5 * 650000
+    if age <= 27:
+        age_factor = 1 + ((27 - age) * 0.06)
+    else:
+        age_factor = max(0.2, 1 - ((age - 27) * 0.09))
+    if contract_years == 0:
+        contract_factor = 1.0
+    else:
+        contract_factor = 1 + (contract_years * 0.15)
+    final_value = base_value * age_factor * contract_factor
+    return int(math.floor(math.floor(final_value / 1000 + 0.5) * 1000 / 3 + 0.5))
+
+
+def rating_expression():
+    """SQL version of ``player_rating`` over the current row."""
+    skills = sum((F(field) for field in PLAYER_SKILL_FIELDS[1:]), F(PLAYER_SKILL_FIELDS[0]))
+    return Round(skills / Value(float(len(PLAYER_SKILL_FIELDS))))
+
+
+def market_value_expression(rating):
+    """SQL version of ``player_market_value``; ``rating`` is an expression."""
+    base_value = Power(Cast(rating, FloatField()) / Value(55.0), Value(4.5)) * Value(650000.0)
+    age_factor = Case(
+        When(age__lte=27, then=Value(1.0) + (Value(27.0) - F('age')) * Value(0.06)),
+        default=Greatest(Value(1.0) - (F('age') - Value(27.0)) * Value(0.09), Value(0.2)),
+        output_field=FloatField(),
+    )
+    contract_factor = Case(
+        When(contract_years=0, then=Value(1.0)),
+        default=Value(1.0) + F('contract_years') * Value(0.15),
+        output_field=FloatField(),
+    )
+    return Round(Round(base_value * age_factor * contract_factor / Value(1000.0)) * Value(1000.0) / Value(3.0))
+
+
+# Players a team can sign: free agents and players listed by their team, as
+# long as they haven't retired. The transfer-market indexes are partial
+# indexes over exactly this condition.
+ON_MARKET = Q(is_retired=False) & (Q(team__isnull=True) | Q(is_on_transfer_list=True))
+
+
+class PlayerQuerySet(models.QuerySet):
+    """
+    Keeps the stored ``rating`` / ``market_value`` columns (and the teams'
+    ``overall_rating``) in sync on the bulk paths that bypass ``Player.save``.
+    Code that changes skills, age or contracts with ``update()`` calls
+    ``refresh_values()`` on the same rows; code that moves players with
+    ``update(team=...)`` calls ``refresh_team_ratings`` for the teams involved.
+    """
+
+    def on_market(self):
+        return self.filter(ON_MARKET)
+
+    def refresh_values(self):
+        """Recomputes the stored columns of every row in the queryset (two UPDATEs)."""
+        updated = self.update(rating=rating_expression())
+        self.update(market_value=market_value_expression(F('rating')))
+        refresh_team_ratings(self.order_by().values_list('team_id', flat=True).distinct())
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.compute_values()
+        created = super().bulk_create(objs, *args, **kwargs)
+        refresh_team_ratings({obj.team_id for obj in objs})
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        if PLAYER_VALUE_INPUTS.intersection(fields):
+            self.model.objects.filter(pk__in=[obj.pk for obj in objs]).refresh_values()
+        if 'team' in fields or 'team_id' in fields:
+            refresh_team_ratings({obj.team_id for obj in objs}
+                                 | {getattr(obj, '_loaded_team_id', None) for obj in objs})
+        return updated
+
+
 class Player(models.Model):
     POINT_GUARD, SHOOTING_GUARD, SMALL_FORWARD, POWER_FORWARD, CENTER = 'PG', 'SG', 'SF', 'PF', 'C'
     POSITION_CHOICES = [
@@ -149,7 +269,11 @@ class Player(models.Model):
         (SMALL_FORWARD, 'Small Forward'), (POWER_FORWARD, 'Power Forward'),
         (CENTER, 'Center'),
     ]
-    
+
+    # The 13 skill columns, in the order used by the rating formula and by the
+    # array-based code (simulation engine, snapshots, progression).
+    SKILL_FIELDS = PLAYER_SKILL_FIELDS
+
     first_name = models.CharField(max_length=50, verbose_name="First Name")
     last_name = models.CharField(max_length=50, verbose_name="Last Name")
     age = models.IntegerField(verbose_name="Age")
@@ -225,35 +349,72 @@ class Player(models.Model):
         verbose_name="Assigned Minutes"
     )
 
+    BALANCED = 'BALANCED'
+    SHOOTING = 'SHOOTING'
+    PLAYMAKING = 'PLAYMAKING'
+    DEFENDING = 'DEFENDING'
+    INSIDE = 'INSIDE'
+    CONDITIONING = 'CONDITIONING'
+
+    TRAINING_FOCUS_CHOICES = [
+        (BALANCED, 'Balanced'),
+        (SHOOTING, 'Shooting'),
+        (PLAYMAKING, 'Playmaking'),
+        (DEFENDING, 'Defending'),
+        (INSIDE, 'Inside Game'),
+        (CONDITIONING, 'Conditioning'),
+    ]
+
+    # The skills the player works on between seasons (see progression.py).
+    training_focus = models.CharField(
+        max_length=12,
+        choices=TRAINING_FOCUS_CHOICES,
+        default=BALANCED,
+        verbose_name="Training Focus"
+    )
+
     asking_price = models.PositiveIntegerField(
         null=True, 
         blank=True, 
         verbose_name="Asking Price"
     )
     
-    @property
-    def rating(self):
-        skills = [
-            self.shooting_2p, self.shooting_3p, self.free_throws, self.rebound_def, 
-            self.rebound_off, self.passing, self.blocking, self.defense, 
-            self.game_iq, self.speed, self.jumping, self.strength, self.stamina
-        ]
-        return round(sum(skills) / len(skills)) if skills else 0
-    
-    @property
-    def market_value(self):
-        base_value = (self.rating / 55) ** 4.5 * 650000
-        if self.age <= 27:
-            age_factor = 1 + ((27 - self.age) * 0.06)
-        else:
-            age_factor = max(0.2, 1 - ((self.age - 27) * 0.09))
-        if self.contract_years == 0:
-            contract_factor = 1.0
-        else:
-            contract_factor = 1 + (self.contract_years * 0.15)
-        final_value = base_value * age_factor * contract_factor
-        return round(final_value / 1000) * 1000 / 3
-    
+    # Stored, indexed copies of the derived rating and market value; kept in
+    # sync by save(), by PlayerQuerySet and by the refresh_player_values command.
+    rating = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
+    market_value = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+
+    objects = PlayerQuerySet.as_manager()
+
+    def compute_values(self):
+        self.rating = player_rating([getattr(self, field) for field in self.SKILL_FIELDS])
+        self.market_value = player_market_value(self.rating, self.age, self.contract_years)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that save() knows which teams' overall rating to refresh.
+        instance._loaded_team_id = instance.__dict__.get('team_id')
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.compute_values()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and PLAYER_VALUE_INPUTS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'rating', 'market_value'}
+        super().save(*args, **kwargs)
+        loaded_team_id = getattr(self, '_loaded_team_id', None)
+        if self.team_id != loaded_team_id or self.rating != getattr(self, '_loaded_rating', None):
+            refresh_team_ratings({self.team_id, loaded_team_id})
+        self._loaded_team_id, self._loaded_rating = self.team_id, self.rating
+
+    def delete(self, *args, **kwargs):
+        team_id = self.team_id
+        deleted = super().delete(*args, **kwargs)
+        refresh_team_ratings({team_id})
+        return deleted
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} (Rating: {self.rating})"
 
@@ -261,12 +422,65 @@ class Player(models.Model):
         verbose_name = "Player"
         verbose_name_plural = "Players"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Transfer market: keyset order, then one index per filter.
+            models.Index(fields=['-rating', '-id'], condition=ON_MARKET, name='player_market_rating_idx'),
+            models.Index(fields=['position_primary', '-rating', '-id'], condition=ON_MARKET,
+                         name='player_market_position_idx'),
+            models.Index(fields=['age'], condition=ON_MARKET, name='player_market_age_idx'),
+            models.Index(Coalesce('asking_price', 'market_value'), condition=ON_MARKET,
+                         name='player_market_price_idx'),
+        ]
+
+
+class TransferBid(models.Model):
+    """
+    A team's standing offer for a player on the market. Open bids form one
+    order book per player, matched in price-time priority by
+    ``orderbook.match_bids``.
+    """
+    OPEN, FILLED, CANCELLED, EXPIRED = 'OPEN', 'FILLED', 'CANCELLED', 'EXPIRED'
+    STATUS_CHOICES = [
+        (OPEN, 'Open'),
+        (FILLED, 'Filled'),
+        (CANCELLED, 'Cancelled'),
+        (EXPIRED, 'Expired'),  # the player left the market without this bid winning
+    ]
+
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="transfer_bids")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="transfer_bids")
+    price = models.PositiveIntegerField(verbose_name="Bid (in $)")
+    contract_years = models.PositiveSmallIntegerField(default=1)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+    # Time priority: raising a bid moves it to the back of its price level.
+    created_at = models.DateTimeField(auto_now_add=True)
+    filled_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.team} bids ${self.price:,} for {self.player_id} ({self.status})"
+
+    class Meta:
+        verbose_name = "Transfer Bid"
+        verbose_name_plural = "Transfer Bids"
+        indexes = [
+            # The order books: open bids per player, best price first, then oldest.
+            models.Index(fields=['player', '-price', 'created_at', 'id'], condition=Q(status='OPEN'),
+                         name='bid_book_idx'),
+            models.Index(fields=['team', 'status'], name='bid_team_status_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'team'], condition=Q(status='OPEN'),
+                                    name='bid_one_open_per_team'),
+        ]
 
 
 class Match(models.Model):
-    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='matches')
-    home_team = models.ForeignKey(Team, related_name='home_matches', on_delete=models.CASCADE)
-    away_team = models.ForeignKey(Team, related_name='away_matches', on_delete=models.CASCADE)
+    # The composite indexes in Meta lead with these columns, so the FKs need
+    # no index of their own.
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='matches', db_index=False)
+    season = models.PositiveIntegerField(verbose_name="Season Year")
+    home_team = models.ForeignKey(Team, related_name='home_matches', on_delete=models.CASCADE, db_index=False)
+    away_team = models.ForeignKey(Team, related_name='away_matches', on_delete=models.CASCADE, db_index=False)
     match_date = models.DateTimeField()
     match_round = models.IntegerField()
 
@@ -282,6 +496,76 @@ class Match(models.Model):
 
     class Meta:
         ordering = ['match_date']
+        constraints = [
+            # A team hosts one game per round, so a season can't be scheduled
+            # twice. Its index also serves the schedule's lookups by season.
+            models.UniqueConstraint(fields=['league', 'season', 'match_round', 'home_team'],
+                                    name='match_unique_home_fixture'),
+        ]
+        indexes = [
+            # League and team fixture lists, in date order.
+            models.Index(fields=['league', 'match_date'], name='match_league_date_idx'),
+            models.Index(fields=['home_team', 'match_date'], name='match_home_date_idx'),
+            models.Index(fields=['away_team', 'match_date'], name='match_away_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} (Round {self.match_round})"
+
+
+def team_matches(team_id):
+    """
+    A team's matches, home and away. Each side of the OR is served by its
+    (team, match_date) index.
+    """
+    return Match.objects.filter(models.Q(home_team_id=team_id) | models.Q(away_team_id=team_id))
+
+
+class PlayerSeasonStats(models.Model):
+    """
+    A player's running totals for one season in one league. Updated with one
+    set-based upsert per completed match (see results.py) and rebuilt from the
+    play-by-play by the ``rebuild_player_stats`` command.
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="season_stats")
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name="player_season_stats")
+    season = models.PositiveIntegerField(verbose_name="Season Year")
+    # The team the player last played for in this league and season.
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name="player_season_stats")
+
+    games_played = models.PositiveIntegerField(default=0)
+    minutes = models.PositiveIntegerField(default=0)
+    points = models.PositiveIntegerField(default=0)
+    fgm = models.PositiveIntegerField(default=0, verbose_name="Field Goals Made")
+    fga = models.PositiveIntegerField(default=0, verbose_name="Field Goals Attempted")
+    tpm = models.PositiveIntegerField(default=0, verbose_name="Threes Made")
+    tpa = models.PositiveIntegerField(default=0, verbose_name="Threes Attempted")
+    ftm = models.PositiveIntegerField(default=0, verbose_name="Free Throws Made")
+    fta = models.PositiveIntegerField(default=0, verbose_name="Free Throws Attempted")
+    oreb = models.PositiveIntegerField(default=0, verbose_name="Offensive Rebounds")
+    dreb = models.PositiveIntegerField(default=0, verbose_name="Defensive Rebounds")
+    rebounds = models.PositiveIntegerField(default=0)
+    assists = models.PositiveIntegerField(default=0)
+    steals = models.PositiveIntegerField(default=0)
+    blocks = models.PositiveIntegerField(default=0)
+    turnovers = models.PositiveIntegerField(default=0)
+
+    # Counting columns, in the order of simulation.BOX_FIELDS (plus 'rebounds').
+    TOTAL_FIELDS = (
+        'minutes', 'points', 'fgm', 'fga', 'tpm', 'tpa', 'ftm', 'fta',
+        'oreb', 'dreb', 'assists', 'steals', 'blocks', 'turnovers',
+    )
+
+    def per_game(self, field):
+        if self.games_played == 0:
+            return 0.0
+        return round(getattr(self, field) / self.games_played, 1)
+
+    def __str__(self):
+        return f"{self.player} ({self.season}) - {self.games_played} GP, {self.points} PTS"
+
+    class Meta:
+        verbose_name = "Player Season Stats"
+        verbose_name_plural = "Player Season Stats"
+        unique_together = ('player', 'league', 'season')
+        indexes = [models.Index(fields=['league', 'season', '-points'], name='pss_league_points_idx')]
@@ -0,0 +1,184 @@
+# file: TopFiveBack/orderbook.py
+"""
+Order-book bidding for the transfer market.
+
+Teams place bids (``TransferBid``) on players that are on the market instead of
+buying them on the spot. A periodic matching pass (``match_bids``, run by the
+``match_bids`` command) clears every book in one transaction:
+
+* a book is the open bids on one player, in price-time priority (highest
+  price first, then oldest), read in that order from the partial
+  ``bid_book_idx`` index;
+* the player's ask is its asking price, or its market value when it has none;
+* the best bid at or above the ask whose team can still pay (budgets are
+  tracked across books within the pass) and has squad room wins, at the bid
+  price;
+* bids on players that are no longer on the market afterwards are expired.
+
+The writes are set-based: one ``bulk_update`` for the players, one
+``UPDATE ... CASE`` for the budgets (``transfers.apply_budget_deltas``) and
+one update per bid outcome, so the cost of a pass grows with the number of
+open bids, not with round trips.
+"""
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import responsecache, snapshot
+from .models import ON_MARKET, Player, Team, TransferBid, refresh_team_ratings
+from .transfers import (
+    MAX_CONTRACT_YEARS, MAX_SQUAD_SIZE, MIN_CONTRACT_YEARS, TransferError, apply_budget_deltas,
+)
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class Fill:
+    bid_id: int
+    player_id: int
+    buyer_id: int
+    seller_id: int | None
+    price: int
+    contract_years: int
+
+
+@dataclass
+class MatchReport:
+    open_bids: int = 0
+    books: int = 0
+    expired: int = 0
+    fills: list = field(default_factory=list)
+
+
+def place_bid(team, player_id, price, contract_years):
+    """
+    Places ``team``'s bid on a player, or replaces its open bid (the new bid
+    goes to the back of its price level). Returns the open ``TransferBid``.
+    """
+    if not MIN_CONTRACT_YEARS <= contract_years <= MAX_CONTRACT_YEARS:
+        raise TransferError(f'Contract years must be between {MIN_CONTRACT_YEARS} and {MAX_CONTRACT_YEARS}.')
+    if price <= 0:
+        raise TransferError('A bid must be a positive amount.')
+    player = Player.objects.filter(ON_MARKET, id=player_id).only('id', 'team_id').first()
+    if player is None:
+        raise TransferError('This player is not on the transfer market.', status=404)
+    if player.team_id == team.id:
+        raise TransferError('Cannot bid on your own player.')
+    if price > team.budget:
+        raise TransferError('Your team does not have enough budget for this bid.')
+
+    bids = TransferBid.objects.filter(player_id=player_id, team=team, status=TransferBid.OPEN)
+    with transaction.atomic():
+        if not bids.update(price=price, contract_years=contract_years, created_at=timezone.now()):
+            try:
+                with transaction.atomic():
+                    TransferBid.objects.create(player_id=player_id, team=team, price=price,
+                                               contract_years=contract_years)
+            except IntegrityError:
+                # A concurrent request from the same team created it first.
+                bids.update(price=price, contract_years=contract_years, created_at=timezone.now())
+        bid = bids.get()
+        responsecache.invalidate(bids=[player_id])
+    return bid
+
+
+def cancel_bid(team, player_id):
+    """Cancels ``team``'s open bid on a player; returns whether there was one."""
+    with transaction.atomic():
+        cancelled = (TransferBid.objects
+                     .filter(player_id=player_id, team=team, status=TransferBid.OPEN)
+                     .update(status=TransferBid.CANCELLED))
+        if cancelled:
+            responsecache.invalidate(bids=[player_id])
+    return bool(cancelled)
+
+
+def _select_fills(bids, asks, budgets, squads):
+    """
+    Walks the books (``bids`` sorted by player, then priority) and returns the
+    winning bid of every book that clears. ``budgets`` and ``squads`` are
+    updated as players change hands.
+    """
+    fills, sold = [], set()
+    for bid_id, player_id, team_id, price, contract_years in bids:
+        if player_id in sold or player_id not in asks:
+            continue
+        seller_id, ask = asks[player_id]
+        if price < ask or team_id == seller_id:
+            continue
+        if budgets.get(team_id, 0) < price or squads.get(team_id, 0) >= MAX_SQUAD_SIZE:
+            continue
+        sold.add(player_id)
+        budgets[team_id] -= price
+        squads[team_id] = squads.get(team_id, 0) + 1
+        if seller_id is not None:
+            budgets[seller_id] = budgets.get(seller_id, 0) + price
+            squads[seller_id] = squads.get(seller_id, 0) - 1
+        fills.append(Fill(bid_id, player_id, team_id, seller_id, price, contract_years))
+    return fills
+
+
+def match_bids():
+    """Runs one matching pass over every open book and returns a ``MatchReport``."""
+    report = MatchReport()
+    with transaction.atomic():
+        open_bids = TransferBid.objects.filter(status=TransferBid.OPEN)
+        bids = list(open_bids.order_by('player_id', '-price', 'created_at', 'id')
+                    .values_list('id', 'player_id', 'team_id', 'price', 'contract_years'))
+        report.open_bids = len(bids)
+        if not bids:
+            return report
+        # Every book is either filled, expired or left as it was.
+        responsecache.invalidate(bids={player_id for _, player_id, _, _, _ in bids})
+
+        # Rows taking part in the pass are locked once for the whole pass
+        # (a no-op on SQLite, where the write transaction serializes writers).
+        asks = {
+            player_id: (team_id, ask) for player_id, team_id, ask in
+            Player.objects.select_for_update()
+            .filter(ON_MARKET, id__in=Subquery(open_bids.values('player_id')))
+            .annotate(ask=Coalesce('asking_price', 'market_value'))
+            .values_list('id', 'team_id', 'ask')
+        }
+        report.books = len(asks)
+        bidders = Team.objects.select_for_update().filter(id__in=Subquery(open_bids.values('team_id')))
+        budgets = dict(bidders.values_list('id', 'budget'))
+        squads = dict(Player.objects.filter(team_id__in=Subquery(open_bids.values('team_id')))
+                      .values('team_id').annotate(n=Count('id')).values_list('team_id', 'n'))
+
+        fills = report.fills = _select_fills(bids, asks, budgets, squads)
+        if fills:
+            _apply_fills(fills)
+        # Whatever is left on players that are gone from the market can never fill.
+        report.expired = (open_bids.exclude(player__in=Player.objects.on_market())
+                          .update(status=TransferBid.EXPIRED))
+    return report
+
+
+def _apply_fills(fills):
+    now = timezone.now()
+    players = [Player(id=fill.player_id, team_id=fill.buyer_id, contract_years=fill.contract_years,
+                      is_on_transfer_list=False, asking_price=None) for fill in fills]
+    # Contract years feed the market value, so bulk_update refreshes the stored values.
+    Player.objects.bulk_update(players, ['team', 'contract_years', 'is_on_transfer_list', 'asking_price'],
+                               batch_size=BATCH_SIZE)
+
+    deltas = {}
+    for fill in fills:
+        deltas[fill.buyer_id] = deltas.get(fill.buyer_id, 0) - fill.price
+        if fill.seller_id is not None:
+            deltas[fill.seller_id] = deltas.get(fill.seller_id, 0) + fill.price
+    apply_budget_deltas(deltas, BATCH_SIZE)
+
+    bid_ids = [fill.bid_id for fill in fills]
+    for start in range(0, len(bid_ids), BATCH_SIZE):
+        TransferBid.objects.filter(id__in=bid_ids[start:start + BATCH_SIZE]).update(
+            status=TransferBid.FILLED, filled_at=now)
+    refresh_team_ratings({fill.seller_id for fill in fills})
+    transaction.on_commit(snapshot.invalidate)
+    responsecache.invalidate(teams={fill.buyer_id for fill in fills} | {fill.seller_id for fill in fills},
+                             market=True)
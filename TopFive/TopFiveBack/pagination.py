@@ -0,0 +1,84 @@
+# file: TopFiveBack/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Pages are read with ``WHERE (key) < (last key seen) ORDER BY key DESC LIMIT n``
+instead of ``OFFSET``, so fetching page 1,000 costs the same index seek as
+page 1. The cursor is the key of the last row of the previous page, encoded as
+an opaque URL-safe token.
+"""
+import base64
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Descending keyset over ``(key_field, 'id')``; the queryset must not be
+    ordered already. ``?cursor=`` resumes after a row, ``?limit=`` sets the
+    page size (capped at ``max_page_size``).
+    """
+    key_field = 'rating'
+    page_size = 25
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            key, last_id = cursor
+            # "key <= k" gives the planner a range seek on the index; the
+            # exclude then drops the rows already served that share key k.
+            queryset = queryset.filter(**{f'{self.key_field}__lte': key}).exclude(
+                **{self.key_field: key, 'id__gte': last_id})
+        rows = list(queryset.order_by(f'-{self.key_field}', '-id')[:limit + 1])
+        self.has_next = len(rows) > limit
+        rows = rows[:limit]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.page_size))
+        except ValueError:
+            limit = self.page_size
+        return min(max(limit, 1), self.max_page_size)
+
+    def encode_cursor(self, row):
+        token = f'{getattr(row, self.key_field)}:{row.id}'.encode()
+        return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+            key, last_id = raw.split(':')
+            return int(key), int(last_id)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor.')
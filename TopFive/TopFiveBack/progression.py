@@ -0,0 +1,271 @@
+# file: TopFiveBack/progression.py
+"""
+Player development: how skills move from one season to the next.
+
+``develop`` works on a whole skill matrix at once (players x
+``Player.SKILL_FIELDS``). Inputs:
+
+* **Age.** The yearly change comes from the age curve (``AGE_CURVE``,
+  interpolated between its points). Young players improve, players in their
+  prime hold, older players decline. Physical skills decline faster than the
+  rest and game IQ slower.
+* **Playing time.** Growth is scaled between ``PLAY_FLOOR`` (no minutes)
+  and 1 (``FULL_MINUTES`` a game or more). The minutes per game come from
+  the season's stat lines, or from ``assigned_minutes`` for players who
+  haven't played.
+* **Game IQ.** Smart players learn faster: growth is scaled by the
+  learning rate, ``1 + (game_iq - IQ_PIVOT) / IQ_SCALE`` within
+  ``LEARNING_RANGE``.
+* **Training focus** (``Player.training_focus``). The focused skills grow
+  ``FOCUS_GROWTH`` times faster and decline ``FOCUS_DECLINE`` times as
+  fast. The other skills grow ``UNFOCUSED_GROWTH`` times as fast.
+
+Every skill also gets its own noise.
+
+``develop_players`` runs the model over every active player without aging
+them. It reads ``CHUNK_SIZE`` players at a time into NumPy arrays and
+writes each chunk back with ``write_players``: batched
+``UPDATE ... FROM (VALUES ...)`` statements. With ``dry_run`` nothing is
+written, and the returned ``DevelopmentSummary`` describes what would
+change, for tuning the model. The end-of-season rollover (``seasons.py``)
+runs the same model while it ages the players.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from . import responsecache, snapshot
+from .models import Player, PlayerSeasonStats
+
+# Players read into NumPy at a time.
+CHUNK_SIZE = 50_000
+# Rows per UPDATE statement, kept within SQLite's 32766 parameters.
+MAX_UPDATE_PARAMS = 30_000
+
+# (age, skill points per season) points of the age curve.
+AGE_CURVE = ((18, 3.0), (21, 2.5), (24, 1.2), (27, 0.3), (29, -0.3), (31, -1.2), (34, -2.5), (38, -4.0))
+PHYSICAL_SKILLS = ('speed', 'jumping', 'strength', 'stamina')
+# How much of a decline each skill takes, in Player.SKILL_FIELDS order.
+DECLINE_WEIGHTS = np.array([
+    1.6 if name in PHYSICAL_SKILLS else 0.3 if name == 'game_iq' else 1.0
+    for name in Player.SKILL_FIELDS
+])
+FULL_MINUTES = 30.0
+PLAY_FLOOR = 0.5
+IQ_PIVOT = 78.0
+IQ_SCALE = 80.0
+LEARNING_RANGE = (0.75, 1.25)
+FOCUS_GROWTH = 1.6
+UNFOCUSED_GROWTH = 0.8
+FOCUS_DECLINE = 0.6
+NOISE = 1.0
+SKILL_BOUNDS = (25.0, 99.0)
+
+# Skills each training focus works on.
+FOCUS_SKILLS = {
+    Player.BALANCED: (),
+    Player.SHOOTING: ('shooting_2p', 'shooting_3p', 'free_throws'),
+    Player.PLAYMAKING: ('passing', 'game_iq', 'speed'),
+    Player.DEFENDING: ('defense', 'blocking', 'rebound_def'),
+    Player.INSIDE: ('rebound_off', 'rebound_def', 'strength', 'shooting_2p'),
+    Player.CONDITIONING: ('stamina', 'speed', 'jumping', 'strength'),
+}
+FOCUSES = tuple(FOCUS_SKILLS)
+# Growth and decline multipliers per focus (rows in FOCUSES order).
+FOCUS_GROWTH_WEIGHTS = np.array([
+    [1.0 if not skills else FOCUS_GROWTH if name in skills else UNFOCUSED_GROWTH for name in Player.SKILL_FIELDS]
+    for skills in FOCUS_SKILLS.values()
+])
+FOCUS_DECLINE_WEIGHTS = np.array([
+    [FOCUS_DECLINE if name in skills else 1.0 for name in Player.SKILL_FIELDS]
+    for skills in FOCUS_SKILLS.values()
+])
+GAME_IQ = Player.SKILL_FIELDS.index('game_iq')
+
+# Columns of a chunk of development inputs, in order (see ``development_inputs``).
+INPUT_FIELDS = ('id', 'age', 'minutes_per_game', 'focus', *Player.SKILL_FIELDS)
+
+AGE_BANDS = ((18, 21), (22, 25), (26, 29), (30, 33), (34, 99))
+MINUTE_BANDS = ((0, 10), (10, 20), (20, 30), (30, 49))
+
+
+def age_change(ages):
+    """Skill points gained (or lost) over a season, per player, from the age curve."""
+    ages_at, changes = zip(*AGE_CURVE)
+    return np.interp(ages, ages_at, changes)
+
+
+def play_factor(minutes_per_game):
+    return PLAY_FLOOR + (1 - PLAY_FLOOR) * np.clip(np.asarray(minutes_per_game) / FULL_MINUTES, 0.0, 1.0)
+
+
+def learning_rate(game_iq):
+    return np.clip(1 + (np.asarray(game_iq) - IQ_PIVOT) / IQ_SCALE, *LEARNING_RANGE)
+
+
+def develop(rng, ages, skills, minutes_per_game, focus):
+    """
+    New skills (rounded to a tenth) of players after a season.
+    ``skills`` is a (players, len(Player.SKILL_FIELDS)) array, ``ages``,
+    ``minutes_per_game`` and ``focus`` (indexes into ``FOCUSES``) have one
+    entry per player.
+    """
+    change = age_change(ages)[:, None]
+    growth = (change * (play_factor(minutes_per_game) * learning_rate(skills[:, GAME_IQ]))[:, None]
+              * FOCUS_GROWTH_WEIGHTS[focus])
+    decline = change * DECLINE_WEIGHTS * FOCUS_DECLINE_WEIGHTS[focus]
+    skills = skills + np.where(change > 0, growth, decline) + rng.normal(0.0, NOISE, skills.shape)
+    return np.round(np.clip(skills, *SKILL_BOUNDS), 1)
+
+
+def development_inputs(players):
+    """
+    ``players`` annotated with the inputs of ``develop``: ``minutes_per_game``
+    (this season's, over every league the player played in, or
+    ``assigned_minutes`` for players who haven't played) and ``focus``.
+    """
+    lines = (PlayerSeasonStats.objects
+             .filter(player=OuterRef('pk'), season=F('league__current_season_year'))
+             .order_by().values('player'))
+    minutes = Subquery(lines.annotate(total=Sum('minutes')).values('total'))
+    games = Subquery(lines.annotate(total=Sum('games_played')).values('total'))
+    return players.alias(season_minutes=Coalesce(minutes, 0), season_games=Coalesce(games, 0)).annotate(
+        minutes_per_game=Case(
+            When(season_games__gt=0, then=F('season_minutes') * 1.0 / F('season_games')),
+            default=F('assigned_minutes') * 1.0,
+        ),
+        focus=Case(*(When(training_focus=focus, then=Value(i)) for i, focus in enumerate(FOCUSES)),
+                   default=Value(0), output_field=IntegerField()),
+    )
+
+
+def input_chunks(players, extra_fields=()):
+    """
+    Yields the development inputs of ``players`` as (players, columns)
+    float arrays of ``CHUNK_SIZE`` rows at most: ``INPUT_FIELDS`` and then
+    ``extra_fields``.
+    """
+    players = development_inputs(players).order_by('id')
+    last_id = 0
+    while True:
+        rows = list(players.filter(id__gt=last_id).values_list(*INPUT_FIELDS, *extra_fields)[:CHUNK_SIZE])
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=float)
+        yield chunk
+        last_id = int(chunk[-1, 0])
+
+
+def develop_chunk(rng, chunk):
+    """``develop`` over an ``input_chunks`` chunk: the players' new skills."""
+    return develop(rng, chunk[:, 1], chunk[:, 4:4 + len(Player.SKILL_FIELDS)],
+                   chunk[:, 2], chunk[:, 3].astype(int))
+
+
+def write_players(ids, columns):
+    """
+    Sets ``columns`` ({column: values}) of the players ``ids`` with one
+    ``WITH v AS (VALUES ...) UPDATE ... FROM v`` per batch of rows.
+    """
+    qn = connection.ops.quote_name
+    table = qn(Player._meta.db_table)
+    names = ['id', *columns]
+    rows = list(zip(ids, *columns.values()))
+    row = '(' + ', '.join(['%s'] * len(names)) + ')'
+    assignments = ', '.join(f'{qn(name)} = v.{qn(name)}' for name in columns)
+    batch_size = MAX_UPDATE_PARAMS // len(names)
+    with connection.cursor() as cursor:
+        for first in range(0, len(rows), batch_size):
+            batch = rows[first:first + batch_size]
+            cursor.execute(
+                f"WITH v ({', '.join(qn(name) for name in names)}) AS (VALUES {', '.join([row] * len(batch))}) "
+                f"UPDATE {table} SET {assignments} FROM v WHERE {table}.{qn('id')} = v.{qn('id')}",
+                [value for values in batch for value in values],
+            )
+
+
+def skill_columns(skills):
+    """{skill field: values} of a skill matrix, for ``write_players``."""
+    return {name: skills[:, i].tolist() for i, name in enumerate(Player.SKILL_FIELDS)}
+
+
+@dataclass
+class DevelopmentSummary:
+    """What a development run changes, accumulated chunk by chunk."""
+    players: int = 0
+    skill_before: np.ndarray = field(default_factory=lambda: np.zeros(len(Player.SKILL_FIELDS)))
+    skill_after: np.ndarray = field(default_factory=lambda: np.zeros(len(Player.SKILL_FIELDS)))
+    rating_changes: list = field(default_factory=list)
+    # (count, sum of rating changes) per age band, minutes band and focus.
+    by_age: np.ndarray = field(default_factory=lambda: np.zeros((len(AGE_BANDS), 2)))
+    by_minutes: np.ndarray = field(default_factory=lambda: np.zeros((len(MINUTE_BANDS), 2)))
+    by_focus: np.ndarray = field(default_factory=lambda: np.zeros((len(FOCUSES), 2)))
+
+    def add(self, chunk, skills):
+        before = chunk[:, 4:4 + len(Player.SKILL_FIELDS)]
+        change = skills.mean(axis=1) - before.mean(axis=1)
+        self.players += len(chunk)
+        self.skill_before += before.sum(axis=0)
+        self.skill_after += skills.sum(axis=0)
+        self.rating_changes.append(change.astype(np.float32))
+        for table, bands, values in ((self.by_age, AGE_BANDS, chunk[:, 1]),
+                                     (self.by_minutes, MINUTE_BANDS, chunk[:, 2])):
+            edges = [low for low, _ in bands[1:]]
+            index = np.searchsorted(edges, values, side='right')
+            table[:, 0] += np.bincount(index, minlength=len(bands))
+            table[:, 1] += np.bincount(index, weights=change, minlength=len(bands))
+        focus = chunk[:, 3].astype(int)
+        self.by_focus[:, 0] += np.bincount(focus, minlength=len(FOCUSES))
+        self.by_focus[:, 1] += np.bincount(focus, weights=change, minlength=len(FOCUSES))
+
+    def lines(self):
+        """The summary as text lines."""
+        if not self.players:
+            return ['No active players.']
+        changes = np.concatenate(self.rating_changes)
+        percentiles = np.percentile(changes, (5, 25, 50, 75, 95))
+        lines = [
+            f'{self.players} players; rating change mean {changes.mean():+.2f}, '
+            + ', '.join(f'p{p} {v:+.2f}' for p, v in zip((5, 25, 50, 75, 95), percentiles)),
+            f'improved {int((changes > 0).sum())}, declined {int((changes < 0).sum())}',
+            '',
+            f"{'skill':<14}{'before':>8}{'after':>8}{'change':>8}",
+        ]
+        for name, before, after in zip(Player.SKILL_FIELDS, self.skill_before / self.players,
+                                       self.skill_after / self.players):
+            lines.append(f'{name:<14}{before:>8.2f}{after:>8.2f}{after - before:>+8.2f}')
+        for title, labels, table in (
+            ('age', [f'{low}-{high}' if high < 99 else f'{low}+' for low, high in AGE_BANDS], self.by_age),
+            ('minutes/game', [f'{low}-{high}' if high < 49 else f'{low}+' for low, high in MINUTE_BANDS],
+             self.by_minutes),
+            ('focus', list(FOCUSES), self.by_focus),
+        ):
+            lines += ['', f"{title:<14}{'players':>8}{'rating':>8}"]
+            for label, (count, total) in zip(labels, table):
+                mean = f'{total / count:+8.2f}' if count else f"{'-':>8}"
+                lines.append(f'{label:<14}{int(count):>8}{mean}')
+        return lines
+
+
+def develop_players(seed=None, dry_run=False):
+    """
+    Runs one season of development over every active player, without aging
+    anyone, and returns a ``DevelopmentSummary``. With ``dry_run`` nothing is
+    written; the same ``seed`` gives the same numbers either way.
+    """
+    rng = np.random.default_rng(seed)
+    summary = DevelopmentSummary()
+    with transaction.atomic():
+        for chunk in input_chunks(Player.objects.filter(is_retired=False)):
+            skills = develop_chunk(rng, chunk)
+            summary.add(chunk, skills)
+            if not dry_run:
+                write_players(chunk[:, 0].astype(int).tolist(), skill_columns(skills))
+        if not dry_run and summary.players:
+            Player.objects.filter(is_retired=False).refresh_values()
+            transaction.on_commit(snapshot.invalidate)
+            responsecache.invalidate(world=True)
+    return summary
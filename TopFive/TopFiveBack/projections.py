@@ -0,0 +1,127 @@
+# file: TopFiveBack/projections.py
+"""
+Monte Carlo season projections.
+
+The rest of the season is not played game by game: every remaining match is
+reduced to a home-win probability from team-strength arrays, and all
+simulations are drawn at once as a (simulations, matches) boolean matrix.
+Wins per team then fall out of one matrix product with the fixture incidence
+matrix, so 10,000 seasons take a few milliseconds.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from .models import League, Match, TeamSeasonStats
+from .snapshot import get_snapshot
+
+DEFAULT_SIMULATIONS = 10000
+MAX_SIMULATIONS = 50000
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Logistic win model: logit = RATING_WEIGHT * strength difference + HOME_ADVANTAGE
+RATING_WEIGHT = 0.25
+HOME_ADVANTAGE = 0.15
+# Observed point difference per game is blended into the roster rating,
+# with more weight the more games have been played.
+FORM_WEIGHT = 0.3
+FORM_PRIOR_GAMES = 5
+
+
+def _cache_key(league_id, season, completed, simulations):
+    # The season and its number of completed matches are part of the key, so
+    # the cached projection goes stale as soon as another match in the league
+    # finishes or the league moves on to a new season, whichever process did it.
+    return f"projections:{league_id}:{season}:{completed}:{simulations}"
+
+
+def league_projection(league_id, simulations=DEFAULT_SIMULATIONS, seed=None):
+    """Cached wrapper around ``project_league``."""
+    season, completed = League.objects.annotate(completed=Count(
+        'matches', filter=Q(matches__season=F('current_season_year'), matches__completed=True),
+    )).values_list('current_season_year', 'completed').get(id=league_id)
+    key = _cache_key(league_id, season, completed, simulations)
+    projection = cache.get(key)
+    if projection is None:
+        projection = project_league(league_id, simulations=simulations, seed=seed)
+        cache.set(key, projection, CACHE_TIMEOUT)
+    return projection
+
+
+def project_league(league_id, simulations=DEFAULT_SIMULATIONS, seed=None):
+    """
+    Simulates the remainder of the league's current season ``simulations``
+    times and returns, per team, the probability of finishing in each position.
+
+    Raises ``League.DoesNotExist`` for an unknown league.
+    """
+    season = League.objects.values_list('current_season_year', flat=True).get(id=league_id)
+    standings = list(
+        TeamSeasonStats.objects
+        .filter(league_id=league_id, season=season)
+        .order_by('-wins', '-points_for')
+        .values_list('team_id', 'team__name', 'games_played', 'wins', 'losses', 'points_for', 'points_against')
+    )
+    if not standings:
+        return {'league_id': league_id, 'season': season, 'simulations': 0, 'remaining_matches': 0, 'teams': []}
+
+    team_ids = [row[0] for row in standings]
+    index = {team_id: i for i, team_id in enumerate(team_ids)}
+    n_teams = len(team_ids)
+    games = np.array([row[2] for row in standings], dtype=np.float64)
+    wins = np.array([row[3] for row in standings], dtype=np.float64)
+    point_diff = np.array([row[5] - row[6] for row in standings], dtype=np.float64)
+
+    rosters = get_snapshot([league_id])
+    ratings = rosters.team_ratings()
+    strength = np.array([ratings[rosters.team_row(team_id)] for team_id in team_ids])
+    form = np.divide(point_diff, games, out=np.zeros(n_teams), where=games > 0)
+    strength += FORM_WEIGHT * form * games / (games + FORM_PRIOR_GAMES)
+
+    remaining = [
+        (index[home], index[away])
+        for home, away in Match.objects.filter(league_id=league_id, season=season, completed=False)
+        .values_list('home_team_id', 'away_team_id')
+        if home in index and away in index
+    ]
+
+    rng = np.random.default_rng(seed)
+    final_wins = np.broadcast_to(wins, (simulations, n_teams)).copy()
+    if remaining:
+        home, away = np.array(remaining).T
+        logit = RATING_WEIGHT * (strength[home] - strength[away]) + HOME_ADVANTAGE
+        p_home = 1.0 / (1.0 + np.exp(-logit))
+        home_wins = (rng.random((simulations, len(remaining)), dtype=np.float32) < p_home).astype(np.float32)
+        home_incidence = np.zeros((len(remaining), n_teams), dtype=np.float32)
+        away_incidence = np.zeros((len(remaining), n_teams), dtype=np.float32)
+        home_incidence[np.arange(len(remaining)), home] = 1
+        away_incidence[np.arange(len(remaining)), away] = 1
+        final_wins += home_wins @ home_incidence + (1 - home_wins) @ away_incidence
+
+    # Ties on wins are broken by strength (a proxy for points) plus noise.
+    tiebreak = strength + rng.normal(0, 1, (simulations, n_teams))
+    order = np.argsort(-(final_wins * 1000 + tiebreak), axis=1)
+    positions = np.empty_like(order)
+    positions[np.arange(simulations)[:, None], order] = np.arange(n_teams)[None, :]
+    counts = np.bincount((np.arange(n_teams)[None, :] * n_teams + positions).ravel(),
+                         minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    probabilities = counts / simulations
+
+    teams = []
+    for i, (team_id, name, played, team_wins, losses, _, _) in enumerate(standings):
+        teams.append({
+            'team_id': team_id,
+            'team_name': name,
+            'games_played': played,
+            'wins': team_wins,
+            'losses': losses,
+            'projected_wins': round(float(final_wins[:, i].mean()), 2),
+            'position_probabilities': [round(float(p), 4) for p in probabilities[i]],
+        })
+    teams.sort(key=lambda t: -t['projected_wins'])
+    return {
+        'league_id': league_id,
+        'season': season,
+        'simulations': simulations,
+        'remaining_matches': len(remaining),
+        'teams': teams,
+    }
@@ -0,0 +1,209 @@
+# file: TopFiveBack/responsecache.py
+"""
+Versioned response cache for the read endpoints.
+
+A cached response is stored under a key that embeds the current version of
+every piece of data it was built from:
+
+* ``league:<id>``: a league's matches, standings and season stats. Bumped by
+  result ingestion and live score saves.
+* ``team:<id>``: a team's squad. Bumped by transfers, releases, listings and
+  tactics changes.
+* ``market``: the transfer market. Bumped whenever a player goes on or off the
+  market or changes hands.
+* ``matches``: every match. Bumped along with any league.
+* ``bids:<player id>``: a player's order book. Bumped when a bid is placed,
+  cancelled, filled or expired.
+* ``world``: part of every key. Bumped by world-wide changes such as the daily
+  tick or seeding.
+* ``snapshot``: the roster snapshots (``snapshot.version``); not part of any
+  response key.
+
+A bump never deletes anything. Entries stored under the old versions are no
+longer looked up and age out of the backend, so a write costs one cache write
+per scope it touched. Bumps run on commit. A reader that read the versions
+before the bump can only store its result under the old key, which is never
+read again.
+
+A version is the time of the last bump in nanoseconds, so the same stamps
+also give every cached view its ``ETag`` and ``Last-Modified``. A conditional
+GET whose validators still match is answered ``304 Not Modified`` before the
+view touches a single row.
+
+Responses, versions and the hit/miss counters (``stats``) live in the
+``responses`` cache alias, which every process shares (files by default, see
+settings): management commands bump the same versions the API workers read.
+A per-process backend such as LocMem would leave the workers serving stale
+hits after every command.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+CACHE_ALIAS = 'responses'
+TIMEOUT = 60 * 60
+HITS_KEY, MISSES_KEY, NOT_MODIFIED_KEY = 'responses:hits', 'responses:misses', 'responses:not-modified'
+
+WORLD, MARKET, MATCHES = 'world', 'market', 'matches'
+
+
+def league(league_id):
+    return f'league:{league_id}'
+
+
+def team(team_id):
+    return f'team:{team_id}'
+
+
+def player_bids(player_id):
+    return f'bids:{player_id}'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f'responses:version:{scope}'
+
+
+def _new_version():
+    # Also used when a version was evicted: it restarts above every value it
+    # had before, so a stale entry can never be addressed again.
+    return time.time_ns()
+
+
+def versions(scopes):
+    """Current version of each scope, in order."""
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    """Moves the given scopes to a new version right away."""
+    version = _new_version()
+    _cache().set_many({_version_key(scope): version for scope in set(scopes)}, None)
+
+
+def invalidate(leagues=(), teams=(), market=False, world=False, bids=()):
+    """Bumps the versions of the given scopes once the current transaction commits."""
+    scopes = [league(league_id) for league_id in leagues if league_id is not None]
+    if scopes:
+        scopes.append(MATCHES)
+    scopes += [team(team_id) for team_id in teams if team_id is not None]
+    scopes += [player_bids(player_id) for player_id in bids]
+    if market:
+        scopes.append(MARKET)
+    if world:
+        scopes.append(WORLD)
+    if scopes:
+        transaction.on_commit(lambda: bump(*scopes))
+
+
+def team_league(team_id):
+    """League of a team (teams never change league), cached without expiry."""
+    key = f'responses:team-league:{team_id}'
+    league_id = _cache().get(key)
+    if league_id is None:
+        from .models import Team
+        league_id = Team.objects.filter(id=team_id).values_list('league_id', flat=True).first()
+        if league_id is not None:
+            _cache().set(key, league_id, None)
+    return league_id
+
+
+def _count(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    """Hits, misses and 304s since the counters were last reset."""
+    counters = _cache().get_many([HITS_KEY, MISSES_KEY, NOT_MODIFIED_KEY])
+    hits, misses = counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'not_modified': counters.get(NOT_MODIFIED_KEY, 0),
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def reset_stats():
+    _cache().delete_many([HITS_KEY, MISSES_KEY, NOT_MODIFIED_KEY])
+
+
+class CachedResponseMixin:
+    """
+    Serves a view's ``list`` or ``retrieve`` (or a plain ``get`` that calls
+    ``cached_response``) from the response cache, with conditional GET on top.
+
+    Views declare the scopes their data comes from in ``cache_scopes()``; the
+    key and the ``ETag`` also hold the view, the full URL and ``cache_vary()``
+    (for per-user responses), and ``Last-Modified`` is the newest scope
+    version. Responses carry ``X-Cache: HIT``, ``MISS`` or ``NOT-MODIFIED``.
+    """
+
+    def cache_scopes(self):
+        return ()
+
+    def cache_vary(self):
+        return ''
+
+    def cache_validators(self, request):
+        """(key, etag, last_modified) of the response, from the versions alone."""
+        scopes = (WORLD, *self.cache_scopes())
+        scope_versions = versions(scopes)
+        parts = [type(self).__name__, request.build_absolute_uri(), str(self.cache_vary()),
+                 *(f'{scope}={version}' for scope, version in zip(scopes, scope_versions))]
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        last_modified = datetime.fromtimestamp(max(scope_versions) // 10 ** 9, tz=timezone.utc)
+        return f'responses:{digest}', f'"{digest}"', last_modified
+
+    def cached_response(self, request, build):
+        """The response of ``build()``, or a cached copy of it, or a 304."""
+        key, etag, last_modified = self.cache_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified.timestamp())
+        if response is not None:
+            _count(NOT_MODIFIED_KEY)
+            label = 'NOT-MODIFIED'
+        else:
+            data = _cache().get(key)
+            if data is not None:
+                _count(HITS_KEY)
+                response, label = Response(data), 'HIT'
+            else:
+                _count(MISSES_KEY)
+                response, label = build(), 'MISS'
+                if response.status_code != 200:
+                    return response
+                _cache().set(key, response.data, TIMEOUT)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['X-Cache'] = label
+        if self.cache_vary():
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,179 @@
+# file: TopFiveBack/results.py
+"""
+Result ingestion: writes finished games back to the database.
+
+Everything here is set-based. A whole matchday is written with one
+``bulk_update`` on ``Match`` (batched) and ``F()``-expression updates on
+``TeamSeasonStats``, so the number of round trips depends on the number of
+batches, never on the number of games. Player stat lines take one
+``INSERT ... ON CONFLICT DO UPDATE`` per match that adds the game's box score
+to the season totals.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from . import responsecache
+from .models import Match, PlayerSeasonStats, TeamSeasonStats
+from .simulation import BOX_INDEX
+
+MATCH_BATCH_SIZE = 500
+STATS_BATCH_SIZE = 400
+
+
+@dataclass
+class MatchResult:
+    """The outcome of one simulated game, ready to be persisted."""
+    match_id: int
+    league_id: int
+    season: int
+    home_team_id: int
+    away_team_id: int
+    home_score: int
+    away_score: int
+    periods: int = 4
+    # Play-by-play records (``simulation.EVENT_DTYPE``), when they were recorded.
+    events: object = field(default=None, repr=False, compare=False)
+    # Box score: (2, MAX_ROSTER) player ids and (2, MAX_ROSTER, BOX_FIELDS)
+    # lines, home side first, as in ``simulation.SimulationResult``.
+    player_ids: object = field(default=None, repr=False, compare=False)
+    box: object = field(default=None, repr=False, compare=False)
+
+
+def record_results(results):
+    """
+    Persists a list of ``MatchResult`` in one transaction.
+
+    Marks the matches completed with their final score and increments the
+    season stats of both teams and, for results that carry a box score, of
+    every player who played. Matches that are already completed are
+    skipped, so ingesting the same game twice (e.g. a live replay racing the
+    nightly run) never double-counts it. Returns the results actually stored.
+    """
+    results = list(results)
+    if not results:
+        return []
+    with transaction.atomic():
+        completed = set(Match.objects.filter(
+            id__in=[r.match_id for r in results], completed=True,
+        ).values_list('id', flat=True))
+        results = [r for r in results if r.match_id not in completed]
+        if results:
+            _update_matches(results)
+            _update_team_stats(results)
+            for result in results:
+                if result.box is not None:
+                    upsert_player_lines(
+                        result.league_id, result.season,
+                        _match_lines(result.player_ids, result.box,
+                                     (result.home_team_id, result.away_team_id)),
+                    )
+            responsecache.invalidate(leagues={r.league_id for r in results})
+    return results
+
+
+def _update_matches(results):
+    matches = [
+        Match(
+            id=r.match_id,
+            home_team_score=r.home_score,
+            away_team_score=r.away_score,
+            completed=True,
+            current_quarter=r.periods,
+            game_clock=timedelta(0),
+            possession_team=None,
+        )
+        for r in results
+    ]
+    Match.objects.bulk_update(
+        matches,
+        ['home_team_score', 'away_team_score', 'completed', 'current_quarter', 'game_clock', 'possession_team'],
+        batch_size=MATCH_BATCH_SIZE,
+    )
+
+
+def _update_team_stats(results):
+    # Aggregate per (league, season, team) first, so a team that somehow plays
+    # twice in one batch is still a single CASE branch.
+    totals = defaultdict(lambda: [0, 0, 0, 0, 0])  # games, wins, losses, for, against
+    for r in results:
+        home_won = r.home_score > r.away_score
+        for team_id, scored, conceded, won in (
+            (r.home_team_id, r.home_score, r.away_score, home_won),
+            (r.away_team_id, r.away_score, r.home_score, not home_won),
+        ):
+            row = totals[(r.league_id, r.season, team_id)]
+            row[0] += 1
+            row[1] += int(won)
+            row[2] += int(not won)
+            row[3] += scored
+            row[4] += conceded
+
+    keys = list(totals)
+    for start in range(0, len(keys), STATS_BATCH_SIZE):
+        chunk = keys[start:start + STATS_BATCH_SIZE]
+        scope = Q()
+        for league_id, season, team_id in chunk:
+            scope |= Q(league_id=league_id, season=season, team_id=team_id)
+
+        def increment(column, index):
+            whens = [
+                When(league_id=league_id, season=season, team_id=team_id,
+                     then=F(column) + Value(totals[(league_id, season, team_id)][index]))
+                for league_id, season, team_id in chunk
+            ]
+            return Case(*whens, default=F(column), output_field=IntegerField())
+
+        TeamSeasonStats.objects.filter(scope).update(
+            games_played=increment('games_played', 0),
+            wins=increment('wins', 1),
+            losses=increment('losses', 2),
+            points_for=increment('points_for', 3),
+            points_against=increment('points_against', 4),
+        )
+
+
+def _match_lines(player_ids, box, team_ids):
+    """``(player_id, team_id, games, BOX_FIELDS totals)`` for everybody who played."""
+    lines = []
+    for side, team_id in enumerate(team_ids):
+        for player_id, line in zip(player_ids[side].tolist(), box[side].tolist()):
+            if player_id and line[BOX_INDEX['minutes']] > 0:
+                lines.append((player_id, team_id, 1, line))
+    return lines
+
+
+def upsert_player_lines(league_id, season, lines):
+    """
+    Adds stat lines to ``PlayerSeasonStats`` with a single
+    ``INSERT ... ON CONFLICT (player, league, season) DO UPDATE`` statement.
+
+    ``lines`` holds ``(player_id, team_id, games, totals)`` with ``totals`` in
+    ``simulation.BOX_FIELDS`` order. Rows that already exist are incremented,
+    new ones are created.
+    """
+    if not lines:
+        return
+    qn = connection.ops.quote_name
+    table = qn(PlayerSeasonStats._meta.db_table)
+    totals = list(PlayerSeasonStats.TOTAL_FIELDS) + ['rebounds', 'games_played']
+    columns = ['player_id', 'league_id', 'season', 'team_id'] + totals
+    rebounds = (BOX_INDEX['oreb'], BOX_INDEX['dreb'])
+    params = []
+    for player_id, team_id, games, line in lines:
+        params += [player_id, league_id, season, team_id]
+        params += [line[BOX_INDEX[name]] for name in PlayerSeasonStats.TOTAL_FIELDS]
+        params += [line[rebounds[0]] + line[rebounds[1]], games]
+    row = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    increments = ', '.join(f"{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}" for c in totals)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) "
+        f"VALUES {', '.join([row] * len(lines))} "
+        f"ON CONFLICT ({qn('player_id')}, {qn('league_id')}, {qn('season')}) "
+        f"DO UPDATE SET {qn('team_id')} = excluded.{qn('team_id')}, {increments}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
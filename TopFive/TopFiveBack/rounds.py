@@ -0,0 +1,89 @@
+# file: TopFiveBack/rounds.py
+"""
+Matchday orchestration: picks the next round of every league, simulates the
+games across a process pool and hands the results to ``results.record_results``.
+
+Workers only receive ``SideInputs`` arrays and return score arrays, so nothing
+ORM-related crosses the process boundary.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import numpy as np
+from django.db.models import Min, OuterRef, Subquery
+
+from . import simulation
+from .models import Match
+from .results import MatchResult
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def next_round_fixtures(league_ids=None):
+    """
+    Uncompleted matches of each league's next ``match_round`` (one query).
+
+    Returns ``(match_id, league_id, season, home_team_id, away_team_id)`` tuples.
+    """
+    next_round = (Match.objects
+                  .filter(league_id=OuterRef('league_id'), completed=False)
+                  .order_by()
+                  .values('league_id')
+                  .annotate(next_round=Min('match_round'))
+                  .values('next_round'))
+    fixtures = Match.objects.filter(completed=False, match_round=Subquery(next_round))
+    if league_ids:
+        fixtures = fixtures.filter(league_id__in=league_ids)
+    return list(fixtures.order_by('league_id', 'id').values_list(
+        'id', 'league_id', 'season', 'home_team_id', 'away_team_id',
+    ))
+
+
+def _simulate_chunk(homes, aways, seed, record_events=False):
+    """Worker entry point: plain arrays in, plain arrays out."""
+    result = simulation.simulate_games(homes, aways, seed=seed, record_events=record_events)
+    return (result.home_score, result.away_score, result.periods, result.player_ids, result.box,
+            result.events, result.event_offsets)
+
+
+def simulate_fixtures(fixtures, sides, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, seed=None,
+                      record_events=False):
+    """
+    Simulates ``fixtures`` (as returned by ``next_round_fixtures``) and returns
+    a list of ``MatchResult``. ``sides`` maps team id to ``SideInputs``.
+    With ``record_events`` every result also carries its play-by-play.
+
+    With ``workers > 1`` the chunks run on a process pool; every chunk gets its
+    own child seed, so a given ``seed`` reproduces the same results no matter
+    how many workers are used.
+    """
+    chunks = [fixtures[i:i + chunk_size] for i in range(0, len(fixtures), chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    jobs = [
+        ([sides[f[3]] for f in chunk], [sides[f[4]] for f in chunk], chunk_seed, record_events)
+        for chunk, chunk_seed in zip(chunks, seeds)
+    ]
+
+    if workers > 1 and len(jobs) > 1:
+        # django.setup() lets the children import the app under any start method.
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=django.setup) as pool:
+            outputs = list(pool.map(_simulate_chunk, *zip(*jobs)))
+    else:
+        outputs = [_simulate_chunk(*job) for job in jobs]
+
+    results = []
+    for chunk, (home_scores, away_scores, periods, player_ids, box, events, offsets) in zip(chunks, outputs):
+        for g, (match_id, league_id, season, home_id, away_id) in enumerate(chunk):
+            results.append(MatchResult(
+                match_id=match_id, league_id=league_id, season=season,
+                home_team_id=home_id, away_team_id=away_id,
+                home_score=int(home_scores[g]), away_score=int(away_scores[g]), periods=int(periods[g]),
+                player_ids=player_ids[g], box=box[g],
+                events=None if events is None else events[offsets[g]:offsets[g + 1]],
+            ))
+    return results
@@ -0,0 +1,157 @@
+# file: TopFiveBack/schedule.py
+"""
+Season schedules.
+
+A league's season is a double round robin generated in memory with the circle
+method. One team stays put while the others rotate one seat per round, and
+venues alternate so that no team plays more than one extra home game in either
+half. The second half repeats the first with home and away swapped.
+
+``create_schedules`` writes the fixtures of many leagues with one transaction
+per league and multi-row ``INSERT`` statements. Leagues that already have fixtures for their
+current season are skipped, so it is safe to re-run. Concurrent runs are
+serialized per league by a lock on the league row, and the
+``match_unique_home_fixture`` constraint rejects a second schedule of the same
+season in any case.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import numpy as np
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import responsecache
+from .models import League, Match, Team
+
+START_IN_DAYS = 10
+DAYS_BETWEEN_ROUNDS = 3
+# Parameters per INSERT, within SQLite's variable limit.
+MAX_INSERT_PARAMS = 24_000
+# Columns set per fixture; every other column takes the model default.
+FIXTURE_FIELDS = ('league', 'season', 'home_team', 'away_team', 'match_date', 'match_round')
+
+
+@dataclass
+class ScheduleReport:
+    scheduled: list = field(default_factory=list)
+    already_scheduled: list = field(default_factory=list)
+    # (league id, number of teams) of leagues that can't be scheduled.
+    invalid: list = field(default_factory=list)
+    matches: int = 0
+
+
+def double_round_robin(team_ids):
+    """
+    Rounds of ``(home_id, away_id)`` pairs: ``2 * (n - 1)`` rounds of
+    ``n / 2`` games for an even number ``n`` of teams. Each pair of teams
+    meets twice, once at each venue.
+    """
+    n = len(team_ids)
+    if n < 2 or n % 2:
+        raise ValueError(f'A round robin needs an even number of teams, got {n}.')
+    seats = list(team_ids)
+    first_half = []
+    for round_index in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = seats[i], seats[n - 1 - i]
+            # The fixed team alternates venues every round; the other tables
+            # alternate by seat, which keeps every team's venues balanced.
+            if (round_index % 2 if i == 0 else i % 2):
+                home, away = away, home
+            pairs.append((home, away))
+        first_half.append(pairs)
+        seats = [seats[0], seats[-1]] + seats[1:-1]
+    return first_half + [[(away, home) for home, away in pairs] for pairs in first_half]
+
+
+def insert_fixtures(league_id, season, rounds, start):
+    """
+    Writes ``rounds`` (as returned by ``double_round_robin``) with one
+    multi-row ``INSERT`` per batch and returns the number of matches.
+
+    Every column other than the teams takes one of a handful of values, so
+    they are converted to database values once rather than once per match,
+    as ``bulk_create`` would. The columns are the model's concrete fields:
+    ``FIXTURE_FIELDS`` per fixture and the model defaults for the rest.
+    """
+    fields = {f.name: f for f in Match._meta.concrete_fields if not f.primary_key}
+    defaults = {}
+    for name, f in fields.items():
+        if name in FIXTURE_FIELDS:
+            continue
+        if not f.has_default() and not f.null:
+            raise ValueError(f'Match.{name} needs a default for fixtures to be inserted.')
+        defaults[name] = f.get_db_prep_save(f.get_default(), connection)
+    dates = [fields['match_date'].get_db_prep_save(start + timedelta(days=DAYS_BETWEEN_ROUNDS * i), connection)
+             for i in range(len(rounds))]
+    rows = [
+        [league_id, season, home, away, dates[round_index], round_index + 1, *defaults.values()]
+        for round_index, pairs in enumerate(rounds)
+        for home, away in pairs
+    ]
+    qn = connection.ops.quote_name
+    columns = [fields[name].column for name in (*FIXTURE_FIELDS, *defaults)]
+    row = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    batch_size = MAX_INSERT_PARAMS // len(columns)
+    with connection.cursor() as cursor:
+        for first in range(0, len(rows), batch_size):
+            batch = rows[first:first + batch_size]
+            cursor.execute(
+                f"INSERT INTO {qn(Match._meta.db_table)} ({', '.join(qn(c) for c in columns)}) "
+                f"VALUES {', '.join([row] * len(batch))}",
+                [value for values in batch for value in values],
+            )
+    return len(rows)
+
+
+def create_schedules(league_ids=None, seed=None, start=None):
+    """
+    Schedules the current season of the given leagues (every league when
+    empty). The team order is shuffled per league with ``seed``. Round 1 is
+    played at ``start`` (default: ``START_IN_DAYS`` from now) and one round
+    every ``DAYS_BETWEEN_ROUNDS`` days after that. Returns a ``ScheduleReport``.
+    """
+    rng = np.random.default_rng(seed)
+    start = start or timezone.now() + timedelta(days=START_IN_DAYS)
+    leagues = League.objects.order_by('id')
+    if league_ids:
+        leagues = leagues.filter(id__in=league_ids)
+    seasons = dict(leagues.values_list('id', 'current_season_year'))
+
+    report = ScheduleReport()
+    scheduled = set(Match.objects.filter(league__in=leagues.values('id'))
+                    .values_list('league_id', 'season').distinct())
+    teams = {league_id: [] for league_id in seasons}
+    for league_id, team_id in (Team.objects.filter(league__in=leagues.values('id'))
+                               .order_by('league_id', 'id').values_list('league_id', 'id')):
+        teams[league_id].append(team_id)
+
+    for league_id, season in seasons.items():
+        if (league_id, season) in scheduled:
+            report.already_scheduled.append(league_id)
+            continue
+        team_ids = teams[league_id]
+        if len(team_ids) < 2 or len(team_ids) % 2:
+            report.invalid.append((league_id, len(team_ids)))
+            continue
+        rounds = double_round_robin(rng.permutation(team_ids).tolist())
+        try:
+            with transaction.atomic():
+                # Another run may have scheduled the league since the lookup
+                # above; the league row lock makes this check and the insert
+                # one step (SQLite serializes writers anyway).
+                League.objects.select_for_update().filter(id=league_id).values_list('id').first()
+                if Match.objects.filter(league_id=league_id, season=season).exists():
+                    report.already_scheduled.append(league_id)
+                    continue
+                matches = insert_fixtures(league_id, season, rounds, start)
+                responsecache.invalidate(leagues=[league_id])
+        except IntegrityError:
+            # Lost a race the lock didn't cover: the season has its schedule.
+            report.already_scheduled.append(league_id)
+            continue
+        report.matches += matches
+        report.scheduled.append(league_id)
+    return report
@@ -0,0 +1,114 @@
+# file: TopFiveBack/seasons.py
+"""
+End-of-season rollover: every league moves on to its next season.
+
+``rollover_season`` runs in one transaction:
+
+1. Every active player develops (``progression.develop``) and ages a year,
+   old players may retire, and rostered players lose a contract year
+   (retiring ones all of it). Players are read in chunks into NumPy arrays
+   and written back with batched ``UPDATE ... FROM (VALUES ...)``
+   statements (``progression.input_chunks`` / ``write_players``), so
+   memory stays flat and the round trips depend on the number of batches,
+   not players.
+2. Rostered players with no contract left, retired ones included, leave
+   their team (``lifecycle.expire_contracts``).
+3. Stored ratings, market values and team ratings are refreshed with
+   ``refresh_values``.
+4. Every team gets a ``TeamSeasonStats`` row for the new season, and each
+   league's ``current_season_year`` goes up by one, back to pre-season.
+
+Retirement is a roll per player: the chance is ``RETIREMENT_STEP`` at
+``RETIREMENT_AGE`` and grows by as much every year, until it is certain.
+The same ``seed`` always gives the same rollover of the same world.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+
+from . import lifecycle, progression, responsecache, snapshot
+from .models import League, Match, Player, Team, TeamSeasonStats
+
+# TeamSeasonStats rows per INSERT.
+BATCH_SIZE = 1000
+RETIREMENT_AGE = 33
+RETIREMENT_STEP = 0.2
+
+
+class RolloverError(Exception):
+    pass
+
+
+@dataclass
+class RolloverReport:
+    leagues: int = 0
+    players: int = 0
+    retired: int = 0
+    released: int = 0
+    teams: int = 0
+
+
+def retirement_chance(ages):
+    """Chance that players of ``ages`` (after their birthday) retire."""
+    return np.clip((np.asarray(ages) - RETIREMENT_AGE + 1) * RETIREMENT_STEP, 0.0, 1.0)
+
+
+def _develop_players(rng, report):
+    """
+    Develops, ages and retires every active player and runs the rostered
+    players' contracts down, a chunk at a time. Returns how many rostered
+    players retired.
+    """
+    players = (Player.objects.filter(is_retired=False)
+               .annotate(rostered=ExpressionWrapper(Q(team__isnull=False), output_field=BooleanField())))
+    extra = len(progression.INPUT_FIELDS)
+    rostered_retired = 0
+    for chunk in progression.input_chunks(players, extra_fields=('contract_years', 'rostered')):
+        skills = progression.develop_chunk(rng, chunk)
+        ids, ages = chunk[:, 0].astype(int), chunk[:, 1].astype(int) + 1
+        contracts, rostered = chunk[:, extra].astype(int), chunk[:, extra + 1].astype(bool)
+        retiring = rng.random(len(ids)) < retirement_chance(ages)
+        contracts = np.where(retiring, 0, np.where(rostered, np.maximum(contracts - 1, 0), contracts))
+        progression.write_players(ids.tolist(), {
+            'age': ages.tolist(),
+            'is_retired': retiring.tolist(),
+            'contract_years': contracts.tolist(),
+            **progression.skill_columns(skills),
+        })
+        report.players += len(ids)
+        report.retired += int(retiring.sum())
+        rostered_retired += int((retiring & rostered).sum())
+    return rostered_retired
+
+
+def rollover_season(seed=None, force=False):
+    """
+    Moves every league to its next season (see the module docstring) and
+    returns a ``RolloverReport``. Raises ``RolloverError`` while a league has
+    unplayed matches in its current season, unless ``force``.
+    """
+    rng = np.random.default_rng(seed)
+    report = RolloverReport()
+    with transaction.atomic():
+        unplayed = Match.objects.filter(completed=False, season=F('league__current_season_year'))
+        if not force and unplayed.exists():
+            raise RolloverError(f'{unplayed.count()} matches of the current seasons are not played yet.')
+
+        rostered_retired = _develop_players(rng, report)
+        report.released = lifecycle.expire_contracts() - rostered_retired
+        # Skills, ages and contracts all changed: ratings, values and team ratings follow.
+        Player.objects.filter(is_retired=False).refresh_values()
+
+        report.teams = len(TeamSeasonStats.objects.bulk_create(
+            [TeamSeasonStats(team_id=team_id, league_id=league_id, season=season + 1)
+             for team_id, league_id, season in
+             Team.objects.values_list('id', 'league_id', 'league__current_season_year').iterator()],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        ))
+        report.leagues = League.objects.update(current_season_year=F('current_season_year') + 1,
+                                               status='PRE_SEASON')
+        transaction.on_commit(snapshot.invalidate)
+        responsecache.invalidate(world=True)
+    return report
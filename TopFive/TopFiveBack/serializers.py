@@ -1,6 +1,6 @@
 # In TopFiveBack/serializers.py
 from rest_framework import serializers
-from .models import Match, TeamSeasonStats, Player, Team
+from .models import Match, TeamSeasonStats, Player, Team, PlayerSeasonStats, TransferBid
 
 # --- Existing Serializers ---
 class MatchSerializer(serializers.ModelSerializer):
@@ -11,7 +11,7 @@ class MatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
         fields = [
-            'league', 'league_name', 'home_team', 'home_team_name', 'away_team', 'away_team_name',
+            'id', 'league', 'league_name', 'home_team', 'home_team_name', 'away_team', 'away_team_name',
             'match_date', 'match_round', 'home_team_score', 'away_team_score', 'completed',
         ]
 
@@ -45,30 +45,81 @@ class TeamSeasonStatsSerializer(serializers.ModelSerializer):
     def __str__(self):
         return f"{self.team_name} - Season Stats"
         
+class PlayerSeasonStatsSerializer(serializers.ModelSerializer):
+    """A player's season stat line, with per-game averages."""
+    player_id = serializers.IntegerField(read_only=True)
+    player_name = serializers.SerializerMethodField()
+    team_id = serializers.IntegerField(read_only=True, allow_null=True)
+    points_per_game = serializers.SerializerMethodField()
+    rebounds_per_game = serializers.SerializerMethodField()
+    assists_per_game = serializers.SerializerMethodField()
+    minutes_per_game = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PlayerSeasonStats
+        fields = [
+            'player_id', 'player_name', 'team_id', 'season', 'games_played', 'minutes',
+            'points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+            'fgm', 'fga', 'tpm', 'tpa', 'ftm', 'fta', 'oreb', 'dreb',
+            'points_per_game', 'rebounds_per_game', 'assists_per_game', 'minutes_per_game',
+        ]
+
+    def get_player_name(self, obj):
+        # Only resolved when the player was selected with the row (leaderboards);
+        # squad pages already know who the player is.
+        if 'player' not in obj._state.fields_cache:
+            return None
+        return f"{obj.player.first_name} {obj.player.last_name}"
+
+    def get_points_per_game(self, obj):
+        return obj.per_game('points')
+
+    def get_rebounds_per_game(self, obj):
+        return obj.per_game('rebounds')
+
+    def get_assists_per_game(self, obj):
+        return obj.per_game('assists')
+
+    def get_minutes_per_game(self, obj):
+        return obj.per_game('minutes')
+
+
+class TransferBidSerializer(serializers.ModelSerializer):
+    player_id = serializers.IntegerField(read_only=True)
+    team_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TransferBid
+        fields = ['id', 'player_id', 'team_id', 'price', 'contract_years', 'status', 'created_at', 'filled_at']
+
+
 class FullPlayerSerializer(serializers.ModelSerializer):
-    # שדה ה-rating הזה מתייחס ל-@property 'rating' במודל Player
     rating = serializers.IntegerField(read_only=True)
-    # **חדש: שדה עבור הדירוג המחושב באמצעות annotate**
-    # זה יאפשר לך להציג את הערך שחושב ב-QuerySet (ה-calculated_rating)
-    calculated_rating = serializers.IntegerField(read_only=True) 
+    # Same value as 'rating' (the stored column); kept for clients that still read it.
+    calculated_rating = serializers.IntegerField(source='rating', read_only=True)
 
     team_name = serializers.CharField(source='team.name', read_only=True, allow_null=True)
     market_value = serializers.IntegerField(read_only=True)
+    # Current-season stat line, when the view prefetched it as 'current_season_stats'.
+    season_stats = serializers.SerializerMethodField()
     
     class Meta:
         model = Player
         fields = [
             'id', 'first_name', 'last_name', 'age', 'position_primary', 
-            'rating', # ה-rating מה-@property במודל
-            'calculated_rating', # ה-rating המחושב בשאילתה דרך annotate
+            'rating', 'calculated_rating',
             'team_name', 'contract_years', 'market_value', 'height', 'weight',
             'shooting_2p', 'shooting_3p', 'free_throws', 'rebound_def',
             'rebound_off', 'passing', 'blocking', 'defense', 'game_iq',
             'speed', 'jumping', 'strength', 'stamina', 'fitness', 'is_injured',
             'role', 'offensive_role', 'assigned_minutes','is_on_transfer_list', 
-            'asking_price', 
+            'asking_price', 'training_focus', 'season_stats',
         ]
 
+    def get_season_stats(self, obj):
+        lines = getattr(obj, 'current_season_stats', None)
+        return PlayerSeasonStatsSerializer(lines[0]).data if lines else None
+
         
 
 # --- [NEW] Serializers for Tactics & Rotation Screen ---
@@ -0,0 +1,780 @@
+# file: TopFiveBack/simulation.py
+"""
+Vectorized possession-level match engine.
+
+Games are simulated in batches: every possession of every game in the batch is
+an element of a (games, possessions) NumPy array, and each stage of a
+possession (turnover, shot selection, make/miss, free throws, rebound) is a
+handful of array operations over the whole batch instead of a Python loop per
+possession. A batch of 1,000 full games runs in well under a second on one core.
+
+The engine only works with plain arrays (see ``SideInputs``), so it can run
+inside worker processes and never touches the ORM. ``side_from_team`` is the
+ORM adapter used by code that simulates a single match; batches get their
+inputs from ``snapshot.RosterSnapshot``.
+"""
+import numpy as np
+
+from .models import Player
+
+MAX_ROSTER = 15
+N_SKILLS = len(Player.SKILL_FIELDS)
+SKILL_INDEX = {name: i for i, name in enumerate(Player.SKILL_FIELDS)}
+
+S2P = SKILL_INDEX['shooting_2p']
+S3P = SKILL_INDEX['shooting_3p']
+SFT = SKILL_INDEX['free_throws']
+SRD = SKILL_INDEX['rebound_def']
+SRO = SKILL_INDEX['rebound_off']
+SPA = SKILL_INDEX['passing']
+SBL = SKILL_INDEX['blocking']
+SDE = SKILL_INDEX['defense']
+SIQ = SKILL_INDEX['game_iq']
+SSP = SKILL_INDEX['speed']
+SJU = SKILL_INDEX['jumping']
+SST = SKILL_INDEX['strength']
+SSA = SKILL_INDEX['stamina']
+
+# --- Game structure ---
+QUARTER_SECONDS = 720
+REGULATION_PERIODS = 4
+OVERTIME_SECONDS = 300
+MAX_OVERTIMES = 8
+# Each possession can contain the first shot plus up to two put-backs.
+MAX_ATTEMPTS = 3
+
+# --- Rotation defaults used when a team has not assigned minutes ---
+DEFAULT_MINUTES = {Player.STARTER: 30, Player.BENCH: 16, Player.RESERVE: 2}
+USAGE_BY_OFFENSIVE_ROLE = {
+    Player.PRIMARY_SCORER: 1.6,
+    Player.SECONDARY_SCORER: 1.3,
+    Player.ROLE_PLAYER: 1.0,
+    Player.DO_NOT_SHOOT: 0.35,
+}
+GO_TO_GUY_USAGE_BONUS = 1.35
+
+# --- Event kinds (shared with the play-by-play consumers) ---
+EVENT_MADE_2 = 1
+EVENT_MISS_2 = 2
+EVENT_MADE_3 = 3
+EVENT_MISS_3 = 4
+EVENT_FT_MADE = 5
+EVENT_FT_MISS = 6
+EVENT_REBOUND_OFF = 7
+EVENT_REBOUND_DEF = 8
+EVENT_TURNOVER = 9
+EVENT_PERIOD_END = 10
+EVENT_MINUTES = 11
+
+EVENT_NAMES = {
+    EVENT_MADE_2: 'made_2', EVENT_MISS_2: 'miss_2',
+    EVENT_MADE_3: 'made_3', EVENT_MISS_3: 'miss_3',
+    EVENT_FT_MADE: 'ft_made', EVENT_FT_MISS: 'ft_miss',
+    EVENT_REBOUND_OFF: 'rebound_off', EVENT_REBOUND_DEF: 'rebound_def',
+    EVENT_TURNOVER: 'turnover', EVENT_PERIOD_END: 'period_end',
+    EVENT_MINUTES: 'minutes',
+}
+
+# One play-by-play event. ``clock`` is the time left in the period in tenths of
+# a second, ``side`` is 0 for the home team and 1 for the away team, and
+# ``other_player`` is the assister, blocker or stealer (0 when there is none).
+# Every game ends with one ``EVENT_MINUTES`` record per player who played,
+# with the minutes played in ``points``, so a box score can be rebuilt from
+# the play-by-play alone (see ``player_lines``).
+EVENT_DTYPE = np.dtype([
+    ('seq', '<u4'),
+    ('period', 'u1'),
+    ('kind', 'u1'),
+    ('clock', '<u2'),
+    ('side', 'u1'),
+    ('points', 'u1'),
+    ('home_score', '<u2'),
+    ('away_score', '<u2'),
+    ('player', '<i4'),
+    ('other_player', '<i4'),
+])
+
+# Box score columns, per player.
+BOX_FIELDS = (
+    'minutes', 'points', 'fgm', 'fga', 'tpm', 'tpa', 'ftm', 'fta',
+    'oreb', 'dreb', 'assists', 'steals', 'blocks', 'turnovers',
+)
+BOX_INDEX = {name: i for i, name in enumerate(BOX_FIELDS)}
+
+
+class SideInputs:
+    """
+    Everything the engine needs to know about one team, as arrays.
+
+    ``player_ids``, ``skills``, ``minutes`` and ``usage`` are padded to
+    ``MAX_ROSTER`` rows; padding rows have player id 0 and zero minutes.
+    ``go_to`` and ``stopper`` are row indexes into the roster, or -1.
+    Tactics use the same 1-5 scale as ``Team``: a higher ``focus`` means a
+    more perimeter-oriented offense.
+    """
+    __slots__ = (
+        'team_id', 'player_ids', 'skills', 'minutes', 'usage',
+        'pace', 'focus', 'aggressiveness', 'go_to', 'stopper',
+    )
+
+    def __init__(self, team_id, player_ids, skills, minutes, usage,
+                 pace=3, focus=3, aggressiveness=3, go_to=-1, stopper=-1):
+        self.team_id = team_id
+        self.player_ids = player_ids
+        self.skills = skills
+        self.minutes = minutes
+        self.usage = usage
+        self.pace = pace
+        self.focus = focus
+        self.aggressiveness = aggressiveness
+        self.go_to = go_to
+        self.stopper = stopper
+
+
+def build_side(team_id, rows, pace=3, focus=3, aggressiveness=3,
+               go_to_guy_id=None, defensive_stopper_id=None):
+    """
+    Builds a ``SideInputs`` from per-player tuples of
+    ``(id, skills..., fitness, is_injured, role, assigned_minutes, offensive_role)``.
+
+    Players beyond ``MAX_ROSTER`` are dropped (the squad limit is 15 anyway).
+    """
+    rows = list(rows)[:MAX_ROSTER]
+    return side_from_arrays(
+        team_id,
+        player_ids=np.array([row[0] for row in rows], dtype=np.int64),
+        skills=np.array([row[1:1 + N_SKILLS] for row in rows], dtype=np.float32).reshape(-1, N_SKILLS),
+        fitness=np.array([row[-5] for row in rows], dtype=np.float32),
+        is_injured=np.array([row[-4] for row in rows], dtype=bool),
+        default_minutes=np.array([DEFAULT_MINUTES.get(row[-3], 0) for row in rows], dtype=np.float32),
+        assigned_minutes=np.array([row[-2] for row in rows], dtype=np.float32),
+        usage=np.array([USAGE_BY_OFFENSIVE_ROLE.get(row[-1], 1.0) for row in rows], dtype=np.float32),
+        pace=pace, focus=focus, aggressiveness=aggressiveness,
+        go_to_guy_id=go_to_guy_id, defensive_stopper_id=defensive_stopper_id,
+    )
+
+
+def side_from_arrays(team_id, player_ids, skills, fitness, is_injured, default_minutes,
+                     assigned_minutes, usage, pace=3, focus=3, aggressiveness=3,
+                     go_to_guy_id=None, defensive_stopper_id=None):
+    """
+    Builds a ``SideInputs`` from per-player arrays of one roster (already
+    resolved from roles to ``default_minutes`` and ``usage``).
+
+    Fitness scales skills down by up to 10%, and injured players get no minutes.
+    Assigned minutes are used as soon as the coach assigned any.
+    """
+    n = min(len(player_ids), MAX_ROSTER)
+    fit = is_injured[:n] == 0
+    padded_ids = np.zeros(MAX_ROSTER, dtype=np.int64)
+    padded_ids[:n] = player_ids[:n]
+    padded_skills = np.zeros((MAX_ROSTER, N_SKILLS), dtype=np.float32)
+    padded_skills[:n] = skills[:n] * (0.9 + 0.1 * np.minimum(fitness[:n], 100) / 100.0)[:, None]
+    minutes = np.zeros(MAX_ROSTER, dtype=np.float32)
+    assigned = assigned_minutes[:n]
+    minutes[:n] = np.where(fit, assigned if assigned[fit].sum() else default_minutes[:n], 0)
+    padded_usage = np.zeros(MAX_ROSTER, dtype=np.float32)
+    padded_usage[:n] = usage[:n]
+
+    if n and minutes.sum() == 0:
+        # Everybody is injured or benched: play whoever is on the roster.
+        minutes[:n] = 1.0
+    go_to = _roster_row(padded_ids, n, go_to_guy_id)
+    stopper = _roster_row(padded_ids, n, defensive_stopper_id)
+    if go_to >= 0:
+        padded_usage[go_to] *= GO_TO_GUY_USAGE_BONUS
+
+    return SideInputs(
+        team_id, padded_ids, padded_skills, minutes, padded_usage,
+        pace=pace, focus=focus, aggressiveness=aggressiveness,
+        go_to=go_to, stopper=stopper,
+    )
+
+
+def _roster_row(player_ids, n, player_id):
+    if not player_id:
+        return -1
+    rows = np.flatnonzero(player_ids[:n] == player_id)
+    return int(rows[0]) if len(rows) else -1
+
+
+PLAYER_ROW_FIELDS = (
+    ('id',) + Player.SKILL_FIELDS
+    + ('fitness', 'is_injured', 'role', 'assigned_minutes', 'offensive_role')
+)
+
+
+def side_from_team(team):
+    """ORM adapter: builds the engine inputs for a single ``Team``."""
+    rows = team.players.order_by('id').values_list(*PLAYER_ROW_FIELDS)
+    return build_side(
+        team.id, rows,
+        pace=team.pace,
+        focus=team.offensive_focus_slider,
+        aggressiveness=team.defensive_aggressiveness,
+        go_to_guy_id=team.go_to_guy_id,
+        defensive_stopper_id=team.defensive_stopper_id,
+    )
+
+
+class SimulationResult:
+    """
+    Output of ``simulate_games`` for a batch of G games.
+
+    ``home_score``/``away_score``/``periods`` have shape (G,). ``box`` has shape
+    (G, 2, MAX_ROSTER, len(BOX_FIELDS)) and lines up with the ``player_ids`` of
+    the inputs (side 0 is home). ``events`` (when recorded) is a flat
+    ``EVENT_DTYPE`` array ordered by game; ``events_for(g)`` slices one game.
+    """
+
+    def __init__(self, home_score, away_score, periods, box, player_ids,
+                 events=None, event_offsets=None):
+        self.home_score = home_score
+        self.away_score = away_score
+        self.periods = periods
+        self.box = box
+        self.player_ids = player_ids
+        self.events = events
+        self.event_offsets = event_offsets
+
+    def __len__(self):
+        return len(self.home_score)
+
+    def events_for(self, game):
+        if self.events is None:
+            return None
+        return self.events[self.event_offsets[game]:self.event_offsets[game + 1]]
+
+
+class _Batch:
+    """Stacked per-game arrays for both sides, plus derived team ratings."""
+
+    def __init__(self, homes, aways):
+        sides = [homes, aways]
+        self.n_games = len(homes)
+        # (G, 2, R, S) and (G, 2, R)
+        self.player_ids = np.stack([np.stack([s.player_ids for s in side]) for side in sides], axis=1)
+        self.skills = np.stack([np.stack([s.skills for s in side]) for side in sides], axis=1)
+        minutes = np.stack([np.stack([s.minutes for s in side]) for side in sides], axis=1)
+        usage = np.stack([np.stack([s.usage for s in side]) for side in sides], axis=1)
+
+        def tactic(name):
+            return np.array([[getattr(h, name), getattr(a, name)] for h, a in zip(homes, aways)], dtype=np.float32)
+
+        self.pace = tactic('pace')
+        self.focus = tactic('focus')
+        self.aggressiveness = tactic('aggressiveness')
+        self.go_to = tactic('go_to').astype(np.int64)
+        self.stopper = tactic('stopper').astype(np.int64)
+
+        total = minutes.sum(axis=2, keepdims=True)
+        total[total == 0] = 1.0
+        # Share of the team's floor time; five players are on court, so the
+        # box-score minutes are share * 5 * game length (``box_minutes``).
+        self.share = minutes / total
+        sk = self.skills
+
+        def team_avg(values):
+            return (self.share * values).sum(axis=2)
+
+        self.team_defense = team_avg(0.5 * sk[..., SDE] + 0.2 * sk[..., SSP] + 0.15 * sk[..., SBL] + 0.15 * sk[..., SIQ])
+        self.team_ball_security = team_avg(0.5 * sk[..., SPA] + 0.5 * sk[..., SIQ])
+        self.team_oreb = team_avg(0.6 * sk[..., SRO] + 0.25 * sk[..., SJU] + 0.15 * sk[..., SST])
+        self.team_dreb = team_avg(0.6 * sk[..., SRD] + 0.25 * sk[..., SJU] + 0.15 * sk[..., SST])
+        self.team_passing = team_avg(sk[..., SPA])
+        self.team_blocking = team_avg(sk[..., SBL])
+        self.team_stamina = team_avg(sk[..., SSA])
+
+        # Stopper rating (0 when the team has none) and the opposing star.
+        rows = np.arange(self.n_games)[:, None]
+        has_stopper = self.stopper >= 0
+        stopper_def = sk[rows, np.arange(2)[None, :], np.maximum(self.stopper, 0), SDE]
+        self.stopper_rating = np.where(has_stopper, stopper_def, 0.0).astype(np.float32)
+        self.star = np.where(self.go_to >= 0, self.go_to, np.argmax(usage * self.share, axis=2))
+
+        # Per-player tendencies, (G, 2, R).
+        base_three = 0.18 + 0.06 * (self.focus[..., None] - 1)
+        self.three_rate = np.clip(base_three + 0.006 * (sk[..., S3P] - sk[..., S2P]), 0.05, 0.7)
+        self.p2 = 0.52 + 0.0045 * (sk[..., S2P] - 80)
+        self.p3 = 0.36 + 0.004 * (sk[..., S3P] - 80)
+        self.pft = np.clip(0.77 + 0.006 * (sk[..., SFT] - 80), 0.4, 0.97)
+        # Flat views indexed by (2*g + side) * MAX_ROSTER + player.
+        self.three_rate_flat = self.three_rate.ravel()
+        self.p2_flat = self.p2.ravel()
+        self.p3_flat = self.p3.ravel()
+        self.pft_flat = self.pft.ravel()
+
+        # Categorical samplers, one row per (game, side).
+        self.shot_cdf = _cdf(usage * self.share)
+        self.assist_cdf = _cdf(self.share * sk[..., SPA])
+        self.oreb_cdf = _cdf(self.share * sk[..., SRO])
+        self.dreb_cdf = _cdf(self.share * sk[..., SRD])
+        self.block_cdf = _cdf(self.share * sk[..., SBL])
+        self.steal_cdf = _cdf(self.share * (sk[..., SDE] + sk[..., SSP]))
+
+    def possessions(self, rng):
+        """Combined possessions (both teams) per game for regulation."""
+        per_team = 96 + (self.pace.sum(axis=1) - 6) * 2.5
+        noise = rng.normal(0, 3, self.n_games)
+        return np.maximum(np.rint(2 * per_team + noise), 40).astype(np.int64)
+
+
+def _cdf(weights):
+    """
+    Flattened, row-offset cumulative distribution for ``_sample``.
+
+    ``weights`` has shape (G, 2, R). Row ``r = 2*g + side`` occupies the
+    values in (r, r + 1], so a single ``searchsorted`` over the whole batch
+    samples every row at once.
+    """
+    weights = weights.reshape(-1, weights.shape[-1]).astype(np.float64) + 1e-9
+    cum = np.cumsum(weights, axis=1)
+    cum /= cum[:, -1:]
+    cum += np.arange(len(cum))[:, None]
+    return cum.ravel()
+
+
+def _sample(cdf, rows, u):
+    """Draws a roster index for every element of ``rows`` (row = 2*g + side)."""
+    idx = np.searchsorted(cdf, rows + u, side='right')
+    return np.minimum(idx - rows * MAX_ROSTER, MAX_ROSTER - 1)
+
+
+def _play_block(batch, rng, games, n_poss, seconds, period_seconds, first_period, first_offense):
+    """
+    Plays ``seconds`` of game time for the games in ``games``.
+
+    ``n_poss`` is the number of possessions (both teams) per game. Returns a
+    possession table and an attempt table, each a dict of equal-length 1-D
+    arrays. Only possessions that happen and attempts that are taken are
+    materialised, so put-backs cost next to nothing.
+    """
+    n = len(games)
+    P = int(n_poss.max())
+    poss_no = np.arange(P)[None, :]
+    valid = poss_no < n_poss[:, None]
+
+    # Possession timing: spread evenly with a little jitter, never crossing
+    # into the next period.
+    length = seconds / n_poss[:, None]
+    jitter = (rng.random((n, P), dtype=np.float32) - 0.5) * 0.6 * length
+    t_end = np.clip((poss_no + 1) * length + jitter, 0, seconds - 0.1)
+    t_end = np.maximum.accumulate(np.where(valid, t_end, 0.0), axis=1)
+    period_index = np.minimum((t_end // period_seconds).astype(np.int64), seconds // period_seconds - 1)
+    clock = np.rint((period_index + 1) * period_seconds * 10 - t_end * 10).astype(np.int64)
+
+    g = np.broadcast_to(games[:, None], (n, P))[valid]
+    p = np.broadcast_to(poss_no, (n, P))[valid]
+    offense = ((p + np.repeat(first_offense, n_poss)) % 2).astype(np.int64)
+    defense = 1 - offense
+    period_index = period_index[valid]
+    period = first_period + period_index
+    off_rows = 2 * g + offense
+    def_rows = 2 * g + defense
+    m = len(g)
+
+    def off(arr):
+        return arr[g, offense]
+
+    def dfn(arr):
+        return arr[g, defense]
+
+    # Possession-level rates.
+    aggressiveness = dfn(batch.aggressiveness)
+    p_tov = np.clip(0.13 + 0.012 * (aggressiveness - 3)
+                    + 0.0025 * (dfn(batch.team_defense) - off(batch.team_ball_security)), 0.04, 0.3)
+    p_steal = np.clip(0.45 + 0.05 * (aggressiveness - 3), 0.2, 0.7)
+    p_foul2 = 0.10 + 0.02 * (aggressiveness - 3)
+    p_foul3 = 0.015 + 0.005 * (aggressiveness - 3)
+    shot_adj = -0.0035 * (dfn(batch.team_defense) - 80)
+    shot_adj -= np.where(period >= REGULATION_PERIODS, 0.04 * (1 - off(batch.team_stamina) / 100.0), 0.0)
+    p_oreb = np.clip(0.25 + 0.004 * (off(batch.team_oreb) - dfn(batch.team_dreb)), 0.1, 0.45)
+    p_assist = np.clip(0.58 + 0.004 * (off(batch.team_passing) - 80), 0.35, 0.8)
+    p_block = np.clip(0.06 + 0.002 * (dfn(batch.team_blocking) - 80), 0.02, 0.12)
+    def_stopper = dfn(batch.stopper_rating)
+    off_star = off(batch.star)
+
+    u = rng.random((4, m), dtype=np.float32)
+    tov = u[0] < p_tov
+    tov_player = np.where(tov, _sample(batch.shot_cdf, off_rows, u[1]), -1)
+    stealer = np.where(tov & (u[2] < p_steal), _sample(batch.steal_cdf, def_rows, u[3]), -1)
+    possessions = {
+        'game': g, 'index': p, 'offense': offense, 'period': period, 'period_index': period_index,
+        'clock': clock[valid], 'tov': tov, 'tov_player': tov_player, 'stealer': stealer,
+    }
+
+    attempts = {name: [] for name in (
+        'poss', 'k', 'shooter', 'three', 'made', 'fta', 'ftm', 'ft_last_made',
+        'assister', 'blocker', 'rebounder', 'oreb',
+    )}
+    alive = np.flatnonzero(~tov)
+    for k in range(MAX_ATTEMPTS):
+        if not len(alive):
+            break
+        a = len(alive)
+        a_off_rows, a_def_rows = off_rows[alive], def_rows[alive]
+        u = rng.random((10, a), dtype=np.float32)
+        shooter = _sample(batch.shot_cdf, a_off_rows, u[0])
+        player = a_off_rows * MAX_ROSTER + shooter
+        three = u[1] < batch.three_rate_flat[player]
+        p_make = np.where(three, batch.p3_flat[player], batch.p2_flat[player] + (0.06 if k else 0.0))
+        p_make += shot_adj[alive]
+        stopper = def_stopper[alive]
+        p_make -= np.where((stopper > 0) & (shooter == off_star[alive]), 0.0015 * np.maximum(stopper - 60, 0), 0.0)
+        p_make = np.clip(p_make, 0.15, 0.8)
+
+        foul = u[2] < np.where(three, p_foul3[alive], p_foul2[alive])
+        made = u[3] < p_make * np.where(foul, 0.55, 1.0)
+        fta = np.where(foul, np.where(made, 1, 2 + three), 0)
+        ft_draws = rng.random((a, 3), dtype=np.float32) < batch.pft_flat[player][:, None]
+        ftm = (ft_draws & (np.arange(3)[None, :] < fta[:, None])).sum(axis=1)
+        last_ft = ft_draws[np.arange(a), np.maximum(fta - 1, 0)] & (fta > 0)
+
+        assister = np.where(made & (u[4] < p_assist[alive]), _sample(batch.assist_cdf, a_off_rows, u[5]), -1)
+        assister[assister == shooter] = -1
+        blocked = ~made & ~three & ~foul & (u[6] < p_block[alive] / (1 - p_make))
+        blocker = np.where(blocked, _sample(batch.block_cdf, a_def_rows, u[7]), -1)
+
+        rebound = ~made & ((fta == 0) | ~last_ft)
+        oreb = rebound & (u[8] < p_oreb[alive])
+        rebounder = np.where(
+            oreb, _sample(batch.oreb_cdf, a_off_rows, u[9]), _sample(batch.dreb_cdf, a_def_rows, u[9]),
+        )
+
+        for name, value in (
+            ('poss', alive), ('k', np.full(a, k)), ('shooter', shooter), ('three', three),
+            ('made', made), ('fta', fta), ('ftm', ftm), ('ft_last_made', last_ft),
+            ('assister', assister), ('blocker', blocker),
+            ('rebounder', np.where(rebound, rebounder, -1)), ('oreb', oreb),
+        ):
+            attempts[name].append(value)
+        alive = alive[oreb]
+
+    attempts = {name: np.concatenate(values) if values else np.zeros(0, dtype=np.int64)
+                for name, values in attempts.items()}
+    attempts['game'] = g[attempts['poss']]
+    attempts['offense'] = offense[attempts['poss']]
+    attempts['points'] = np.where(attempts['made'], 2 + attempts['three'], 0) + attempts['ftm']
+    possessions['points'] = np.bincount(attempts['poss'], attempts['points'], minlength=m).astype(np.int64)
+    possessions['n_poss'] = P
+    return possessions, attempts
+
+
+def _block_box(possessions, attempts, box):
+    """Accumulates a block into the (G, 2, R, F) box array."""
+    flat_box = box.reshape(-1, len(BOX_FIELDS))
+    size = len(flat_box)
+
+    def add(field, game, side, player, mask=None, amount=None):
+        if mask is not None:
+            game, side, player = game[mask], side[mask], player[mask]
+            amount = None if amount is None else amount[mask]
+        keep = player >= 0
+        slot = (2 * game[keep] + side[keep]) * MAX_ROSTER + player[keep]
+        weights = None if amount is None else amount[keep]
+        flat_box[:, BOX_INDEX[field]] += np.bincount(slot, weights, minlength=size).astype(np.int32)
+
+    g, off, shooter = attempts['game'], attempts['offense'], attempts['shooter']
+    made, three, oreb = attempts['made'], attempts['three'], attempts['oreb']
+    # A shooting foul on a missed shot is not a field-goal attempt.
+    fga = made | (attempts['fta'] == 0)
+    add('fga', g, off, shooter, fga)
+    add('fgm', g, off, shooter, made)
+    add('tpa', g, off, shooter, fga & three)
+    add('tpm', g, off, shooter, made & three)
+    add('fta', g, off, shooter, amount=attempts['fta'])
+    add('ftm', g, off, shooter, amount=attempts['ftm'])
+    add('points', g, off, shooter, amount=attempts['points'])
+    add('assists', g, off, attempts['assister'])
+    add('blocks', g, 1 - off, attempts['blocker'])
+    add('oreb', g, off, attempts['rebounder'], oreb)
+    add('dreb', g, 1 - off, attempts['rebounder'], ~oreb)
+
+    g, off = possessions['game'], possessions['offense']
+    add('turnovers', g, off, possessions['tov_player'])
+    add('steals', g, 1 - off, possessions['stealer'])
+
+
+# Event ordering inside a game: block, possession, attempt, slot.
+_EVENT_SLOTS = 6
+
+
+def _block_events(batch, possessions, attempts, key_base):
+    """
+    Expands a block into unsorted event columns plus a per-game sort key.
+    ``key_base`` is the number of possession keys used by the earlier blocks,
+    so that every block sorts after the ones before it.
+
+    Every attempt has fixed slots (shot, up to three free throws, rebound) and
+    every possession a turnover slot; only what actually happened is emitted.
+    """
+    pid = batch.player_ids
+    stride = MAX_ATTEMPTS * _EVENT_SLOTS
+    poss_key = (key_base + possessions['index']) * stride
+    columns = {name: [] for name in ('game', 'order', 'period', 'clock', 'side', 'kind',
+                                     'points', 'player', 'other')}
+
+    def ids(game, side, player):
+        return np.where(player >= 0, pid[game, side, np.maximum(player, 0)], 0)
+
+    def emit(mask, poss, order, side, kind, points, player, other_side=None, other=None):
+        game = possessions['game'][poss][mask]
+        side = side[mask]
+        columns['game'].append(game)
+        columns['order'].append(order[mask])
+        columns['period'].append(possessions['period'][poss][mask])
+        columns['clock'].append(possessions['clock'][poss][mask])
+        columns['side'].append(side)
+        columns['kind'].append(np.broadcast_to(kind, mask.shape)[mask])
+        columns['points'].append(np.broadcast_to(points, mask.shape)[mask])
+        columns['player'].append(ids(game, side, player[mask]))
+        if other is None:
+            columns['other'].append(np.zeros(len(game), dtype=np.int64))
+        else:
+            columns['other'].append(ids(game, other_side[mask], other[mask]))
+
+    all_poss = np.arange(len(possessions['game']))
+    off = possessions['offense']
+    emit(possessions['tov'], all_poss, poss_key, off, EVENT_TURNOVER, 0,
+         possessions['tov_player'], 1 - off, possessions['stealer'])
+
+    poss = attempts['poss']
+    off = attempts['offense']
+    made, three, fta, ftm = attempts['made'], attempts['three'], attempts['fta'], attempts['ftm']
+    key = poss_key[poss] + attempts['k'] * _EVENT_SLOTS
+    fga = made | (fta == 0)
+    kind = np.where(three, np.where(made, EVENT_MADE_3, EVENT_MISS_3), np.where(made, EVENT_MADE_2, EVENT_MISS_2))
+    emit(fga, poss, key, off, kind, np.where(made, 2 + three, 0), attempts['shooter'],
+         np.where(made, off, 1 - off), np.where(made, attempts['assister'], attempts['blocker']))
+
+    # The engine tracks the number of made free throws and the result of the
+    # last one; lay the makes out so that both agree.
+    last_made = attempts['ft_last_made']
+    for i in range(3):
+        made_i = np.where(last_made, i >= fta - ftm, i < ftm)
+        emit(i < fta, poss, key + 1 + i, off, np.where(made_i, EVENT_FT_MADE, EVENT_FT_MISS),
+             made_i.astype(np.int64), attempts['shooter'])
+
+    oreb = attempts['oreb']
+    side = np.where(oreb, off, 1 - off)
+    emit(attempts['rebounder'] >= 0, poss, key + 4, side,
+         np.where(oreb, EVENT_REBOUND_OFF, EVENT_REBOUND_DEF), 0, attempts['rebounder'])
+
+    # One period-end marker right after the last possession of each period.
+    games = np.unique(possessions['game'])
+    n_periods = int(possessions['period_index'].max()) + 1
+    ended = np.zeros((len(games), n_periods), dtype=np.int64)
+    game_pos = np.searchsorted(games, possessions['game'])
+    np.add.at(ended, (game_pos, possessions['period_index']), 1)
+    ended = np.cumsum(ended, axis=1).ravel()
+    game = np.repeat(games, n_periods)
+    period_no = np.tile(np.arange(n_periods), len(games))
+    zeros = np.zeros(len(game), dtype=np.int64)
+    base_period = possessions['period'][0] - possessions['period_index'][0]
+    for name, value in (
+        ('game', game), ('order', (key_base + ended) * stride - 1),
+        ('period', base_period + period_no), ('clock', zeros), ('side', zeros),
+        ('kind', np.full(len(game), EVENT_PERIOD_END)), ('points', zeros),
+        ('player', zeros), ('other', zeros),
+    ):
+        columns[name].append(value)
+    return columns
+
+
+def _minutes_events(batch, box, periods):
+    """Event columns for the closing ``EVENT_MINUTES`` records of every game."""
+    minutes = box[..., BOX_INDEX['minutes']]
+    game, side, row = np.nonzero(minutes > 0)
+    n = len(game)
+    zeros = np.zeros(n, dtype=np.int64)
+    # Sorts after everything else in the game, in roster order.
+    order = np.iinfo(np.int64).max - 2 * MAX_ROSTER + side * MAX_ROSTER + row
+    return {
+        'game': [game], 'order': [order], 'period': [periods[game]], 'clock': [zeros],
+        'side': [side], 'kind': [np.full(n, EVENT_MINUTES)], 'points': [minutes[game, side, row]],
+        'player': [batch.player_ids[game, side, row]], 'other': [zeros],
+    }
+
+
+def box_minutes(share, periods):
+    """
+    Whole box-score minutes per player, (G, 2, R), from each player's
+    ``share`` of the team's floor time. Five players are on court for the
+    whole game, overtimes included, so every team's minutes add up to exactly
+    ``5 * game minutes``; the minutes left over by rounding down go to the
+    players with the largest remainders.
+    """
+    game_minutes = (REGULATION_PERIODS * QUARTER_SECONDS
+                    + (periods - REGULATION_PERIODS) * OVERTIME_SECONDS) // 60
+    exact = share.astype(np.float64) * (5 * game_minutes)[:, None, None]
+    minutes = np.floor(exact)
+    left = np.rint((exact - minutes).sum(axis=2, keepdims=True))
+    rank = np.argsort(np.argsort(minutes - exact, axis=2, kind='stable'), axis=2)
+    return (minutes + (rank < left)).astype(np.int32)
+
+
+def _assemble_events(chunks, n_games):
+    columns = {name: np.concatenate([np.concatenate(chunk[name]) for chunk in chunks])
+               for name in chunks[0]}
+    order = np.lexsort((columns['order'], columns['game']))
+    for name in columns:
+        columns[name] = columns[name][order]
+
+    events = np.zeros(len(order), dtype=EVENT_DTYPE)
+    game = columns['game']
+    counts = np.bincount(game, minlength=n_games)
+    offsets = np.zeros(n_games + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    starts = np.repeat(offsets[:-1], counts)
+
+    side = columns['side']
+    points = np.where(columns['kind'] == EVENT_MINUTES, 0, columns['points'])
+    home_running = np.cumsum(np.where(side == 0, points, 0))
+    away_running = np.cumsum(np.where(side == 1, points, 0))
+    home_base = np.concatenate([[0], home_running])[starts]
+    away_base = np.concatenate([[0], away_running])[starts]
+
+    events['seq'] = np.arange(len(order)) - starts
+    events['period'] = columns['period']
+    events['kind'] = columns['kind']
+    events['clock'] = columns['clock']
+    events['side'] = side
+    events['points'] = columns['points']
+    events['home_score'] = home_running - home_base
+    events['away_score'] = away_running - away_base
+    events['player'] = columns['player']
+    events['other_player'] = columns['other']
+    return events, offsets
+
+
+def simulate_games(homes, aways, seed=None, record_events=False):
+    """
+    Simulates ``len(homes)`` games at once.
+
+    ``homes`` and ``aways`` are equal-length sequences of ``SideInputs``.
+    Tied games go to as many 5-minute overtimes as needed (the last one is
+    settled by a coin flip, which in practice never happens). Set
+    ``record_events`` to also get the play-by-play.
+    """
+    if len(homes) != len(aways):
+        raise ValueError("homes and aways must have the same length.")
+    n_games = len(homes)
+    if not n_games:
+        empty = np.zeros(0, dtype=np.int64)
+        return SimulationResult(
+            empty, empty, empty,
+            np.zeros((0, 2, MAX_ROSTER, len(BOX_FIELDS)), dtype=np.int32),
+            np.zeros((0, 2, MAX_ROSTER), dtype=np.int64),
+            events=np.zeros(0, dtype=EVENT_DTYPE) if record_events else None,
+            event_offsets=np.zeros(1, dtype=np.int64) if record_events else None,
+        )
+    rng = np.random.default_rng(seed)
+    batch = _Batch(homes, aways)
+    box = np.zeros((n_games, 2, MAX_ROSTER, len(BOX_FIELDS)), dtype=np.int32)
+    scores = np.zeros((n_games, 2), dtype=np.int64)
+    periods = np.full(n_games, REGULATION_PERIODS, dtype=np.int64)
+    event_chunks = []
+
+    games = np.arange(n_games)
+    n_poss = batch.possessions(rng)
+    first_offense = rng.integers(0, 2, n_games)
+    first_period = 1
+    seconds = seconds_regulation = REGULATION_PERIODS * QUARTER_SECONDS
+    period_seconds = QUARTER_SECONDS
+    block_no = 0
+    key_base = 0
+
+    while len(games):
+        possessions, attempts = _play_block(
+            batch, rng, games, n_poss, seconds, period_seconds, first_period, first_offense,
+        )
+        slot = 2 * possessions['game'] + possessions['offense']
+        scores += np.bincount(slot, possessions['points'], minlength=2 * n_games).astype(np.int64).reshape(-1, 2)
+        _block_box(possessions, attempts, box)
+        if record_events:
+            event_chunks.append(_block_events(batch, possessions, attempts, key_base))
+            key_base += possessions['n_poss'] + 1
+
+        tied = scores[games, 0] == scores[games, 1]
+        if not tied.any():
+            break
+        games = games[tied]
+        if block_no >= MAX_OVERTIMES:
+            # Practically unreachable; settle it rather than loop forever.
+            winner = rng.integers(0, 2, len(games))
+            scores[games, winner] += 1
+            break
+        # Overtime: the same pace, scaled to five minutes.
+        regulation = batch.possessions(rng)[games]
+        n_poss = np.maximum(np.rint(regulation * OVERTIME_SECONDS / seconds_regulation), 4).astype(np.int64)
+        first_offense = rng.integers(0, 2, len(games))
+        first_period = REGULATION_PERIODS + 1 + block_no
+        periods[games] += 1
+        seconds = period_seconds = OVERTIME_SECONDS
+        block_no += 1
+
+    box[..., BOX_INDEX['minutes']] = box_minutes(batch.share, periods)
+    events = offsets = None
+    if record_events:
+        event_chunks.append(_minutes_events(batch, box, periods))
+        events, offsets = _assemble_events(event_chunks, n_games)
+    return SimulationResult(
+        scores[:, 0], scores[:, 1], periods, box, batch.player_ids,
+        events=events, event_offsets=offsets,
+    )
+
+
+# Box-score columns credited to ``player`` / ``other_player`` by each event kind.
+_EVENT_CREDITS = {
+    EVENT_MADE_2: (('fgm', 'fga'), ('assists',)),
+    EVENT_MISS_2: (('fga',), ('blocks',)),
+    EVENT_MADE_3: (('fgm', 'fga', 'tpm', 'tpa'), ('assists',)),
+    EVENT_MISS_3: (('fga', 'tpa'), ('blocks',)),
+    EVENT_FT_MADE: (('ftm', 'fta'), ()),
+    EVENT_FT_MISS: (('fta',), ()),
+    EVENT_REBOUND_OFF: (('oreb',), ()),
+    EVENT_REBOUND_DEF: (('dreb',), ()),
+    EVENT_TURNOVER: (('turnovers',), ('steals',)),
+}
+
+
+def player_lines(events):
+    """
+    Box-score totals per player from play-by-play records (any number of
+    games). Returns ``(player_ids, lines, appearances)``: sorted player ids,
+    an int64 array of ``BOX_FIELDS`` columns per player and the number of
+    games each of them played.
+    """
+    kind = events['kind']
+    players, inverse = np.unique(
+        np.concatenate([events['player'], events['other_player']]), return_inverse=True,
+    )
+    player_rows, other_rows = np.split(inverse, 2)
+    lines = np.zeros((len(players), len(BOX_FIELDS)), dtype=np.int64)
+    for event_kind, (player_fields, other_fields) in _EVENT_CREDITS.items():
+        mask = kind == event_kind
+        if not mask.any():
+            continue
+        for fields, rows in ((player_fields, player_rows[mask]), (other_fields, other_rows[mask])):
+            counts = np.bincount(rows, minlength=len(players))
+            for name in fields:
+                lines[:, BOX_INDEX[name]] += counts
+    scoring = np.isin(kind, (EVENT_MADE_2, EVENT_MADE_3, EVENT_FT_MADE))
+    lines[:, BOX_INDEX['points']] = np.bincount(
+        player_rows[scoring], events['points'][scoring], minlength=len(players)).astype(np.int64)
+    played = kind == EVENT_MINUTES
+    lines[:, BOX_INDEX['minutes']] = np.bincount(
+        player_rows[played], events['points'][played], minlength=len(players)).astype(np.int64)
+    appearances = np.bincount(player_rows[played], minlength=len(players))
+
+    # Player id 0 is "nobody" (no assister, no blocker, ...).
+    keep = players != 0
+    return players[keep], lines[keep], appearances[keep]
+
+
+def simulate_match(match, seed=None, record_events=False):
+    """Simulates a single ``Match`` from the current rosters (ORM path)."""
+    return simulate_games(
+        [side_from_team(match.home_team)], [side_from_team(match.away_team)],
+        seed=seed, record_events=record_events,
+    )
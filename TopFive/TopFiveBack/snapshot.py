@@ -0,0 +1,168 @@
+# file: TopFiveBack/snapshot.py
+"""
+Struct-of-arrays snapshot of rosters and tactics.
+
+A ``RosterSnapshot`` holds every rostered player of a league (or of the whole
+world) as contiguous NumPy columns, sorted by team and player id, plus one row
+of tactics per team. It is loaded with a single ``values_list`` query and is
+meant to be reused: simulations build ``SideInputs`` from it and analytics
+reduce over its columns without ever instantiating a model.
+
+``get_snapshot`` keeps the loaded snapshots in-process and checks a version
+on every call; ``invalidate`` bumps that version and is called whenever a
+squad or the tactics of a team change. The version is a scope of the response
+cache (``responsecache.versions``), which all processes share, so an
+``invalidate`` in a management command also reaches the web and ASGI workers.
+"""
+import numpy as np
+
+from . import responsecache, simulation
+from .models import Player, Team
+
+VERSION_SCOPE = 'snapshot'
+
+ROLE_CODES = {role: code for code, (role, _) in enumerate(Player.ROLE_CHOICES)}
+OFFENSIVE_ROLE_CODES = {role: code for code, (role, _) in enumerate(Player.OFFENSIVE_ROLE_CHOICES)}
+
+TEAM_FIELDS = ('id', 'pace', 'offensive_focus_slider', 'defensive_aggressiveness',
+               'go_to_guy_id', 'defensive_stopper_id')
+PLAYER_FIELDS = tuple(f'players__{field}' for field in simulation.PLAYER_ROW_FIELDS)
+
+_snapshots = {}
+
+
+class RosterSnapshot:
+    """
+    Player columns (``player_ids``, ``team_rows``, ``skills``, ``fitness``,
+    ``is_injured``, ``role``, ``offensive_role``, ``assigned_minutes``) are
+    ordered by team, then player id; the roster of team row ``t`` is the slice
+    ``offsets[t]:offsets[t + 1]``. ``role`` and ``offensive_role`` are codes
+    into ``Player.ROLE_CHOICES`` / ``Player.OFFENSIVE_ROLE_CHOICES``.
+    Team columns (``team_ids`` and the tactics) are ordered by team id.
+    """
+
+    def __init__(self, team_rows, player_rows):
+        n_teams, n_players = len(team_rows), len(player_rows)
+        self.team_ids = np.fromiter((t[0] for t in team_rows), dtype=np.int64, count=n_teams)
+        tactics = np.array([t[1:4] for t in team_rows], dtype=np.int8).reshape(n_teams, 3)
+        self.pace, self.focus, self.aggressiveness = tactics.T.copy()
+        self.go_to_guy_ids = np.fromiter((t[4] or 0 for t in team_rows), dtype=np.int64, count=n_teams)
+        self.stopper_ids = np.fromiter((t[5] or 0 for t in team_rows), dtype=np.int64, count=n_teams)
+
+        self.player_ids = np.fromiter((p[1] for p in player_rows), dtype=np.int64, count=n_players)
+        self.team_rows = np.fromiter((p[0] for p in player_rows), dtype=np.int32, count=n_players)
+        self.skills = np.array([p[2:2 + simulation.N_SKILLS] for p in player_rows],
+                               dtype=np.float32).reshape(n_players, simulation.N_SKILLS)
+        rest = 2 + simulation.N_SKILLS
+        self.fitness = np.fromiter((p[rest] for p in player_rows), dtype=np.float32, count=n_players)
+        self.is_injured = np.fromiter((p[rest + 1] for p in player_rows), dtype=bool, count=n_players)
+        self.role = np.fromiter((ROLE_CODES.get(p[rest + 2], 0) for p in player_rows),
+                                dtype=np.int8, count=n_players)
+        self.assigned_minutes = np.fromiter((p[rest + 3] for p in player_rows), dtype=np.float32, count=n_players)
+        self.offensive_role = np.fromiter((OFFENSIVE_ROLE_CODES.get(p[rest + 4], 0) for p in player_rows),
+                                          dtype=np.int8, count=n_players)
+        self.offsets = np.searchsorted(self.team_rows, np.arange(n_teams + 1)).astype(np.int64)
+
+    @classmethod
+    def load(cls, league_ids=None):
+        """
+        Loads the snapshot with one query (teams LEFT JOIN players), for the
+        given leagues or for every team.
+        """
+        rows = Team.objects.order_by('id', 'players__id').values_list(*TEAM_FIELDS, *PLAYER_FIELDS)
+        if league_ids:
+            rows = rows.filter(league_id__in=league_ids)
+        team_rows, player_rows = [], []
+        for row in rows.iterator(chunk_size=5000):
+            if not team_rows or team_rows[-1][0] != row[0]:
+                team_rows.append(row[:len(TEAM_FIELDS)])
+            if row[len(TEAM_FIELDS)] is not None:
+                player_rows.append((len(team_rows) - 1,) + row[len(TEAM_FIELDS):])
+        return cls(team_rows, player_rows)
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    @property
+    def nbytes(self):
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+    def team_row(self, team_id):
+        """Row of ``team_id`` in the team columns (``KeyError`` if absent)."""
+        row = int(np.searchsorted(self.team_ids, team_id))
+        if row == len(self.team_ids) or self.team_ids[row] != team_id:
+            raise KeyError(team_id)
+        return row
+
+    def player_row(self, player_id):
+        """Row of ``player_id`` in the player columns (``KeyError`` if absent)."""
+        rows = np.flatnonzero(self.player_ids == player_id)
+        if not len(rows):
+            raise KeyError(player_id)
+        return int(rows[0])
+
+    def roster(self, team_id):
+        """Slice of the player columns holding ``team_id``'s roster."""
+        row = self.team_row(team_id)
+        return slice(self.offsets[row], self.offsets[row + 1])
+
+    def side(self, team_id):
+        """Engine inputs (``simulation.SideInputs``) for one team."""
+        row = self.team_row(team_id)
+        players = slice(self.offsets[row], self.offsets[row + 1])
+        return simulation.side_from_arrays(
+            team_id,
+            player_ids=self.player_ids[players],
+            skills=self.skills[players],
+            fitness=self.fitness[players],
+            is_injured=self.is_injured[players],
+            default_minutes=_DEFAULT_MINUTES_BY_CODE[self.role[players]],
+            assigned_minutes=self.assigned_minutes[players],
+            usage=_USAGE_BY_CODE[self.offensive_role[players]],
+            pace=int(self.pace[row]),
+            focus=int(self.focus[row]),
+            aggressiveness=int(self.aggressiveness[row]),
+            go_to_guy_id=int(self.go_to_guy_ids[row]),
+            defensive_stopper_id=int(self.stopper_ids[row]),
+        )
+
+    def sides(self, team_ids):
+        return {team_id: self.side(team_id) for team_id in team_ids}
+
+    def team_ratings(self):
+        """Average player rating per team row (0 for empty rosters)."""
+        ratings = self.skills.mean(axis=1)
+        totals = np.bincount(self.team_rows, weights=ratings, minlength=len(self.team_ids))
+        counts = np.diff(self.offsets)
+        return np.divide(totals, counts, out=np.zeros(len(self.team_ids)), where=counts > 0)
+
+
+_DEFAULT_MINUTES_BY_CODE = np.array(
+    [simulation.DEFAULT_MINUTES.get(role, 0) for role, _ in Player.ROLE_CHOICES], dtype=np.float32)
+_USAGE_BY_CODE = np.array(
+    [simulation.USAGE_BY_OFFENSIVE_ROLE.get(role, 1.0) for role, _ in Player.OFFENSIVE_ROLE_CHOICES],
+    dtype=np.float32)
+
+
+def version():
+    """Current snapshot version, the same in every process."""
+    return responsecache.versions([VERSION_SCOPE])[0]
+
+
+def get_snapshot(league_ids=None):
+    """
+    The current snapshot of ``league_ids`` (every league when empty), loaded
+    on first use and reloaded after ``invalidate``.
+    """
+    scope = tuple(sorted(league_ids)) if league_ids else None
+    current = version()
+    cached = _snapshots.get(scope)
+    if cached is None or cached[0] != current:
+        cached = _snapshots[scope] = (current, RosterSnapshot.load(scope))
+    return cached[1]
+
+
+def invalidate():
+    """Marks every snapshot stale (squads or tactics changed)."""
+    responsecache.bump(VERSION_SCOPE)
+    _snapshots.clear()
@@ -0,0 +1,243 @@
+# file: TopFiveBack/test_benchmarks.py
+"""
+Endpoint benchmark suite.
+
+Builds a reproducible world with ``worldgen`` (``TOPFIVE_BENCHMARK_LEAGUES``
+leagues, 100 by default) and plays a few rounds into it. Then it calls every
+route of ``TopFiveBack/urls.py`` and ``accounts/urls.py`` through the test
+client, ``TOPFIVE_BENCHMARK_ITERATIONS`` times each. For every route it
+records p50/p95 latency and the query count, and compares them with the
+baselines in ``benchmark_baselines.json``:
+
+* a route fails if it runs more queries than its baseline;
+* a route fails if its p50 is over its baseline by more than
+  ``TOPFIVE_BENCHMARK_TOLERANCE`` (a fraction, 0.5 by default) plus
+  ``SLACK_MS``. The p95 of a few dozen samples is too noisy to gate on; it
+  is reported next to its baseline.
+
+The caches are cleared before every call, so each call builds its response.
+Writes run in a savepoint that is rolled back, so every iteration sees the
+same data. Everything runs on the test database (SQLite by default) with no
+outside services.
+
+Skipped unless ``TOPFIVE_BENCHMARK`` is set::
+
+    TOPFIVE_BENCHMARK=1 python manage.py test TopFiveBack.test_benchmarks
+
+Set ``TOPFIVE_BENCHMARK_UPDATE=1`` to write the measured numbers as the new
+baselines for the current world size.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import eventstore, orderbook, rounds, schedule, snapshot, worldgen
+from .models import Match, Player, Team
+from .results import record_results
+
+ENABLED = bool(os.environ.get('TOPFIVE_BENCHMARK'))
+UPDATE = bool(os.environ.get('TOPFIVE_BENCHMARK_UPDATE'))
+LEAGUES = int(os.environ.get('TOPFIVE_BENCHMARK_LEAGUES', 100))
+ITERATIONS = int(os.environ.get('TOPFIVE_BENCHMARK_ITERATIONS', 20))
+TOLERANCE = float(os.environ.get('TOPFIVE_BENCHMARK_TOLERANCE', 0.5))
+# Absolute allowance on top of TOLERANCE, so that sub-millisecond routes
+# don't fail on timer noise.
+SLACK_MS = 2.0
+SEED = 2025
+ROUNDS_PLAYED = 3
+FREE_AGENTS = 500
+BASELINES = Path(__file__).with_name('benchmark_baselines.json')
+PASSWORD = 'benchmark-password'
+METRICS_TOKEN = 'benchmark-metrics-token'
+
+# Routes that can't be timed as a request/response pair.
+EXCLUDED = {
+    'match-live': 'Server-Sent Events stream; it is timed by the live broker, not per request.',
+}
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    path: str
+    data: dict = None
+    # 'manager' (JWT of a team's manager), 'staff', 'scraper' (metrics token) or 'anonymous'.
+    client: str = 'manager'
+    # Fewer iterations for deliberately slow routes (password hashing).
+    iterations: int = None
+
+    @property
+    def key(self):
+        return f'{self.method} {self.name}'
+
+
+def _route_names(resolver):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _route_names(pattern)
+        elif pattern.name:
+            yield pattern.name
+
+
+@unittest.skipUnless(ENABLED, 'Set TOPFIVE_BENCHMARK=1 to run the endpoint benchmarks.')
+class EndpointBenchmarks(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        store = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(TOPFIVE_EVENT_STORE=store, TOPFIVE_METRICS_TOKEN=METRICS_TOKEN))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        worldgen.generate_world(LEAGUES, seed=SEED)
+        worldgen.generate_free_agents(FREE_AGENTS, seed=SEED)
+        schedule.create_schedules(seed=SEED)
+        for round_index in range(ROUNDS_PLAYED):
+            fixtures = rounds.next_round_fixtures()
+            sides = snapshot.get_snapshot().sides({f[3] for f in fixtures} | {f[4] for f in fixtures})
+            results = rounds.simulate_fixtures(fixtures, sides, workers=1, seed=SEED + round_index,
+                                               record_events=True)
+            stored = record_results(results)
+            eventstore.write_games((r.match_id, r.league_id, r.season, r.events) for r in stored)
+            snapshot.invalidate()
+
+        cls.team = Team.objects.select_related('league').order_by('id').first()
+        cls.manager = User.objects.create_user('benchmark-manager', password=PASSWORD)
+        Team.objects.filter(id=cls.team.id).update(user=cls.manager)
+        cls.staff = User.objects.create_user('benchmark-staff', password=PASSWORD, is_staff=True)
+
+        squad = list(Player.objects.filter(team=cls.team).order_by('id'))
+        cls.squad = squad
+        cls.listed = squad[-1]
+        Player.objects.filter(id=cls.listed.id).update(is_on_transfer_list=True, asking_price=1_000_000)
+        free_agents = list(Player.objects.filter(team__isnull=True).order_by('-rating')[:3])
+        cls.free_agent, cls.bid_player, cls.cancel_player = free_agents
+        orderbook.place_bid(cls.team, cls.cancel_player.id, cls.cancel_player.market_value, 2)
+        for other in Team.objects.exclude(id=cls.team.id).order_by('id')[:20]:
+            orderbook.place_bid(other, cls.bid_player.id, cls.bid_player.market_value, 1)
+        cls.match = Match.objects.filter(league=cls.team.league, completed=True).order_by('id').first()
+
+    def routes(self):
+        team, league, match = self.team, self.team.league, self.match
+        rotation = [{'id': p.id, 'role': p.role, 'pos': p.position_primary, 'minutes': 20,
+                     'offensive_role': p.offensive_role} for p in self.squad]
+        refresh = str(RefreshToken.for_user(self.manager))
+        return [
+            Route('match-list-by-league', 'GET', f'/api/matches/{league.id}/'),
+            Route('match-list-all', 'GET', '/api/matches/'),
+            Route('match-events', 'GET', f'/api/matches/{match.id}/events/'),
+            Route('league-standings', 'GET', f'/api/leagues/{league.id}/standings/'),
+            Route('league-projections', 'GET', f'/api/leagues/{league.id}/projections/?simulations=1000'),
+            Route('league-leaders', 'GET', f'/api/leagues/{league.id}/leaders/'),
+            Route('transfer-market-list', 'GET', '/api/players/transfer-market/'),
+            Route('buy-player', 'POST', f'/api/players/{self.free_agent.id}/buy/', {'contract_years': 2}),
+            Route('player-bids', 'GET', f'/api/players/{self.bid_player.id}/bids/'),
+            Route('player-bids', 'POST', f'/api/players/{self.bid_player.id}/bids/',
+                  {'price': self.bid_player.market_value, 'contract_years': 2}),
+            Route('player-bids', 'DELETE', f'/api/players/{self.cancel_player.id}/bids/'),
+            Route('team-squad-by-id', 'GET', f'/api/teams/{team.id}/squad/'),
+            Route('team-squad', 'GET', '/api/team/squad/'),
+            Route('team-matches', 'GET', f'/api/team/matches/{team.id}/'),
+            Route('team-match-list', 'GET', f'/api/teams/{team.id}/matches/'),
+            Route('team-next-matches', 'GET', f'/api/teams/{team.id}/matches/next/'),
+            Route('team-last-matches', 'GET', f'/api/teams/{team.id}/matches/last/'),
+            Route('team-standing-detail', 'GET', f'/api/teams/{team.id}/standing/'),
+            Route('team-tactics', 'GET', '/api/team/tactics/'),
+            Route('team-tactics', 'PUT', '/api/team/tactics/',
+                  {'pace': 4, 'offensiveFocus': 3, 'defensiveAggressiveness': 3, 'goToGuy': self.squad[0].id,
+                   'defensiveStopper': self.squad[1].id, 'players': rotation}),
+            Route('team-dashboard', 'GET', '/api/team/dashboard/'),
+            Route('player-list-transfer', 'POST', f'/api/players/{self.squad[0].id}/list-transfer/',
+                  {'price': 2_000_000}),
+            Route('player-unlist-transfer', 'POST', f'/api/players/{self.listed.id}/unlist-transfer/'),
+            Route('player-release', 'POST', f'/api/players/{self.squad[1].id}/release/'),
+            Route('response-cache-stats', 'GET', '/api/cache/stats/', client='staff'),
+            Route('metrics', 'GET', '/api/metrics', client='scraper'),
+            Route('token_obtain_pair', 'POST', '/api/auth/login/',
+                  {'username': self.manager.username, 'password': PASSWORD}, client='anonymous', iterations=5),
+            Route('token_refresh', 'POST', '/api/auth/refresh/', {'refresh': refresh}, client='anonymous'),
+            Route('register_and_assign', 'POST', '/api/auth/register/',
+                  {'username': 'benchmark-newcomer', 'email': 'newcomer@example.com', 'password': PASSWORD,
+                   'team_name': 'Benchmark Newcomers', 'arena_name': 'Benchmark Arena',
+                   'primary_color': 'White', 'secondary_color': 'Black'},
+                  client='anonymous', iterations=5),
+        ]
+
+    def client_for(self, kind):
+        client = APIClient()
+        user = {'manager': self.manager, 'staff': self.staff}.get(kind)
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        elif kind == 'scraper':
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+        return client
+
+    def measure(self, route):
+        client = self.client_for(route.client)
+        call = getattr(client, route.method.lower())
+        timings, queries = [], []
+        for _ in range(route.iterations or ITERATIONS):
+            for cache in caches.all():
+                cache.clear()
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = call(route.path, route.data, format='json')
+                    timings.append((time.perf_counter() - start) * 1000)
+                transaction.set_rollback(True)
+            self.assertLess(response.status_code, 400, f'{route.key}: {response.status_code} {response.content[:200]}')
+            queries.append(len(captured))
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 2),
+            'queries': max(queries),
+        }
+
+    def test_every_route_is_benchmarked(self):
+        names = set(_route_names(get_resolver('TopFiveBack.urls'))) | set(_route_names(get_resolver('accounts.urls')))
+        covered = {route.name for route in self.routes()} | set(EXCLUDED)
+        self.assertFalse(names - covered, f'Routes without a benchmark: {sorted(names - covered)}')
+
+    def test_endpoints_against_baselines(self):
+        results = {route.key: self.measure(route) for route in self.routes()}
+        stored = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+        baselines = stored.get(str(LEAGUES), {})
+
+        lines, regressions = [], []
+        for key, result in results.items():
+            baseline = baselines.get(key)
+            line = f"{key:<36} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  {result['queries']:>3} q"
+            if baseline:
+                line += (f"   (baseline p50 {baseline['p50_ms']:.2f} ms, p95 {baseline['p95_ms']:.2f} ms, "
+                         f"{baseline['queries']} q)")
+                if result['queries'] > baseline['queries']:
+                    regressions.append(f"{key}: {result['queries']} queries, baseline {baseline['queries']}")
+                if result['p50_ms'] > baseline['p50_ms'] * (1 + TOLERANCE) + SLACK_MS:
+                    regressions.append(f"{key}: p50 {result['p50_ms']:.2f} ms, baseline {baseline['p50_ms']:.2f} ms")
+            else:
+                line += '   (no baseline)'
+            lines.append(line)
+        print(f'\nEndpoint benchmarks, {LEAGUES} leagues, {ITERATIONS} iterations:\n' + '\n'.join(lines))
+
+        if UPDATE:
+            stored[str(LEAGUES)] = results
+            BASELINES.write_text(json.dumps(stored, indent=2, sort_keys=True) + '\n')
+            return
+        self.assertFalse(regressions, 'Regressions:\n' + '\n'.join(regressions))
@@ -0,0 +1,177 @@
+# file: TopFiveBack/test_query_budgets.py
+"""
+Query budgets.
+
+Every list-style view declares the most queries a request may run, whatever
+the size of its result: ``query_budget`` on API views, and ``query_budgets``
+(per admin page: ``'changelist'``, ``'change'``) on ModelAdmins. Each case
+below fills the rows the page lists up to every size in ``SIZES`` and
+requests it. The request fails if it runs more queries than its budget, or
+if its query count changes between sizes, which is how a per-row query (an
+unselected foreign key, a lazy reverse relation) shows up.
+
+A new list view or admin page gets a budget and a case here.
+"""
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import responsecache, snapshot
+from .models import League, Match, Player, PlayerSeasonStats, Team, TeamSeasonStats, TransferBid
+from .tests import make_team
+
+SIZES = (10, 1000)
+
+
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Budget League', current_season_year=1)
+        cls.user = User.objects.create_user('manager', password='secret')
+        cls.team = make_team(cls.league, 'Managed', user=cls.user)
+        cls.rival = make_team(cls.league, 'Rival')
+        cls.admin = User.objects.create_superuser('admin', password='secret')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def manager(self):
+        """An API client of the manager, loaded afresh so that its team isn't cached."""
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.user.id))
+        return client
+
+    # --- Filling the pages up to ``size`` rows -------------------------------
+
+    def fill_teams(self, size):
+        """``size`` teams in the league, each with a season stats row and a player."""
+        existing = Team.objects.filter(league=self.league).count()
+        teams = Team.objects.bulk_create([
+            Team(name=f'Team {i}', league=self.league, coach_name='Coach', arena_name='Arena',
+                 home_jersey_color='Red', away_jersey_color='Blue')
+            for i in range(existing, size)
+        ])
+        TeamSeasonStats.objects.bulk_create([
+            TeamSeasonStats(team=team, league=self.league, season=self.league.current_season_year)
+            for team in teams
+        ])
+        Player.objects.bulk_create([self.player(i, team) for i, team in enumerate(teams)])
+
+    def fill_squad(self, size):
+        """``size`` players in the managed team, each with a season stats line."""
+        existing = Player.objects.filter(team=self.team).count()
+        players = Player.objects.bulk_create([self.player(i, self.team) for i in range(existing, size)])
+        PlayerSeasonStats.objects.bulk_create([
+            PlayerSeasonStats(player=player, team=self.team, league=self.league,
+                              season=self.league.current_season_year, games_played=1, points=i)
+            for i, player in enumerate(players)
+        ])
+
+    def fill_market(self, size):
+        """``size`` free agents, each with a bid from the rival."""
+        existing = Player.objects.filter(team__isnull=True).count()
+        players = Player.objects.bulk_create([self.player(i, None) for i in range(existing, size)])
+        TransferBid.objects.bulk_create([
+            TransferBid(player=player, team=self.rival, price=1_000_000) for player in players
+        ])
+
+    def fill_matches(self, size):
+        """``size`` matches in the league, all involving the managed team and in play."""
+        existing = Match.objects.filter(league=self.league).count()
+        now = timezone.now()
+        Match.objects.bulk_create([
+            Match(league=self.league, season=self.league.current_season_year, match_round=i,
+                  home_team=self.team if i % 2 else self.rival, away_team=self.rival if i % 2 else self.team,
+                  match_date=now + timezone.timedelta(days=i), possession_team=self.rival)
+            for i in range(existing, size)
+        ])
+
+    def player(self, i, team):
+        return Player(first_name='Player', last_name=str(i), age=25, position_primary='PG', team=team,
+                      height=1.9, weight=90)
+
+    # --- The harness ----------------------------------------------------------
+
+    def budget(self, path):
+        match = resolve(urlsplit(path).path)
+        view_class = getattr(match.func, 'view_class', None)
+        if view_class is not None:
+            return view_class.query_budget
+        page = match.url_name.rsplit('_', 1)[1]
+        return match.func.model_admin.query_budgets[page]
+
+    def assertWithinBudget(self, path, fill, admin=False):
+        """Requests ``path`` after ``fill(size)`` for every size; the rows are rolled back after."""
+        budget = self.budget(path)
+        with transaction.atomic():
+            counts = self.count_queries(path, fill, admin, budget)
+            transaction.set_rollback(True)
+        self.assertEqual(len(set(counts.values())), 1, f'{path}: query count grows with the rows: {counts}')
+
+    def count_queries(self, path, fill, admin, budget):
+        counts = {}
+        for size in SIZES:
+            fill(size)
+            client = self.client if admin else self.manager()
+            caches[responsecache.CACHE_ALIAS].clear()
+            ContentType.objects.clear_cache()
+            snapshot.invalidate()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            counts[size] = len(queries)
+            self.assertLessEqual(
+                len(queries), budget,
+                f'{path} ran {len(queries)} queries at {size} rows, over its budget of {budget}:\n'
+                + '\n'.join(query['sql'] for query in queries.captured_queries),
+            )
+        return counts
+
+    # --- API ------------------------------------------------------------------
+
+    def test_match_lists(self):
+        for path in (f'/api/matches/{self.league.id}/', '/api/matches/',
+                     f'/api/teams/{self.team.id}/matches/', f'/api/teams/{self.team.id}/matches/next/'):
+            with self.subTest(path=path):
+                self.assertWithinBudget(path, self.fill_matches)
+
+    def test_standings(self):
+        self.assertWithinBudget(f'/api/leagues/{self.league.id}/standings/', self.fill_teams)
+        self.assertWithinBudget(f'/api/teams/{self.team.id}/standing/', self.fill_teams)
+
+    def test_squads(self):
+        for path in ('/api/team/squad/', f'/api/teams/{self.team.id}/squad/', '/api/team/tactics/',
+                     '/api/team/dashboard/'):
+            with self.subTest(path=path):
+                self.assertWithinBudget(path, self.fill_squad)
+
+    def test_league_leaders(self):
+        self.assertWithinBudget(f'/api/leagues/{self.league.id}/leaders/?limit=50', self.fill_squad)
+
+    def test_transfer_market(self):
+        self.assertWithinBudget('/api/players/transfer-market/', self.fill_market)
+
+    # --- Admin ----------------------------------------------------------------
+
+    def test_admin_changelists(self):
+        for path, fill in (('/admin/TopFiveBack/match/', self.fill_matches),
+                           ('/admin/TopFiveBack/team/', self.fill_teams),
+                           ('/admin/TopFiveBack/teamseasonstats/', self.fill_teams),
+                           ('/admin/TopFiveBack/player/', self.fill_squad),
+                           ('/admin/TopFiveBack/playerseasonstats/', self.fill_squad),
+                           ('/admin/TopFiveBack/transferbid/', self.fill_market)):
+            with self.subTest(path=path):
+                self.assertWithinBudget(path, fill, admin=True)
+
+    def test_admin_inlines(self):
+        self.assertWithinBudget(f'/admin/TopFiveBack/league/{self.league.id}/change/', self.fill_teams, admin=True)
+        self.assertWithinBudget(f'/admin/TopFiveBack/team/{self.team.id}/change/', self.fill_squad, admin=True)
@@ -1,3 +1,1160 @@
-from django.test import TestCase
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+import numpy as np
+from asgiref.sync import async_to_sync, sync_to_async
+from rest_framework.test import APIClient
+
+from . import (aimanager, dashboard, eventstore, lifecycle, live, metrics, orderbook, progression, projections,
+               responsecache, results, schedule, seasons, simulation, snapshot, worldgen)
+from .models import League, Match, Player, PlayerSeasonStats, Team, TeamSeasonStats, TransferBid, team_overall_rating
+from .transfers import TransferError
+
+
+def make_team(league, name, user=None):
+    team = Team.objects.create(name=name, league=league, user=user, coach_name='Coach', arena_name='Arena',
+                               home_jersey_color='Red', away_jersey_color='Blue')
+    TeamSeasonStats.objects.create(team=team, league=league, season=league.current_season_year)
+    return team
+
+
+def make_players(team, count):
+    Player.objects.bulk_create([
+        Player(first_name='Player', last_name=str(i), age=25, position_primary='PG', team=team,
+               height=1.9, weight=90, fitness=50 if i % 3 else 100, is_injured=i % 4 == 0)
+        for i in range(count)
+    ])
+
+
+class DashboardTests(TestCase):
+    """The dashboard's query count doesn't depend on the squad or league size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Test League', current_season_year=1)
+        cls.user = User.objects.create_user('manager', password='secret')
+        cls.team = make_team(cls.league, 'Managed', user=cls.user)
+        cls.rival = make_team(cls.league, 'Rival')
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+
+    def load(self, team):
+        return Team.objects.select_related('league').get(id=team.id)
+
+    def test_query_count_is_bounded(self):
+        make_players(self.team, 2)
+        team = self.load(self.team)
+        with self.assertNumQueries(6):
+            dashboard.team_dashboard(team)
+
+        for i in range(18):
+            make_team(self.league, f'Extra {i}')
+        make_players(self.team, 13)
+        schedule.create_schedules([self.league.id], seed=1, start=timezone.now())
+        team = self.load(self.team)
+        with self.assertNumQueries(6):
+            payload = dashboard.team_dashboard(team)
+        self.assertEqual(payload['financial']['squad_size'], 15)
+        self.assertEqual(payload['standing']['teams'], 20)
+        self.assertIsNotNone(payload['next_match'])
+        self.assertEqual(len(payload['roster_health']['injured']), 5)
+        self.assertIn('squad_full', [alert['code'] for alert in payload['alerts']])
+
+    def test_endpoint_is_cached_per_team_version(self):
+        make_players(self.team, 5)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertNumQueries(7):  # the team (with its league) + the dashboard
+            response = client.get('/api/team/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):
+            response = client.get('/api/team/dashboard/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        with self.assertNumQueries(1):
+            response = client.get('/api/team/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        responsecache.bump(responsecache.team(self.team.id))
+        response = client.get('/api/team/dashboard/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+
+class TeamMatchFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Feed League', current_season_year=1)
+        cls.team = make_team(cls.league, 'Home')
+        cls.rival = make_team(cls.league, 'Away')
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+
+    def test_feeds_list_the_team_matches(self):
+        schedule.create_schedules([self.league.id], seed=1, start=timezone.now())
+        response = self.client.get(f'/api/teams/{self.team.id}/matches/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        response = self.client.get(f'/api/teams/{self.team.id}/matches/next/')
+        self.assertEqual(len(response.json()), 1)
+
+    def test_unknown_team_is_not_found(self):
+        for path in ('/api/teams/999999/matches/', '/api/teams/999999/matches/next/',
+                     '/api/teams/999999/matches/last/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+                self.assertEqual(self.client.get(path).status_code, 404)
+
+
+def make_side(team_id, rng, size=10):
+    """An engine roster of ``size`` players with random skills and default roles."""
+    return simulation.side_from_arrays(
+        team_id,
+        player_ids=np.arange(1, size + 1) + 100 * team_id,
+        skills=rng.uniform(50, 90, (size, simulation.N_SKILLS)).astype(np.float32),
+        fitness=np.full(size, 100.0),
+        is_injured=np.zeros(size, dtype=bool),
+        default_minutes=np.array([32] * 5 + [16] * (size - 5), dtype=np.float32),
+        assigned_minutes=np.zeros(size, dtype=np.float32),
+        usage=np.ones(size, dtype=np.float32),
+    )
+
+
+class SimulationTests(SimpleTestCase):
+    """Box-score invariants of the engine, over enough games to go to overtime."""
+
+    GAMES = 2000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(7)
+        cls.homes = [make_side(1, rng) for _ in range(cls.GAMES)]
+        cls.aways = [make_side(2, rng) for _ in range(cls.GAMES)]
+        cls.result = simulation.simulate_games(cls.homes, cls.aways, seed=42, record_events=True)
+
+    def box(self, field):
+        return self.result.box[..., simulation.BOX_INDEX[field]]
+
+    def test_score_is_the_sum_of_player_points(self):
+        points = self.box('points').sum(axis=2)
+        np.testing.assert_array_equal(points[:, 0], self.result.home_score)
+        np.testing.assert_array_equal(points[:, 1], self.result.away_score)
+        self.assertTrue((self.result.home_score != self.result.away_score).all())
+
+    def test_minutes_cover_overtime(self):
+        overtimes = self.result.periods - simulation.REGULATION_PERIODS
+        self.assertTrue(overtimes.any())
+        expected = 240 + 25 * overtimes
+        minutes = self.box('minutes').sum(axis=2)
+        np.testing.assert_array_equal(minutes[:, 0], expected)
+        np.testing.assert_array_equal(minutes[:, 1], expected)
+
+    def test_events_rebuild_the_box_score(self):
+        players, lines, _ = simulation.player_lines(self.result.events)
+        ids = self.result.player_ids.ravel()
+        box = self.result.box.reshape(-1, len(simulation.BOX_FIELDS))
+        played = box[:, simulation.BOX_INDEX['minutes']] > 0
+        totals = np.zeros((players.max() + 1, len(simulation.BOX_FIELDS)), dtype=np.int64)
+        np.add.at(totals, ids[played], box[played])
+        np.testing.assert_array_equal(lines, totals[players])
+
+    def test_events_are_in_game_order(self):
+        events, offsets = self.result.events, self.result.event_offsets
+        self.assertTrue((self.result.periods > simulation.REGULATION_PERIODS).any())
+        starts = np.zeros(len(events), dtype=bool)
+        starts[offsets[:-1]] = True
+        for field in ('period', 'home_score', 'away_score'):
+            steps = np.diff(events[field].astype(np.int64))
+            self.assertTrue((steps[~starts[1:]] >= 0).all(), field)
+        np.testing.assert_array_equal(events['seq'],
+                                      np.arange(len(events)) - np.repeat(offsets[:-1], np.diff(offsets)))
+        last = offsets[1:] - 1
+        np.testing.assert_array_equal(events['home_score'][last], self.result.home_score)
+        np.testing.assert_array_equal(events['away_score'][last], self.result.away_score)
+        # A period-end marker per period, each one after every play of its period.
+        ends = np.flatnonzero(events['kind'] == simulation.EVENT_PERIOD_END)
+        self.assertEqual(len(ends), self.result.periods.sum())
+        after = events[ends + 1]
+        self.assertTrue(((after['kind'] == simulation.EVENT_MINUTES)
+                         | (after['period'] == events['period'][ends] + 1)).all())
+
+    def test_same_seed_same_games(self):
+        again = simulation.simulate_games(self.homes, self.aways, seed=42)
+        np.testing.assert_array_equal(again.home_score, self.result.home_score)
+        np.testing.assert_array_equal(again.away_score, self.result.away_score)
+        np.testing.assert_array_equal(again.box, self.result.box)
+        other = simulation.simulate_games(self.homes, self.aways, seed=43)
+        self.assertFalse(np.array_equal(other.home_score, self.result.home_score))
+
+
+def bump_elsewhere(*scopes):
+    """Bumps response cache ``scopes`` from another process, as a command run would."""
+    code = f'from TopFiveBack import responsecache; responsecache.bump(*{list(scopes)!r})'
+    subprocess.run([sys.executable, 'manage.py', 'shell', '-c', code],
+                   cwd=settings.BASE_DIR, check=True, capture_output=True)
+
+
+class ResponseCacheTests(TestCase):
+    """Writes from other processes reach the cached read endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Cache League', current_season_year=1)
+        cls.home = make_team(cls.league, 'Home')
+        cls.away = make_team(cls.league, 'Away')
+        make_players(cls.home, 8)
+        make_players(cls.away, 8)
+        schedule.create_schedules([cls.league.id], seed=1, start=timezone.now())
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+        self.path = f'/api/leagues/{self.league.id}/standings/'
+
+    def test_bump_from_another_process_is_a_miss(self):
+        self.assertEqual(self.client.get(self.path)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.path)['X-Cache'], 'HIT')
+        bump_elsewhere(responsecache.league(self.league.id))
+        self.assertEqual(self.client.get(self.path)['X-Cache'], 'MISS')
+
+    def test_commands_invalidate_the_standings(self):
+        before = self.client.get(self.path)
+        self.assertEqual(self.client.get(self.path)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('simulate_round', workers=1, seed=1, no_events=True, stdout=StringIO())
+        after = self.client.get(self.path)
+        self.assertEqual(after['X-Cache'], 'MISS')
+        self.assertEqual([row['games_played'] for row in before.json()], [0, 0])
+        self.assertEqual([row['games_played'] for row in after.json()], [1, 1])
+
+    def test_etag_goes_stale_after_a_write_elsewhere(self):
+        etag = self.client.get(self.path)['ETag']
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'NOT-MODIFIED')
+
+        bump_elsewhere(responsecache.league(self.league.id))
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+    def test_admin_and_value_refresh_bump_the_versions(self):
+        home, away = responsecache.team(self.home.id), responsecache.team(self.away.id)
+        scopes = [responsecache.WORLD, responsecache.MARKET, responsecache.league(self.league.id), home, away]
+
+        def bumped(write):
+            before = responsecache.versions(scopes)
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            return {scope for scope, old, new in zip(scopes, before, responsecache.versions(scopes)) if old != new}
+
+        self.assertEqual(bumped(lambda: call_command('refresh_player_values', stdout=StringIO())),
+                         {responsecache.WORLD})
+        request = RequestFactory().post('/admin/')
+        request.user = User.objects.create_superuser('admin', password='secret')
+        player = Player.objects.filter(team=self.home).first()
+        player.team = self.away
+        self.assertEqual(bumped(lambda: admin.site._registry[Player].save_model(request, player, None, True)),
+                         {responsecache.MARKET, home, away})
+        team = Team.objects.get(id=self.home.id)
+        team.name = 'Renamed'
+        self.assertEqual(bumped(lambda: admin.site._registry[Team].save_model(request, team, None, True)),
+                         {responsecache.league(self.league.id), home})
+
+class SnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Snapshot League', current_season_year=1)
+        cls.team = make_team(cls.league, 'Team')
+        make_players(cls.team, 5)
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+
+    def test_reused_until_invalidated_from_another_process(self):
+        loaded = snapshot.get_snapshot()
+        self.assertIs(snapshot.get_snapshot(), loaded)
+        self.assertEqual(len(loaded.player_ids[loaded.roster(self.team.id)]), 5)
+
+        make_players(self.team, 2)
+        bump_elsewhere(snapshot.VERSION_SCOPE)
+        reloaded = snapshot.get_snapshot()
+        self.assertIsNot(reloaded, loaded)
+        self.assertEqual(len(reloaded.player_ids[reloaded.roster(self.team.id)]), 7)
+
+
+class LiveMatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Live League', current_season_year=2)
+        cls.home = make_team(cls.league, 'Home')
+        cls.away = make_team(cls.league, 'Away')
+        make_players(cls.home, 8)
+        make_players(cls.away, 8)
+        cls.match = Match.objects.create(league=cls.league, season=1, match_round=1, home_team=cls.home,
+                                         away_team=cls.away, match_date=timezone.now())
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+
+    def test_state_keeps_the_match_season(self):
+        state, *_ = live._load_live_match(self.match.id)
+        self.assertEqual(state['status'], 'live')
+        self.assertEqual(state['season'], 1)
+
+    def test_every_load_plays_the_same_game(self):
+        _, home, away, seed = live._load_live_match(self.match.id)
+        self.assertEqual(live._load_live_match(self.match.id)[3], seed)
+        games = [simulation.simulate_games([home], [away], seed=seed, record_events=True) for _ in range(2)]
+        np.testing.assert_array_equal(games[0].events, games[1].events)
+
+        snapshot.invalidate()
+        self.assertNotEqual(live._load_live_match(self.match.id)[3], seed)
+
+
+class OrderBookTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Market League', current_season_year=1)
+        cls.seller = make_team(cls.league, 'Seller')
+        cls.buyer = make_team(cls.league, 'Buyer')
+        cls.rich = make_team(cls.league, 'Rich')
+        Team.objects.filter(id=cls.buyer.id).update(budget=600_000)
+        cls.buyer.refresh_from_db()
+        make_players(cls.seller, 3)
+        cls.seller.players.update(is_on_transfer_list=True, asking_price=400_000)
+        cls.first, cls.second, cls.third = cls.seller.players.order_by('id')
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+
+    def test_bids_are_checked_and_replaced(self):
+        with self.assertRaises(TransferError):
+            orderbook.place_bid(self.buyer, self.first.id, 700_000, 2)
+        with self.assertRaises(TransferError):
+            orderbook.place_bid(self.seller, self.first.id, 500_000, 2)
+        orderbook.place_bid(self.buyer, self.first.id, 300_000, 2)
+        bid = orderbook.place_bid(self.buyer, self.first.id, 500_000, 3)
+        self.assertEqual(TransferBid.objects.filter(status=TransferBid.OPEN).count(), 1)
+        self.assertEqual((bid.price, bid.contract_years), (500_000, 3))
+        self.assertTrue(orderbook.cancel_bid(self.buyer, self.first.id))
+        self.assertFalse(orderbook.cancel_bid(self.buyer, self.first.id))
+
+    def test_book_is_invalidated_after_the_write(self):
+        path = f'/api/players/{self.first.id}/bids/'
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('viewer'))
+        self.assertEqual(client.get(path).json()['open_bids'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            orderbook.place_bid(self.buyer, self.first.id, 500_000, 2)
+        response = client.get(path)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['open_bids'], 1)
+
+    def test_fills_respect_budgets_across_books(self):
+        orderbook.place_bid(self.buyer, self.first.id, 500_000, 2)
+        orderbook.place_bid(self.buyer, self.second.id, 500_000, 2)
+        orderbook.place_bid(self.rich, self.second.id, 450_000, 2)
+        orderbook.place_bid(self.rich, self.third.id, 300_000, 2)
+
+        report = orderbook.match_bids()
+        self.assertEqual((report.open_bids, report.books, report.expired), (4, 3, 1))
+        self.assertEqual({(f.player_id, f.buyer_id, f.price) for f in report.fills},
+                         {(self.first.id, self.buyer.id, 500_000), (self.second.id, self.rich.id, 450_000)})
+        budgets = dict(Team.objects.values_list('id', 'budget'))
+        self.assertEqual(budgets[self.buyer.id], 100_000)
+        self.assertEqual(budgets[self.rich.id], 550_000)
+        self.assertEqual(budgets[self.seller.id], 1_950_000)
+        owners = dict(Player.objects.values_list('id', 'team_id'))
+        self.assertEqual((owners[self.first.id], owners[self.second.id], owners[self.third.id]),
+                         (self.buyer.id, self.rich.id, self.seller.id))
+        statuses = {(bid.player_id, bid.team_id): bid.status for bid in TransferBid.objects.all()}
+        self.assertEqual(statuses, {
+            (self.first.id, self.buyer.id): TransferBid.FILLED,
+            (self.second.id, self.buyer.id): TransferBid.EXPIRED,
+            (self.second.id, self.rich.id): TransferBid.FILLED,
+            (self.third.id, self.rich.id): TransferBid.OPEN,
+        })
+
+
+class TeamWriteTests(TestCase):
+    """Team endpoints don't write back a budget that changed since the team was loaded."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Write League', current_season_year=1)
+        cls.user = User.objects.create_user('manager', password='secret')
+        cls.team = make_team(cls.league, 'Managed', user=cls.user)
+        make_players(cls.team, 6)
+        cls.player = cls.team.players.order_by('id').first()
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        # The request's user (and its cached team) is loaded before the budget changes.
+        self.client.force_authenticate(User.objects.select_related('team').get(id=self.user.id))
+        Team.objects.filter(id=self.team.id).update(budget=500_000)
+
+    def test_tactics_keep_the_budget(self):
+        response = self.client.put('/api/team/tactics/', {'pace': 5, 'players': []}, format='json')
+        self.assertEqual(response.status_code, 200)
+        team = Team.objects.get(id=self.team.id)
+        self.assertEqual((team.pace, team.budget), (5, 500_000))
+
+    def test_release_debits_the_current_budget(self):
+        cost = int(self.player.market_value * 0.10)
+        response = self.client.post(f'/api/players/{self.player.id}/release/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['new_budget'], 500_000 - cost)
+        self.assertEqual(Team.objects.get(id=self.team.id).budget, 500_000 - cost)
+        self.assertIsNone(Player.objects.get(id=self.player.id).team_id)
+
+    def test_release_needs_the_budget(self):
+        Team.objects.filter(id=self.team.id).update(budget=0)
+        response = self.client.post(f'/api/players/{self.player.id}/release/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Player.objects.get(id=self.player.id).team_id, self.team.id)
+
+
+class EventStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(TOPFIVE_EVENT_STORE=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        rng = np.random.default_rng(3)
+        result = simulation.simulate_games([make_side(1, rng) for _ in range(3)],
+                                           [make_side(2, rng) for _ in range(3)], seed=3, record_events=True)
+        self.games = {match_id: result.events_for(game) for game, match_id in enumerate((11, 12, 13))}
+
+    def write(self, *match_ids, season=1):
+        return eventstore.write_games((match_id, 5, season, self.games[match_id]) for match_id in match_ids)
+
+    def assertStored(self, match_id, season=1):
+        events = eventstore.read_events(match_id, 5, season)
+        np.testing.assert_array_equal(events, self.games[match_id])
+        np.testing.assert_array_equal(eventstore.read_events(match_id, 5, season, start=10, limit=5),
+                                      self.games[match_id][10:15])
+
+    def test_round_trip_through_compaction(self):
+        self.assertEqual(self.write(11, 12), 2)
+        self.assertEqual(self.write(11), 0)
+        self.assertStored(11)
+        self.assertEqual(eventstore.stored_seasons(), [(5, 1, True)])
+
+        self.assertEqual(eventstore.compact_season(5, 1), 2)
+        self.assertEqual(eventstore.stored_seasons(), [(5, 1, False)])
+        self.assertStored(11)
+        self.assertStored(12)
+        self.assertEqual(self.write(12), 0)
+        self.assertIsNone(eventstore.read_events(11, 5, 2))
+
+        self.write(13)
+        self.assertEqual([match_id for match_id, _ in eventstore.iter_season(5, 1)], [11, 12, 13])
+        eventstore.compact_season(5, 1)
+        self.assertEqual([match_id for match_id, _ in eventstore.iter_season(5, 1)], [11, 12, 13])
+        self.assertStored(13)
+
+        eventstore.drop_season(5, 1)
+        self.assertIsNone(eventstore.read_events(11, 5, 1))
+        self.assertEqual(list(eventstore.iter_season(5, 1)), [])
+
+    def test_iteration_survives_a_compaction(self):
+        self.write(11, 12)
+        games = eventstore.iter_season(5, 1)
+        first_id, first = next(games)
+        eventstore.compact_season(5, 1)
+        rest = list(games)
+        self.assertEqual([first_id] + [match_id for match_id, _ in rest], [11, 12])
+        np.testing.assert_array_equal(rest[0][1], self.games[12])
+
+
+@mock.patch('TopFiveBack.management.commands.rebuild_player_stats.GAME_BATCH_SIZE', 3)
+class RebuildPlayerStatsTests(TestCase):
+    """Player stats rebuilt from the event store match the ones recorded as the games were played."""
+
+    STAT_FIELDS = ('player_id', 'team_id', 'games_played', 'rebounds') + PlayerSeasonStats.TOTAL_FIELDS
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Stats League', current_season_year=1)
+        for i in range(4):
+            make_players(make_team(cls.league, f'Team {i}'), 8)
+        schedule.create_schedules([cls.league.id], seed=1, start=timezone.now())
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(TOPFIVE_EVENT_STORE=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for seed in range(3):
+            call_command('simulate_round', workers=1, seed=seed, stdout=StringIO())
+
+    def stats(self):
+        return sorted(PlayerSeasonStats.objects.values_list(*self.STAT_FIELDS))
+
+    def test_rebuild_matches_recorded_stats(self):
+        recorded = self.stats()
+        self.assertEqual(len(recorded), 24)  # two of every eight are injured
+        PlayerSeasonStats.objects.update(points=0)
+        call_command('rebuild_player_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), recorded)
+
+    def test_seasons_with_missing_games_are_left_alone(self):
+        match = Match.objects.filter(completed=True).first()
+        eventstore._match_path(match.id).unlink()
+        PlayerSeasonStats.objects.update(points=0)
+        out = StringIO()
+        call_command('rebuild_player_stats', stdout=out)
+        self.assertIn('1 completed matches have no play-by-play', out.getvalue())
+        self.assertFalse(PlayerSeasonStats.objects.exclude(points=0).exists())
+
+        call_command('rebuild_player_stats', allow_missing=True, stdout=StringIO())
+        self.assertTrue(PlayerSeasonStats.objects.exclude(points=0).exists())
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+
+    def test_render(self):
+        registry = metrics.Registry()
+        registry.record('team-squad', 'GET', 200, 0.004, 3, 0.001)
+        registry.record('team-squad', 'GET', 200, 0.3, 12, 0.2)
+        registry.record('team-squad', 'GET', 404, 0.002, 1, 0.0005)
+        registry.record('odd"view', 'POST', 500, 0.01, 0, 0.0)
+        lines = registry.render().splitlines()
+        for line in (
+            '# TYPE topfive_http_requests_total counter',
+            'topfive_http_requests_total{view="team-squad",method="GET",status="200"} 2',
+            'topfive_http_requests_total{view="team-squad",method="GET",status="404"} 1',
+            r'topfive_http_requests_total{view="odd\"view",method="POST",status="500"} 1',
+            '# TYPE topfive_http_request_duration_seconds histogram',
+            'topfive_http_request_duration_seconds_bucket{view="team-squad",method="GET",le="0.0025"} 1',
+            'topfive_http_request_duration_seconds_bucket{view="team-squad",method="GET",le="0.005"} 2',
+            'topfive_http_request_duration_seconds_bucket{view="team-squad",method="GET",le="0.25"} 2',
+            'topfive_http_request_duration_seconds_bucket{view="team-squad",method="GET",le="+Inf"} 3',
+            'topfive_http_request_duration_seconds_count{view="team-squad",method="GET"} 3',
+            'topfive_http_request_queries_bucket{view="team-squad",method="GET",le="3"} 2',
+            'topfive_http_request_queries_sum{view="team-squad",method="GET"} 16',
+            'topfive_response_cache_hits_total 0',
+        ):
+            self.assertIn(line, lines)
+
+    def test_middleware_in_both_chains(self):
+        league = League.objects.create(name='Metrics League', current_season_year=1)
+        make_team(league, 'Team')
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        path = f'/api/leagues/{league.id}/standings/'
+        self.client.get(path)
+        caches[responsecache.CACHE_ALIAS].clear()
+        async_to_sync(AsyncClient().get)(path)
+        async_to_sync(AsyncClient().get)('/api/matches/999999/live/')
+        lines = metrics.registry.render().splitlines()
+        # The standings query, under WSGI and under ASGI.
+        self.assertIn('topfive_http_request_queries_bucket{view="league-standings",method="GET",le="0"} 0', lines)
+        self.assertIn('topfive_http_request_queries_sum{view="league-standings",method="GET"} 2', lines)
+        # The async SSE view's lookup runs in a sync_to_async thread.
+        self.assertIn('topfive_http_requests_total{view="match-live",method="GET",status="404"} 1', lines)
+        self.assertIn('topfive_http_request_queries_sum{view="match-live",method="GET"} 1', lines)
+
+    def test_queries_in_other_threads_are_counted(self):
+        def select_one():
+            # A thread of its own, so a connection of its own.
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        async def view(request):
+            await sync_to_async(select_one, thread_sensitive=False)()
+            return HttpResponse()
+
+        registry = metrics.Registry()
+        with mock.patch.object(metrics, 'registry', registry):
+            async_to_sync(metrics.MetricsMiddleware(view))(RequestFactory().get('/'))
+        self.assertIn(f'topfive_http_request_queries_sum{{view="{metrics.UNRESOLVED}",method="GET"}} 1',
+                      registry.render().splitlines())
+
+    def test_access(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+        with self.settings(TOPFIVE_METRICS_TOKEN='scrape-me'):
+            self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'topfive_http_requests_total', response.content)
+        with self.settings(TOPFIVE_METRICS_PUBLIC=True):
+            self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+
+
+class ScheduleTests(TestCase):
+
+    def test_double_round_robin_is_balanced(self):
+        for n in (2, 4, 10, 20):
+            with self.subTest(teams=n):
+                team_ids = list(range(100, 100 + n))
+                rounds = schedule.double_round_robin(team_ids)
+                self.assertEqual(len(rounds), 2 * (n - 1))
+                for pairs in rounds:
+                    self.assertEqual(sorted(team for pair in pairs for team in pair), team_ids)
+                games = [pair for pairs in rounds for pair in pairs]
+                # Every ordered pair once: each pair meets twice, once at each venue.
+                self.assertEqual(sorted(games), sorted((a, b) for a in team_ids for b in team_ids if a != b))
+                for half in (rounds[:n - 1], rounds[n - 1:]):
+                    homes = [sum(home == team for pairs in half for home, _ in pairs) for team in team_ids]
+                    self.assertLessEqual(max(homes) - min(homes), 1)
+        with self.assertRaises(ValueError):
+            schedule.double_round_robin([1, 2, 3])
+
+    def test_create_schedules(self):
+        league = League.objects.create(name='Schedule League', current_season_year=3)
+        odd = League.objects.create(name='Odd League', current_season_year=1)
+        for i in range(6):
+            make_team(league, f'Team {i}')
+        make_team(odd, 'Alone')
+        start = timezone.now()
+
+        report = schedule.create_schedules([league.id, odd.id], seed=1, start=start)
+        self.assertEqual((report.scheduled, report.invalid, report.matches), ([league.id], [(odd.id, 1)], 30))
+        matches = Match.objects.filter(league=league)
+        self.assertEqual(matches.count(), 30)
+        self.assertEqual(set(matches.values_list('season', flat=True)), {3})
+        first = matches.order_by('match_round', 'id').first()
+        self.assertEqual(first.match_date, start)
+        for field in Match._meta.concrete_fields:
+            if field.name not in schedule.FIXTURE_FIELDS and not field.primary_key:
+                self.assertEqual(getattr(first, field.attname), field.get_default(), field.name)
+
+        again = schedule.create_schedules([league.id], seed=2, start=start)
+        self.assertEqual((again.scheduled, again.already_scheduled, again.matches), ([], [league.id], 0))
+        rounds = schedule.double_round_robin(list(league.teams.values_list('id', flat=True)))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            schedule.insert_fixtures(league.id, 3, rounds, start)
+        self.assertEqual(matches.count(), 30)
+
+
+class RolloverTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Rollover League', current_season_year=1, status='PLAYOFFS')
+        cls.team = make_team(cls.league, 'Home')
+        cls.rival = make_team(cls.league, 'Away')
+        player = dict(first_name='Player', position_primary='PG', height=1.9, weight=90)
+        cls.young = Player.objects.create(last_name='Young', age=20, contract_years=3, team=cls.team, **player)
+        cls.expiring = Player.objects.create(last_name='Expiring', age=24, contract_years=1, team=cls.team, **player)
+        cls.veteran = Player.objects.create(last_name='Veteran', age=40, contract_years=4, team=cls.rival, **player)
+        cls.free_agent = Player.objects.create(last_name='Free', age=22, contract_years=2, **player)
+
+    def skills(self):
+        return list(Player.objects.order_by('id').values_list(*Player.SKILL_FIELDS))
+
+    def test_unplayed_matches_block_the_rollover(self):
+        Match.objects.create(league=self.league, season=1, match_round=1, home_team=self.team,
+                             away_team=self.rival, match_date=timezone.now())
+        with self.assertRaises(seasons.RolloverError):
+            seasons.rollover_season(seed=1)
+        self.assertEqual(League.objects.get(id=self.league.id).current_season_year, 1)
+        self.assertEqual(seasons.rollover_season(seed=1, force=True).leagues, 1)
+
+    def test_rollover(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = seasons.rollover_season(seed=1)
+        self.assertEqual((report.leagues, report.players, report.teams), (1, 4, 2))
+        # The veteran is 41: retirement is certain. Nobody else is old enough to retire.
+        self.assertEqual((report.retired, report.released), (1, 1))
+
+        young, expiring, veteran, free_agent = (Player.objects.get(id=player.id) for player in
+                                                (self.young, self.expiring, self.veteran, self.free_agent))
+        self.assertEqual([p.age for p in (young, expiring, veteran, free_agent)], [21, 25, 41, 23])
+        self.assertEqual((young.team_id, young.contract_years), (self.team.id, 2))
+        self.assertEqual((expiring.team_id, expiring.contract_years), (None, 0))
+        self.assertEqual((veteran.is_retired, veteran.team_id, veteran.contract_years), (True, None, 0))
+        # Free agents keep their contract years; only rostered players run theirs down.
+        self.assertEqual((free_agent.team_id, free_agent.contract_years), (None, 2))
+        low, high = progression.SKILL_BOUNDS
+        for skills in self.skills():
+            self.assertTrue(all(low <= skill <= high for skill in skills))
+
+        league = League.objects.get(id=self.league.id)
+        self.assertEqual((league.current_season_year, league.status), (2, 'PRE_SEASON'))
+        self.assertEqual(set(TeamSeasonStats.objects.filter(season=2).values_list('team_id', flat=True)),
+                         {self.team.id, self.rival.id})
+
+    def test_standings_follow_the_new_season(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+        TeamSeasonStats.objects.filter(season=1).update(games_played=1, wins=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            seasons.rollover_season(seed=1)
+        response = self.client.get(f'/api/leagues/{self.league.id}/standings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted((row['team_id'], row['wins']) for row in response.json()),
+                         [(self.team.id, 0), (self.rival.id, 0)])
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('manager', password='secret'))
+        response = client.get(f'/api/teams/{self.team.id}/standing/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['team_id'], response.json()['games_played']), (self.team.id, 0))
+
+    def test_same_seed_same_rollover(self):
+        runs = []
+        for _ in range(2):
+            with transaction.atomic():
+                seasons.rollover_season(seed=7)
+                runs.append(self.skills())
+                transaction.set_rollback(True)
+        self.assertEqual(runs[0], runs[1])
+        self.assertNotEqual(runs[0], self.skills())
+
+
+class DevelopmentTests(TestCase):
+
+    def arrays(self, rng, players=500):
+        ages = rng.integers(18, 39, players)
+        skills = rng.uniform(30, 95, (players, len(Player.SKILL_FIELDS)))
+        return ages, skills, rng.uniform(0, 40, players), rng.integers(0, len(progression.FOCUSES), players)
+
+    def test_develop(self):
+        ages, skills, minutes, focus = self.arrays(np.random.default_rng(3))
+        first = progression.develop(np.random.default_rng(9), ages, skills, minutes, focus)
+        again = progression.develop(np.random.default_rng(9), ages, skills, minutes, focus)
+        np.testing.assert_array_equal(first, again)
+        self.assertTrue(((first >= progression.SKILL_BOUNDS[0]) & (first <= progression.SKILL_BOUNDS[1])).all())
+        change = (first - skills).mean(axis=1)
+        # Young players improve and old ones decline, on average.
+        self.assertGreater(change[ages <= 21].mean(), 1)
+        self.assertLess(change[ages >= 34].mean(), -1)
+
+    def test_develop_players(self):
+        league = League.objects.create(name='Development League', current_season_year=1)
+        make_players(make_team(league, 'Team'), 8)
+        before = list(Player.objects.order_by('id').values_list(*Player.SKILL_FIELDS, 'rating'))
+
+        dry = progression.develop_players(seed=5, dry_run=True)
+        self.assertEqual(dry.players, 8)
+        self.assertEqual(list(Player.objects.order_by('id').values_list(*Player.SKILL_FIELDS, 'rating')), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = progression.develop_players(seed=5)
+        # The same seed gives the same numbers with and without a dry run.
+        np.testing.assert_array_equal(summary.skill_after, dry.skill_after)
+        players = list(Player.objects.order_by('id'))
+        stored = np.array([[getattr(player, name) for name in Player.SKILL_FIELDS] for player in players])
+        np.testing.assert_allclose(stored.sum(axis=0), summary.skill_after)
+        # Stored ratings follow the new skills; ages don't change.
+        self.assertNotEqual([player.rating for player in players], [row[-1] for row in before])
+        self.assertEqual({player.age for player in players}, {25})
+
+
+class RecordResultsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Results League', current_season_year=1)
+        cls.home = make_team(cls.league, 'Home')
+        cls.away = make_team(cls.league, 'Away')
+        make_players(cls.home, 2)
+        make_players(cls.away, 2)
+        schedule.create_schedules([cls.league.id], seed=1, start=timezone.now())
+
+    def result(self, match, home_score, away_score, box=False):
+        result = results.MatchResult(match.id, self.league.id, match.season, match.home_team_id,
+                                     match.away_team_id, home_score, away_score)
+        if box:
+            result.player_ids = np.zeros((2, simulation.MAX_ROSTER), dtype=np.int64)
+            result.box = np.zeros((2, simulation.MAX_ROSTER, len(simulation.BOX_FIELDS)), dtype=np.int64)
+            for side, team_id in enumerate((match.home_team_id, match.away_team_id)):
+                ids = list(Player.objects.filter(team_id=team_id).order_by('id').values_list('id', flat=True))
+                result.player_ids[side, :len(ids)] = ids
+                # The second player of each side doesn't get on the floor.
+                result.box[side, 0, simulation.BOX_INDEX['minutes']] = 40
+                result.box[side, 0, simulation.BOX_INDEX['points']] = 20 + side
+                result.box[side, 0, simulation.BOX_INDEX['oreb']] = 2
+                result.box[side, 0, simulation.BOX_INDEX['dreb']] = 5
+        return result
+
+    def test_results_are_recorded_once(self):
+        first, second = Match.objects.filter(league=self.league).order_by('match_round')
+        batch = [self.result(first, 90, 80, box=True), self.result(second, 75, 70)]
+        with self.captureOnCommitCallbacks(execute=True):
+            stored = results.record_results(batch)
+        self.assertEqual(stored, batch)
+        # Replaying the same games changes nothing.
+        self.assertEqual(results.record_results(batch), [])
+
+        first.refresh_from_db()
+        self.assertEqual((first.completed, first.home_team_score, first.away_team_score), (True, 90, 80))
+        self.assertIsNone(first.possession_team_id)
+        stats = {row.team_id: row for row in TeamSeasonStats.objects.filter(league=self.league, season=1)}
+        # Each team won one of the two games; home and away swap between the legs.
+        for team_id, scored, conceded in ((first.home_team_id, 90 + 70, 80 + 75),
+                                          (first.away_team_id, 80 + 75, 90 + 70)):
+            row = stats[team_id]
+            self.assertEqual((row.games_played, row.wins, row.losses, row.points_for, row.points_against),
+                             (2, 1, 1, scored, conceded))
+
+        lines = PlayerSeasonStats.objects.filter(league=self.league, season=1)
+        self.assertEqual(lines.count(), 2)
+        for line in lines:
+            self.assertEqual((line.games_played, line.minutes, line.rebounds), (1, 40, 7))
+        self.assertEqual(sorted(lines.values_list('points', flat=True)), [20, 21])
+
+    def test_results_after_a_rollover(self):
+        # A forced rollover leaves the first season's games to be recorded
+        # along with the next season's, in the same batch.
+        seasons.rollover_season(seed=1, force=True)
+        schedule.create_schedules([self.league.id], seed=1, start=timezone.now())
+        old = Match.objects.filter(league=self.league, season=1).order_by('match_round').first()
+        new = Match.objects.filter(league=self.league, season=2, home_team=old.home_team_id).first()
+        results.record_results([self.result(old, 90, 80), self.result(new, 70, 75)])
+        stats = {row.season: row for row in TeamSeasonStats.objects.filter(team=old.home_team_id)}
+        self.assertEqual((stats[1].games_played, stats[1].wins, stats[1].points_for), (1, 1, 90))
+        self.assertEqual((stats[2].games_played, stats[2].wins, stats[2].points_for), (1, 0, 70))
+
+    def test_lines_add_up_across_games(self):
+        player = Player.objects.filter(team=self.home).first()
+        line = [0] * len(simulation.BOX_FIELDS)
+        line[simulation.BOX_INDEX['points']] = 10
+        results.upsert_player_lines(self.league.id, 1, [(player.id, self.home.id, 1, line)])
+        results.upsert_player_lines(self.league.id, 1, [(player.id, self.home.id, 1, line)])
+        row = PlayerSeasonStats.objects.get(player=player, league=self.league, season=1)
+        self.assertEqual((row.games_played, row.points), (2, 20))
+
+
+class TransferMarketPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Market League', current_season_year=1)
+        cls.user = User.objects.create_user('manager', password='secret')
+        cls.team = make_team(cls.league, 'Managed', user=cls.user)
+        # Ratings repeat, so pages have to break ties on the id.
+        Player.objects.bulk_create([
+            Player(first_name='Free', last_name=str(i), age=20 + i % 10, position_primary='SF',
+                   height=2.0, weight=95, rating=60 + i % 4)
+            for i in range(23)
+        ])
+        Player.objects.create(first_name='Own', last_name='Listed', age=25, position_primary='PG', height=1.9,
+                              weight=90, team=cls.team, is_on_transfer_list=True)
+
+    def setUp(self):
+        caches[responsecache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, path):
+        ids = []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page['results']), 5)
+            ids += [player['id'] for player in page['results']]
+            path = page['next']
+        return ids
+
+    def test_pages_cover_the_market_once(self):
+        expected = list(Player.objects.filter(team__isnull=True).order_by('-rating', '-id')
+                        .values_list('id', flat=True))
+        self.assertEqual(self.walk('/api/players/transfer-market/?limit=5'), expected)
+
+        expected = list(Player.objects.filter(team__isnull=True, rating__gte=62).order_by('-rating', '-id')
+                        .values_list('id', flat=True))
+        self.assertEqual(self.walk('/api/players/transfer-market/?limit=5&min_rating=62'), expected)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/players/transfer-market/?cursor=nonsense').status_code, 404)
+        self.assertEqual(self.client.get('/api/players/transfer-market/?min_age=old').status_code, 400)
+        self.assertEqual(self.client.get('/api/players/transfer-market/?position=XX').status_code, 400)
+
+
+class ProjectionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Projection League', current_season_year=1)
+        cls.teams = [make_team(cls.league, f'Team {i}') for i in range(4)]
+        for team in cls.teams:
+            make_players(team, 8)
+        # The first team is much stronger than the rest.
+        Player.objects.filter(team=cls.teams[0]).update(**{name: 95 for name in Player.SKILL_FIELDS})
+        schedule.create_schedules([cls.league.id], seed=1, start=timezone.now())
+
+    def setUp(self):
+        caches['default'].clear()
+        snapshot.invalidate()
+
+    def test_projection(self):
+        projection = projections.project_league(self.league.id, simulations=2000, seed=3)
+        self.assertEqual((projection['simulations'], projection['remaining_matches']), (2000, 12))
+        self.assertEqual(projection, projections.project_league(self.league.id, simulations=2000, seed=3))
+        teams = projection['teams']
+        self.assertEqual(teams[0]['team_id'], self.teams[0].id)
+        self.assertGreater(teams[0]['position_probabilities'][0], 0.5)
+        probabilities = np.array([team['position_probabilities'] for team in teams])
+        # Every team finishes somewhere and every position is taken by someone.
+        np.testing.assert_allclose(probabilities.sum(axis=0), 1, atol=1e-3)
+        np.testing.assert_allclose(probabilities.sum(axis=1), 1, atol=1e-3)
+        self.assertAlmostEqual(sum(team['projected_wins'] for team in teams), 12, places=1)
+
+    def test_only_the_current_season_is_projected(self):
+        League.objects.filter(id=self.league.id).update(current_season_year=2)
+        for team in self.teams:
+            TeamSeasonStats.objects.create(team=team, league=self.league, season=2)
+        projection = projections.league_projection(self.league.id, simulations=1000, seed=3)
+        self.assertEqual((projection['season'], projection['remaining_matches']), (2, 0))
+        with self.assertNumQueries(1):  # the cache key
+            self.assertEqual(projections.league_projection(self.league.id, simulations=1000), projection)
+
+    def test_endpoint(self):
+        response = self.client.get(f'/api/leagues/{self.league.id}/projections/?simulations=10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['simulations'], 1000)
+        self.assertEqual(self.client.get('/api/leagues/999999/projections/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/leagues/{self.league.id}/projections/?simulations=x').status_code,
+                         400)
+
+
+class DailyTickTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Tick League', current_season_year=1)
+        cls.team = make_team(cls.league, 'Team')
+        player = dict(first_name='Player', age=25, position_primary='PG', height=1.9, weight=90)
+        cls.healing = Player.objects.create(last_name='Healing', team=cls.team, is_injured=True,
+                                            injury_duration=1, fitness=50, **player)
+        cls.hurt = Player.objects.create(last_name='Hurt', team=cls.team, is_injured=True,
+                                         injury_duration=5, fitness=50, **player)
+        cls.tired = Player.objects.create(last_name='Tired', team=cls.team, fitness=96, **player)
+        cls.expiring = Player.objects.create(last_name='Expiring', team=cls.team, contract_years=0, fitness=100,
+                                             **player)
+        cls.free_agent = Player.objects.create(last_name='Free', fitness=100, **player)
+        Team.objects.filter(id=cls.team.id).update(go_to_guy=cls.expiring)
+
+    def get(self, player):
+        return Player.objects.get(id=player.id)
+
+    def test_tick(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = lifecycle.daily_tick(injuries=False)
+        self.assertEqual((report.healed, report.still_injured, report.recovered, report.injured,
+                          report.contracts_expired), (1, 1, 3, 0, 1))
+        healing, hurt, tired = self.get(self.healing), self.get(self.hurt), self.get(self.tired)
+        self.assertEqual((healing.is_injured, healing.injury_duration, healing.fitness), (False, 0, 58))
+        self.assertEqual((hurt.is_injured, hurt.injury_duration, hurt.fitness), (True, 4, 54))
+        self.assertEqual(tired.fitness, lifecycle.MAX_FITNESS)
+        self.assertIsNone(self.get(self.expiring).team_id)
+        self.assertIsNone(Team.objects.get(id=self.team.id).go_to_guy_id)
+
+    def test_statement_count_does_not_depend_on_the_players(self):
+        # The savepoint and its release, 4 updates and 6 statements for the expiring contract.
+        with self.assertNumQueries(12):
+            lifecycle.daily_tick()
+        for count in (1, 40):
+            make_players(self.team, count)
+            with self.assertNumQueries(8):
+                lifecycle.daily_tick()
+
+    def test_only_rostered_healthy_players_get_hurt(self):
+        # Over enough days an injury is certain.
+        injured = lifecycle.new_injuries(days=1000)
+        self.assertEqual(injured, 2)
+        self.assertTrue(self.get(self.tired).is_injured)
+        self.assertFalse(self.get(self.free_agent).is_injured)
+        self.assertEqual(self.get(self.hurt).injury_duration, 5)
+
+
+class AITransferTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='AI League', current_season_year=1)
+        cls.user = User.objects.create_user('manager', password='secret')
+        cls.managed = make_team(cls.league, 'Managed', user=cls.user)
+        cls.ai_teams = [make_team(cls.league, f'AI {i}') for i in range(3)]
+        player = dict(first_name='Player', age=25, height=1.9, weight=90)
+        # The first AI team has its point guards already.
+        Player.objects.bulk_create([
+            Player(last_name=f'Guard {i}', position_primary='PG', team=cls.ai_teams[0],
+                   role=Player.STARTER if i == 0 else Player.BENCH, **player)
+            for i in range(2)
+        ])
+        Player.objects.bulk_create(
+            [Player(last_name=f'Free {i}', position_primary=position, rating=50 + i, asking_price=10_000 * i,
+                    **player)
+             for i, position in enumerate(aimanager.POSITIONS * 3)]
+            + [Player(last_name='Star', position_primary='C', rating=99, asking_price=900_000, **player),
+               Player(last_name='Injured', position_primary='C', rating=98, asking_price=1, is_injured=True,
+                      **player)]
+        )
+
+    def signings(self, **kwargs):
+        return [(s.team_id, s.player_id, s.price, s.role, s.contract_years)
+                for s in aimanager.run_ai_transfers(**kwargs).signings]
+
+    def test_pass(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = aimanager.run_ai_transfers(seed=4)
+        self.assertEqual((report.teams, report.pool), (3, 16))
+        signings = report.signings
+        self.assertEqual(len({s.player_id for s in signings}), len(signings))
+        for team in self.ai_teams:
+            own = [s for s in signings if s.team_id == team.id]
+            self.assertEqual(len(own), aimanager.MAX_SIGNINGS)
+            self.assertEqual(Team.objects.get(id=team.id).budget, team.budget - sum(s.price for s in own))
+        players = Player.objects.in_bulk([s.player_id for s in signings])
+        budgets = {team.id: team.budget for team in self.ai_teams}
+        for s in signings:
+            player = players[s.player_id]
+            self.assertEqual((player.team_id, player.role, player.contract_years),
+                             (s.team_id, s.role, s.contract_years))
+            self.assertLessEqual(s.price, budgets[s.team_id] * aimanager.MAX_BUDGET_SHARE)
+            self.assertNotIn(player.last_name, ('Star', 'Injured'))
+            if s.team_id == self.ai_teams[0].id:
+                self.assertNotEqual(player.position_primary, 'PG')
+        self.assertFalse(Player.objects.filter(team=self.managed).exists())
+
+    def test_same_seed_same_pass(self):
+        runs = []
+        for _ in range(2):
+            with transaction.atomic():
+                runs.append(self.signings(seed=4, max_signings=3))
+                transaction.set_rollback(True)
+        self.assertEqual(runs[0], runs[1])
+
+
+class WorldGenerationTests(TestCase):
+
+    def world(self):
+        return (list(League.objects.order_by('id').values_list('name', 'level')),
+                list(Team.objects.order_by('id').values_list('name', 'coach_name', 'budget')),
+                list(Player.objects.order_by('id').values_list('first_name', 'last_name', 'age', 'position_primary',
+                                                               'role', *Player.SKILL_FIELDS)))
+
+    def test_world(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = worldgen.generate_world(leagues=2, teams_per_league=4, players_per_team=12, seed=5)
+        self.assertEqual((report.leagues, report.teams, report.players), (2, 8, 96))
+        self.assertEqual(list(League.objects.order_by('level').values_list('name', flat=True)),
+                         ['TopFive Super League', 'TopFive Division 2'])
+        self.assertEqual(TeamSeasonStats.objects.filter(season=1).count(), 8)
+        low, high = worldgen.SKILL_RANGE
+        for team in Team.objects.select_related('go_to_guy', 'defensive_stopper'):
+            roster = list(team.players.order_by('id'))
+            self.assertEqual(len(roster), 12)
+            for role in (Player.STARTER, Player.BENCH):
+                self.assertEqual(sorted(p.position_primary for p in roster if p.role == role),
+                                 sorted(worldgen.POSITIONS))
+            self.assertEqual(sum(p.role == Player.RESERVE for p in roster), 2)
+            for leader in (team.go_to_guy, team.defensive_stopper):
+                self.assertEqual((leader.team_id, leader.role), (team.id, Player.STARTER))
+            for player in roster:
+                self.assertTrue(all(low <= getattr(player, name) <= high for name in Player.SKILL_FIELDS))
+                self.assertGreater(player.rating, 0)
+
+    def test_same_seed_same_world(self):
+        worlds = []
+        for _ in range(2):
+            with transaction.atomic():
+                worldgen.generate_world(leagues=1, teams_per_league=4, players_per_team=11, seed=8)
+                worlds.append(self.world())
+                transaction.set_rollback(True)
+        self.assertEqual(worlds[0], worlds[1])
+
+    def test_free_agents(self):
+        self.assertEqual(worldgen.generate_free_agents(20, seed=1), 20)
+        self.assertEqual(Player.objects.filter(team__isnull=True, contract_years=0).count(), 20)
+
+
+class StoredPlayerValueTests(TestCase):
+
+    def test_sql_and_python_formulas_agree(self):
+        rng = np.random.default_rng(2)
+        players = Player.objects.bulk_create([
+            Player(first_name='Player', last_name=str(i), position_primary='PG', height=1.9, weight=90,
+                   age=int(rng.integers(18, 40)), contract_years=int(rng.integers(0, 6)),
+                   **{name: round(float(rng.uniform(25, 99)), 1) for name in Player.SKILL_FIELDS})
+            for i in range(300)
+        ])
+        expected = {player.id: (player.rating, player.market_value) for player in players}
+        Player.objects.update(rating=0, market_value=0)
+        Player.objects.all().refresh_values()
+        stored = {id_: (rating, value) for id_, rating, value in
+                  Player.objects.values_list('id', 'rating', 'market_value')}
+        self.assertEqual(stored, expected)
+
+    def test_save_keeps_the_values_in_sync(self):
+        player = Player.objects.create(first_name='Player', last_name='Saved', position_primary='PG', height=1.9,
+                                       weight=90, age=25, contract_years=2)
+        player.age = 33
+        player.shooting_3p = 99
+        player.save(update_fields=['age', 'shooting_3p'])
+        stored = Player.objects.values_list('rating', 'market_value').get(id=player.id)
+        player.compute_values()
+        self.assertEqual(stored, (player.rating, player.market_value))
+
+
+class TeamOverallRatingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(name='Rating League', current_season_year=1)
+        cls.team = make_team(cls.league, 'Team')
+        cls.other = make_team(cls.league, 'Other')
+
+    def player(self, skill, team):
+        return Player(first_name='Player', last_name=str(skill), position_primary='PG', height=1.9, weight=90,
+                      age=25, team=team, **{name: skill for name in Player.SKILL_FIELDS})
+
+    def overall(self, team):
+        return Team.objects.values_list('overall_rating', flat=True).get(id=team.id)
+
+    def test_weights(self):
+        self.assertEqual(team_overall_rating([]), 0)
+        self.assertEqual(team_overall_rating([80] * 5), 80)
+        # 60% top five, 30% the next five, 10% the rest.
+        self.assertEqual(team_overall_rating([90] * 5 + [70] * 5 + [40] * 2), 79)
+
+    def test_roster_changes_refresh_the_rating(self):
+        Player.objects.bulk_create([self.player(90, self.team) for _ in range(5)]
+                                   + [self.player(70, self.team) for _ in range(5)])
+        self.assertEqual(self.overall(self.team), 83)
+
+        star = Player.objects.filter(team=self.team, rating=90).first()
+        star.team = self.other
+        star.save()
+        self.assertEqual((self.overall(self.team), self.overall(self.other)), (81, 90))
+
+        Player.objects.filter(team=self.team).update(**{name: 50 for name in Player.SKILL_FIELDS})
+        Player.objects.filter(team=self.team).refresh_values()
+        self.assertEqual(self.overall(self.team), 50)
+
+        star.delete()
+        self.assertEqual(self.overall(self.other), 0)
@@ -0,0 +1,118 @@
+# file: TopFiveBack/transfers.py
+"""
+Transfer purchases as conditional, set-based writes.
+
+A purchase never holds a row lock across a read-modify-write. The player row
+is read once (outside the transaction), then every write re-checks what was
+read in its own ``WHERE`` clause:
+
+* the player moves only if it is still with the team it was read with, still
+  on the market and still at the price that was read;
+* the buyer is debited with ``budget = budget - price`` only if
+  ``budget >= price`` and the squad is not over the limit;
+* the seller (if any) is credited with ``budget = budget + price``.
+
+If any guard matches no row, the transaction is rolled back and the buyer gets
+a ``TransferError``; two buyers racing for the same player can never both win.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Subquery, Value, When
+
+from . import responsecache, snapshot
+from .models import ON_MARKET, Player, Team, player_market_value, refresh_team_ratings
+
+MAX_SQUAD_SIZE = 15
+MIN_CONTRACT_YEARS, MAX_CONTRACT_YEARS = 1, 5
+
+
+class TransferError(Exception):
+    """A purchase that cannot go through; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+@dataclass
+class Purchase:
+    player_id: int
+    buyer_id: int
+    seller_id: int | None
+    price: int
+    new_budget: int
+
+
+def apply_budget_deltas(deltas, batch_size=500):
+    """
+    Adds ``deltas`` ({team_id: amount}, negative for payments) to the teams'
+    budgets with one ``UPDATE ... SET budget = budget + CASE ...`` per batch.
+    """
+    changes = [(team_id, delta) for team_id, delta in deltas.items() if delta]
+    for start in range(0, len(changes), batch_size):
+        batch = changes[start:start + batch_size]
+        Team.objects.filter(id__in=[team_id for team_id, _ in batch]).update(budget=F('budget') + Case(
+            *[When(id=team_id, then=Value(delta)) for team_id, delta in batch],
+            default=Value(0), output_field=IntegerField(),
+        ))
+
+
+def _squad_size(team_id):
+    return Subquery(
+        Player.objects.filter(team_id=team_id).order_by()
+        .values('team_id').annotate(n=Count('id')).values('n')[:1])
+
+
+def sale_price(asking_price, market_value):
+    """A listed player sells at the asking price; everybody else at market value."""
+    return asking_price if asking_price is not None else market_value
+
+
+def buy_player(buyer_id, player_id, contract_years):
+    """Buys ``player_id`` for ``buyer_id`` at its current price (see ``sale_price``)."""
+    if not MIN_CONTRACT_YEARS <= contract_years <= MAX_CONTRACT_YEARS:
+        raise TransferError(f'Contract years must be between {MIN_CONTRACT_YEARS} and {MAX_CONTRACT_YEARS}.')
+    row = (Player.objects.filter(id=player_id)
+           .values('team_id', 'is_on_transfer_list', 'asking_price', 'market_value', 'rating', 'age').first())
+    if row is None:
+        raise TransferError('Player not found.', status=404)
+    seller_id, price = row['team_id'], sale_price(row['asking_price'], row['market_value'])
+    if seller_id == buyer_id:
+        raise TransferError('Cannot buy your own player.')
+    if seller_id is not None and not row['is_on_transfer_list']:
+        raise TransferError('This player is not currently on the transfer list.')
+
+    with transaction.atomic():
+        # The player's market value depends on the contract, so the new value
+        # is written along with the move (rating and age are guarded too).
+        moved = (Player.objects
+                 .filter(ON_MARKET, id=player_id, team_id=seller_id, asking_price=row['asking_price'],
+                         market_value=row['market_value'], rating=row['rating'], age=row['age'])
+                 .update(team_id=buyer_id, is_on_transfer_list=False, asking_price=None,
+                         contract_years=contract_years,
+                         market_value=player_market_value(row['rating'], row['age'], contract_years)))
+        if not moved:
+            raise TransferError('This player is no longer available at this price.', status=409)
+
+        # The squad count already includes the player that just moved in.
+        debited = (Team.objects
+                   .filter(id=buyer_id, budget__gte=price)
+                   .alias(squad=_squad_size(buyer_id)).filter(squad__lte=MAX_SQUAD_SIZE)
+                   .update(budget=F('budget') - price))
+        if not debited:
+            budget = Team.objects.filter(id=buyer_id).values_list('budget', flat=True).first()
+            if budget is None:
+                raise TransferError('Team not found.', status=404)
+            if budget < price:
+                raise TransferError('Your team does not have enough budget to sign this player.')
+            raise TransferError(f'Your squad is full. Max {MAX_SQUAD_SIZE} players allowed.')
+        if seller_id is not None:
+            Team.objects.filter(id=seller_id).update(budget=F('budget') + price)
+
+        refresh_team_ratings({buyer_id, seller_id})
+        transaction.on_commit(snapshot.invalidate)
+        responsecache.invalidate(teams={buyer_id, seller_id}, market=True)
+        new_budget = Team.objects.values_list('budget', flat=True).get(id=buyer_id)
+    return Purchase(player_id, buyer_id, seller_id, price, new_budget)
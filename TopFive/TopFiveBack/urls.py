@@ -12,7 +12,9 @@ from .views import (
     MatchListAll, MatchListByLeague, 
     LeagueStandingsView, TransferMarketListView, BuyPlayerView, SquadView,
 
-    TeamTacticsView,ListPlayerForTransferView, UnlistPlayerFromTransferView, ReleasePlayerView # Import the new view
+    TeamTacticsView,ListPlayerForTransferView, UnlistPlayerFromTransferView, ReleasePlayerView, # Import the new view
+    LeagueProjectionsView, match_live_stream, MatchEventsView, LeagueLeadersView, PlayerBidsView,
+    ResponseCacheStatsView, TeamMatchListView, TeamNextMatchesView, TeamDashboardView, metrics_view,
 
 )
 
@@ -20,18 +22,26 @@ urlpatterns = [
     # Match related URLs
     path('matches/<int:league_id>/', MatchListByLeague.as_view(), name='match-list-by-league'),
     path('matches/', MatchListAll.as_view(), name='match-list-all'),
+    path('matches/<int:match_id>/live/', match_live_stream, name='match-live'),
+    path('matches/<int:match_id>/events/', MatchEventsView.as_view(), name='match-events'),
 
     # League related URLs
     path('leagues/<int:league_id>/standings/', LeagueStandingsView.as_view(), name='league-standings'),
+    path('leagues/<int:league_id>/projections/', LeagueProjectionsView.as_view(), name='league-projections'),
+    path('leagues/<int:league_id>/leaders/', LeagueLeadersView.as_view(), name='league-leaders'),
 
     # Player related URLs
     path('players/transfer-market/', TransferMarketListView.as_view(), name='transfer-market-list'),
     path('players/<int:player_id>/buy/', BuyPlayerView.as_view(), name='buy-player'),
+    path('players/<int:player_id>/bids/', PlayerBidsView.as_view(), name='player-bids'),
 
     # Team related URLs
     path('teams/<int:team_id>/squad/', TeamSquadView.as_view(), name='team-squad-by-id'), # סגל קבוצה ספציפית
     path('team/squad/', SquadView.as_view(), name='team-squad'), # סגל הקבוצה של המשתמש (אם רלוונטי)
-    path('team/matches/<int:team_id>/', MatchListByLeague.as_view(), name='team-matches'), # משחקי קבוצה ספציפית
+    path('team/matches/<int:team_id>/', TeamMatchListView.as_view(), name='team-matches'), # משחקי קבוצה ספציפית
+    path('teams/<int:team_id>/matches/', TeamMatchListView.as_view(), name='team-match-list'),
+    path('teams/<int:team_id>/matches/next/', TeamNextMatchesView.as_view(direction='next'), name='team-next-matches'),
+    path('teams/<int:team_id>/matches/last/', TeamNextMatchesView.as_view(direction='last'), name='team-last-matches'),
 
     # New: Team Standing by ID URL
     # זה הנתיב שפונקציית getTeamStandingById ב-frontend מצפה לו.
@@ -39,10 +49,14 @@ urlpatterns = [
     path('teams/<int:team_id>/standing/', TeamStandingDetailView.as_view(), name='team-standing-detail'),
     path('team/squad/', SquadView.as_view(), name='team-squad'),
     path('team/tactics/', TeamTacticsView.as_view(), name='team-tactics'),
+    path('team/dashboard/', TeamDashboardView.as_view(), name='team-dashboard'),
     path('players/<int:player_id>/list-transfer/', ListPlayerForTransferView.as_view(), name='player-list-transfer'),
     path('players/<int:player_id>/unlist-transfer/', UnlistPlayerFromTransferView.as_view(), name='player-unlist-transfer'),
     path('players/<int:player_id>/release/', ReleasePlayerView.as_view(), name='player-release'),
 
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+    path('metrics', metrics_view, name='metrics'),
+
 ]
 
 
@@ -1,58 +1,292 @@
 # file: TopFiveBack/views.py (UPDATED & CLEANED)
 # In TopFiveBack/views.py
 
-from django.shortcuts import get_object_or_404
-from django.http import Http404 # נדרש עבור 404 בהיעדר אובייקט
-from rest_framework import generics, status
+import secrets
+
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F, Prefetch
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import F, Q
-from .models import Match, TeamSeasonStats, Player, Team
-from .serializers import MatchSerializer, TeamSeasonStatsSerializer, PlayerSerializer, FullPlayerSerializer
-from rest_framework.views import APIView
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 
-from .models import Match, TeamSeasonStats, Player, Team 
+from . import dashboard, eventstore, metrics, orderbook, responsecache, snapshot, transfers
+from .live import broker
+from .models import League, Match, Player, PlayerSeasonStats, Team, TeamSeasonStats, TransferBid, team_matches
+from .pagination import KeysetPagination
+from .projections import DEFAULT_SIMULATIONS, MAX_SIMULATIONS, league_projection
+from .responsecache import CachedResponseMixin
 from .serializers import (
-    MatchSerializer, TeamSeasonStatsSerializer, FullPlayerSerializer,
-    TeamTacticsSerializer, PlayerRotationUpdateSerializer
+    FullPlayerSerializer, MatchSerializer, PlayerRotationUpdateSerializer, PlayerSeasonStatsSerializer,
+    TeamSeasonStatsSerializer, TeamTacticsSerializer, TransferBidSerializer,
 )
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+
+# MatchSerializer shows the league and team names.
+MATCH_RELATED = ('league', 'home_team', 'away_team')
+
+
+def team_league_scope(team_id):
+    """Cache scope of a team's league; 404 when there is no such team."""
+    league_id = responsecache.team_league(team_id)
+    if league_id is None:
+        raise Http404("Team not found.")
+    return responsecache.league(league_id)
+
+
+# List views declare ``query_budget``: the most queries one uncached request
+# runs, whatever the number of rows. test_query_budgets.py enforces it.
+
 
 # --- Existing Views ---
-class MatchListByLeague(generics.ListAPIView):
+class MatchListByLeague(CachedResponseMixin, generics.ListAPIView):
     serializer_class = MatchSerializer
+    query_budget = 1
+    def cache_scopes(self):
+        return (responsecache.league(self.kwargs.get('league_id')),)
+
     def get_queryset(self):
         league_id = self.kwargs.get('league_id')
         # סדר לפי תאריך משחק (וסדר עולה)
-        return Match.objects.filter(league_id=league_id).order_by('match_date')
+        return Match.objects.filter(league_id=league_id).select_related(*MATCH_RELATED).order_by('match_date')
 
-class MatchListAll(generics.ListAPIView):
+class MatchListAll(CachedResponseMixin, generics.ListAPIView):
     serializer_class = MatchSerializer
+    query_budget = 1
+    def cache_scopes(self):
+        return (responsecache.MATCHES,)
+
     def get_queryset(self):
         # סדר לפי תאריך משחק (וסדר עולה)
-        return Match.objects.all().order_by('match_date')
+        return Match.objects.select_related(*MATCH_RELATED).order_by('match_date')
+
+
+class TeamMatchListView(CachedResponseMixin, generics.ListAPIView):
+    """A team's fixtures, home and away, in date order."""
+    serializer_class = MatchSerializer
+    query_budget = 2
+
+    def cache_scopes(self):
+        return (team_league_scope(self.kwargs['team_id']),)
+
+    def get_queryset(self):
+        return team_matches(self.kwargs['team_id']).select_related(*MATCH_RELATED).order_by('match_date', 'id')
+
+
+class TeamNextMatchesView(CachedResponseMixin, generics.ListAPIView):
+    """
+    A team's next uncompleted matches, soonest first (``direction='next'``),
+    or its last completed ones, latest first (``direction='last'``).
+    ``?limit=`` defaults to 1 and 5 respectively.
+    """
+    serializer_class = MatchSerializer
+    query_budget = 2
+    direction = 'next'
+    DEFAULT_LIMITS = {'next': 1, 'last': 5}
+    MAX_LIMIT = 50
+
+    def cache_scopes(self):
+        return (team_league_scope(self.kwargs['team_id']),)
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.DEFAULT_LIMITS[self.direction]))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        limit = min(max(limit, 1), self.MAX_LIMIT)
+        matches = team_matches(self.kwargs['team_id']).select_related(*MATCH_RELATED)
+        if self.direction == 'next':
+            return matches.filter(completed=False).order_by('match_date', 'id')[:limit]
+        return matches.filter(completed=True).order_by('-match_date', '-id')[:limit]
 
-class LeagueStandingsView(generics.ListAPIView):
+
+async def match_live_stream(request, match_id):
+    """
+    Server-Sent Events stream of a match in progress: 'state', 'play' and a
+    closing 'final' event. Needs the ASGI server (see TopFive/asgi.py).
+    Reconnecting clients resume through the Last-Event-ID header, or
+    ?from=<frame id> to start at a given frame.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    start = request.GET.get('from', '0')
+    try:
+        start = int(last_event_id) + 1 if last_event_id.isdigit() else int(start)
+    except ValueError:
+        start = 0
+    try:
+        frames = await broker.open(match_id, start)
+    except Match.DoesNotExist:
+        raise Http404("Match not found.")
+    response = StreamingHttpResponse(frames, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+class MatchEventsView(CachedResponseMixin, APIView):
+    """
+    Play-by-play of a finished match from the event store, sliced straight out
+    of the memory-mapped file: ?from=<seq>&limit=<n> (limit defaults to and is
+    capped at MAX_LIMIT). A recorded game never changes, so only world-wide
+    changes invalidate it.
+    """
+    permission_classes = []
+    MAX_LIMIT = 1000
+
+    def get(self, request, match_id):
+        return self.cached_response(request, lambda: self.events_response(request, match_id))
+
+    def events_response(self, request, match_id):
+        match = get_object_or_404(Match.objects.only('id', 'league_id', 'season', 'home_team_id', 'away_team_id'),
+                                  id=match_id)
+        try:
+            start = max(int(request.query_params.get('from', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', self.MAX_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({'detail': "'from' and 'limit' must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        events = eventstore.read_events(match.id, match.league_id, match.season, start, limit)
+        if events is None:
+            return Response({'detail': 'No play-by-play recorded for this match.'}, status=status.HTTP_404_NOT_FOUND)
+        team_ids = (match.home_team_id, match.away_team_id)
+        return Response({
+            'match_id': match.id,
+            'from': start,
+            'next': start + len(events) if len(events) == limit else None,
+            'events': [eventstore.event_payload(event, team_ids) for event in events.tolist()],
+        })
+
+
+class LeagueStandingsView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = TeamSeasonStatsSerializer
+    query_budget = 1
+    def cache_scopes(self):
+        return (responsecache.league(self.kwargs['league_id']),)
+
     def get_queryset(self):
         league_id = self.kwargs['league_id']
         # **תיקון: מיון לפי שדות קיימים (ניצחונות ונקודות זכות) במקום 'rank'**
         # זה עקבי עם הגדרות ה-Meta Class במודל TeamSeasonStats
-        return TeamSeasonStats.objects.filter(league=league_id).order_by('-wins', '-points_for')
+        return (TeamSeasonStats.objects.filter(league=league_id, season=F('league__current_season_year'))
+                .select_related('team').order_by('-wins', '-points_for'))
+
+class ResponseCacheStatsView(APIView):
+    """Hit/miss counters of the response cache (staff only). DELETE resets them."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(responsecache.stats())
+
+    def delete(self, request):
+        responsecache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def metrics_view(request):
+    """
+    Request and response-cache metrics of this process in the Prometheus text
+    format. Scrapers send settings.TOPFIVE_METRICS_TOKEN as
+    ``Authorization: Bearer <token>``; staff logged in to the admin can read
+    it too. Nobody else can, unless settings.TOPFIVE_METRICS_PUBLIC is set.
+    """
+    if not getattr(settings, 'TOPFIVE_METRICS_PUBLIC', False):
+        token = getattr(settings, 'TOPFIVE_METRICS_TOKEN', None)
+        sent = request.headers.get('Authorization', '').encode()
+        scraper = bool(token) and secrets.compare_digest(sent, f'Bearer {token}'.encode())
+        if not scraper and not request.user.is_staff:
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+class LeagueProjectionsView(APIView):
+    """
+    Monte Carlo projection of the rest of the league's season: for every team,
+    the probability of finishing in each position. Cached until the next match
+    in the league completes. Optional ?simulations=<n> (1,000-50,000).
+    """
+    def get(self, request, league_id):
+        try:
+            simulations = int(request.query_params.get('simulations', DEFAULT_SIMULATIONS))
+        except ValueError:
+            return Response({'detail': 'simulations must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        simulations = max(1000, min(simulations, MAX_SIMULATIONS))
+        try:
+            projection = league_projection(league_id, simulations=simulations)
+        except League.DoesNotExist:
+            return Response({'detail': 'League not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(projection, status=status.HTTP_200_OK)
+
+
+class LeagueLeadersView(CachedResponseMixin, generics.ListAPIView):
+    """
+    Season leaders of a league, read straight from PlayerSeasonStats:
+    ?stat=<one of LEADER_STATS>&per_game=1&season=<year>&limit=<n>.
+    """
+    serializer_class = PlayerSeasonStatsSerializer
+    query_budget = 2
+    permission_classes = []
+    LEADER_STATS = ('points', 'rebounds', 'assists', 'steals', 'blocks', 'tpm', 'minutes')
+    MAX_LIMIT = 50
+
+    def cache_scopes(self):
+        return (responsecache.league(self.kwargs['league_id']),)
+
+    def get_queryset(self):
+        league = get_object_or_404(League, id=self.kwargs['league_id'])
+        params = self.request.query_params
+        stat = params.get('stat', 'points')
+        if stat not in self.LEADER_STATS:
+            stat = 'points'
+        try:
+            season = int(params.get('season', league.current_season_year))
+            limit = min(max(int(params.get('limit', 10)), 1), self.MAX_LIMIT)
+        except ValueError:
+            season, limit = league.current_season_year, 10
+
+        rows = (PlayerSeasonStats.objects
+                .filter(league=league, season=season, games_played__gt=0)
+                .select_related('player'))
+        if params.get('per_game') in ('1', 'true'):
+            rows = rows.annotate(average=F(stat) * 1.0 / F('games_played')).order_by('-average', 'player_id')
+        else:
+            rows = rows.order_by(f'-{stat}', 'player_id')
+        return rows[:limit]
 
-class TransferMarketListView(generics.ListAPIView):
+
+class TransferMarketListView(CachedResponseMixin, generics.ListAPIView):
     """
-    Returns all players who are either free agents (team is null)
-    or have been put on the transfer list by their current team.
-    It excludes players from the user's own team.
-    Players are ordered by their calculated rating in descending order.
+    Returns the players who are either free agents (team is null) or have been
+    put on the transfer list by their current team, excluding the user's own
+    players, best rated first.
+
+    Keyset-paginated on (rating, id): the response is ``{next, results}`` and
+    ``next`` carries the cursor of the following page. Optional filters:
+    ``position``, ``min_age``, ``max_age``, ``min_rating`` and ``max_price``
+    (the asking price, or the market value when the player has none). Each is
+    backed by a partial index over the on-market players.
+
+    Pages are cached per team until the market changes.
     """
     serializer_class = FullPlayerSerializer
+    query_budget = 2
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    INT_FILTERS = {
+        'min_age': 'age__gte',
+        'max_age': 'age__lte',
+        'min_rating': 'rating__gte',
+        'max_price': 'price__lte',
+    }
+
+    def cache_scopes(self):
+        return (responsecache.MARKET,)
+
+    def cache_vary(self):
+        # The user's own players are left out of the market.
+        team = getattr(self.request.user, 'team', None)
+        return team.id if team else None
 
     def get_queryset(self):
         user = self.request.user
@@ -61,115 +295,157 @@ class TransferMarketListView(generics.ListAPIView):
             # אם למשתמש אין קבוצה, אל תחזיר שחקנים לשוק ההעברות שלו
             return Player.objects.none()
 
-        user_team = user.team
+        players = Player.objects.on_market().exclude(team=user.team).select_related('team')
+        params = self.request.query_params
+        position = params.get('position')
+        if position:
+            if position not in dict(Player.POSITION_CHOICES):
+                raise ValidationError({'position': f"Unknown position '{position}'."})
+            players = players.filter(position_primary=position)
 
-        return Player.objects.filter(
-            Q(team__isnull=True) | Q(is_on_transfer_list=True)
-        ).exclude(
-            team=user_team
-        ).annotate(
-            # **תיקון: שינוי שם מ-'rating' ל-'calculated_rating' כדי למנוע התנגשות עם ה-@property**
-            calculated_rating=(
-                (F('shooting_2p') + F('shooting_3p') + F('free_throws') +
-                 F('rebound_def') + F('rebound_off') + F('passing') +
-                 F('blocking') + F('defense') + F('game_iq') +
-                 F('speed') + F('jumping') + F('strength') + F('stamina')) / 13.0
-            )
-        ).order_by('-calculated_rating') # **תיקון: מיון לפי השם החדש**
-    serializer_class = FullPlayerSerializer
-    permission_classes = [IsAuthenticated] 
-    def get_queryset(self):
-        user_team = self.request.user.team
-        # [FIXED] Use annotate to calculate the rating on the database side before ordering.
-        # The 'rating' property from the model cannot be used in database queries.
-        return Player.objects.filter(
-            Q(team__isnull=True) | Q(is_on_transfer_list=True)
-        ).exclude(
-            team=user_team 
-        ).annotate(
-            calculated_rating=(
-                (F('shooting_2p') + F('shooting_3p') + F('free_throws') + 
-                 F('rebound_def') + F('rebound_off') + F('passing') + 
-                 F('blocking') + F('defense') + F('game_iq') + 
-                 F('speed') + F('jumping') + F('strength') + F('stamina')) / 13.0
-            )
-        ).order_by('-calculated_rating')
+        lookups = {}
+        for param, lookup in self.INT_FILTERS.items():
+            if params.get(param) in (None, ''):
+                continue
+            try:
+                lookups[lookup] = int(params[param])
+            except ValueError:
+                raise ValidationError({param: 'Must be an integer.'})
+        if 'price__lte' in lookups:
+            players = players.alias(price=Coalesce('asking_price', 'market_value'))
+        return players.filter(**lookups)
 
 
 
 class BuyPlayerView(APIView):
+    """
+    Signs a player at its asking price when it is listed, at its market value
+    otherwise (``transfers.sale_price``). The purchase is a set of conditional
+    updates (see ``transfers.buy_player``), so concurrent buyers can't both
+    get the player and a budget can't go negative.
+    """
     permission_classes = [IsAuthenticated]
     def post(self, request, player_id):
-
-        # ... Logic remains the same, assuming it's correct from previous steps
-
         # ודא שהמשתמש מאומת ומשויך לקבוצה
         if not hasattr(request.user, 'team') or request.user.team is None:
             return Response({'detail': 'User is not assigned to a team.'}, status=status.HTTP_400_BAD_REQUEST)
 
         buying_team = request.user.team
 
-        try:
-            player_to_buy = get_object_or_404(Player, id=player_id)
-        except Http404:
-            return Response({'detail': 'Player not found.'}, status=status.HTTP_404_NOT_FOUND)
-
         contract_years = request.data.get('contract_years')
         if not contract_years:
             return Response({'detail': 'Contract years not provided.'}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
             contract_years = int(contract_years)
-            if not (1 <= contract_years <= 5):
-                return Response({'detail': 'Contract years must be between 1 and 5.'}, status=status.HTTP_400_BAD_REQUEST)
         except ValueError:
             return Response({'detail': 'Invalid contract years format.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # בדיקות לוגיות לפני הרכישה
-        if player_to_buy.team == buying_team:
-            return Response({'detail': 'Cannot buy your own player.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            purchase = transfers.buy_player(buying_team.id, player_id, contract_years)
+        except transfers.TransferError as e:
+            return Response({'detail': e.detail}, status=e.status)
+
+        player = Player.objects.only('first_name', 'last_name').get(id=purchase.player_id)
+        return Response({
+            'detail': f'Success! {player.first_name} {player.last_name} is now part of {buying_team.name}.',
+            'new_budget': purchase.new_budget,
+            'player_id': purchase.player_id,
+        }, status=status.HTTP_200_OK)
+
 
-        MAX_SQUAD_SIZE = 15 # הגדר את גודל הסגל המקסימלי
-        if buying_team.players.count() >= MAX_SQUAD_SIZE:
-            return Response({'detail': f'Your squad is full. Max {MAX_SQUAD_SIZE} players allowed.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if player_to_buy.team and not player_to_buy.is_on_transfer_list:
-            return Response({"detail": "This player is not currently on the transfer list."}, status=status.HTTP_400_BAD_REQUEST)
+class PlayerBidsView(CachedResponseMixin, APIView):
+    """
+    The order book of one player on the market.
+    GET: the best open bids (``?depth=``, default 10) and the user's own bid.
+    POST ``{price, contract_years}``: places or replaces the user's bid.
+    DELETE: cancels the user's bid.
+    Bids are matched in batch by the ``match_bids`` command, not here.
+    """
+    permission_classes = [IsAuthenticated]
+    DEFAULT_DEPTH, MAX_DEPTH = 10, 50
+
+    def cache_scopes(self):
+        return (responsecache.player_bids(self.kwargs['player_id']),)
 
-        if buying_team.budget < player_to_buy.market_value:
-            return Response({'detail': 'Your team does not have enough budget to sign this player.'}, status=status.HTTP_400_BAD_REQUEST)
+    def cache_vary(self):
+        # ``is_mine`` and ``my_bid`` depend on the user.
+        return self.request.user.pk
 
-        selling_team = player_to_buy.team # זה יהיה null אם השחקן הוא Free Agent
+    def get(self, request, player_id):
+        return self.cached_response(request, lambda: self.book_response(request, player_id))
 
+    def book_response(self, request, player_id):
         try:
-            with transaction.atomic(): # שימוש בטרנזקציה אטומית כדי להבטיח עקביות נתונים
-                # 1. העברת הכסף
-                buying_team.budget -= player_to_buy.market_value
-                buying_team.save()
-
-                if selling_team: # אם השחקן נמכר מקבוצה אחרת, הוסף כסף לקבוצה המוכרת
-                    selling_team.budget += player_to_buy.market_value
-                    selling_team.save()
-
-                # 2. העברת השחקן ועדכון שנות חוזה
-                player_to_buy.team = buying_team
-                player_to_buy.is_on_transfer_list = False # השחקן יורד מרשימת ההעברות
-                player_to_buy.contract_years = contract_years # עדכן את שנות החוזה
-                player_to_buy.save()
-
-                return Response({
-                    'detail': f'Success! {player_to_buy.first_name} {player_to_buy.last_name} is now part of {buying_team.name}.',
-                    'new_budget': buying_team.budget,
-                    'player_id': player_to_buy.id,
-                }, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({'detail': f'Transaction failed due to an unexpected error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            depth = min(max(int(request.query_params.get('depth', self.DEFAULT_DEPTH)), 1), self.MAX_DEPTH)
+        except ValueError:
+            depth = self.DEFAULT_DEPTH
+        book = TransferBid.objects.filter(player_id=player_id, status=TransferBid.OPEN)
+        team = getattr(request.user, 'team', None)
+        own = book.filter(team=team).first() if team else None
+        return Response({
+            'player_id': player_id,
+            'open_bids': book.count(),
+            'bids': [
+                {'price': price, 'created_at': created_at, 'is_mine': team is not None and team_id == team.id}
+                for price, created_at, team_id in
+                book.order_by('-price', 'created_at', 'id').values_list('price', 'created_at', 'team_id')[:depth]
+            ],
+            'my_bid': TransferBidSerializer(own).data if own else None,
+        })
+
+    def post(self, request, player_id):
+        if not hasattr(request.user, 'team') or request.user.team is None:
+            return Response({'detail': 'User is not assigned to a team.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            price = int(request.data.get('price'))
+            contract_years = int(request.data.get('contract_years', 1))
+        except (TypeError, ValueError):
+            return Response({'detail': "'price' and 'contract_years' must be integers."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            bid = orderbook.place_bid(request.user.team, player_id, price, contract_years)
+        except transfers.TransferError as e:
+            return Response({'detail': e.detail}, status=e.status)
+        return Response(TransferBidSerializer(bid).data, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, player_id):
+        if not hasattr(request.user, 'team') or request.user.team is None:
+            return Response({'detail': 'User is not assigned to a team.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not orderbook.cancel_bid(request.user.team, player_id):
+            return Response({'detail': 'You have no open bid on this player.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 
+def with_season_stats(players, team):
+    """
+    Prefetches each player's stat line for the team's current season (one
+    extra query for the whole squad) as ``current_season_stats``.
+    """
+    season = League.objects.values_list('current_season_year', flat=True).get(id=team.league_id)
+    return players.prefetch_related(Prefetch(
+        'season_stats',
+        queryset=PlayerSeasonStats.objects.filter(league_id=team.league_id, season=season),
+        to_attr='current_season_stats',
+    ))
 
 
-class SquadView(generics.ListAPIView):
+class SquadView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = FullPlayerSerializer
+    query_budget = 4
     permission_classes = [IsAuthenticated]
+
+    def cache_scopes(self):
+        team = getattr(self.request.user, 'team', None)
+        if team is None:
+            return ()
+        return (responsecache.team(team.id), responsecache.league(team.league_id))
+
+    def cache_vary(self):
+        team = getattr(self.request.user, 'team', None)
+        return team.id if team else None
+
     def get_queryset(self):
         user = self.request.user
         # ודא שלמשתמש יש קבוצה משויכת
@@ -177,65 +453,56 @@ class SquadView(generics.ListAPIView):
             return Player.objects.none() # החזר QuerySet ריק אם אין קבוצה
 
         user_team = user.team
-        # **תיקון: שינוי שם מ-'rating' ל-'calculated_rating' כדי למנוע התנגשות עם ה-@property**
-        return Player.objects.filter(team=user_team).annotate(
-            calculated_rating=(
-                (F('shooting_2p') + F('shooting_3p') + F('free_throws') +
-                 F('rebound_def') + F('rebound_off') + F('passing') +
-                 F('blocking') + F('defense') + F('game_iq') +
-                 F('speed') + F('jumping') + F('strength') + F('stamina')) / 13.0
-            )
-        )
-
-class TeamSquadView(generics.ListAPIView): # שינוי ל-ListAPIView
+        return with_season_stats(Player.objects.filter(team=user_team).select_related('team'), user_team)
+
+class TeamSquadView(CachedResponseMixin, generics.ListAPIView): # שינוי ל-ListAPIView
     """
     API endpoint to retrieve the squad (roster) for a specific team by its ID.
-    Requires authentication.
+    Requires authentication. Cached until the squad changes or the team's
+    league records results (the players' season stats are included).
     """
     serializer_class = FullPlayerSerializer
+    query_budget = 5
     permission_classes = [IsAuthenticated]
 
+    def cache_scopes(self):
+        team_id = self.kwargs['team_id']
+        return (responsecache.team(team_id), team_league_scope(team_id))
+
     def get_queryset(self):
         team_id = self.kwargs['team_id']
         # ודא שהקבוצה אכן קיימת
         team = get_object_or_404(Team, id=team_id)
 
         # שלוף את כל השחקנים המשויכים לקבוצה זו
-        # וחשב את הדירוג תוך כדי
-        squad_players = Player.objects.filter(team=team).annotate(
-            # **תיקון: שינוי שם מ-'rating' ל-'calculated_rating' כדי למנוע התנגשות עם ה-@property**
-            calculated_rating=(
-                (F('shooting_2p') + F('shooting_3p') + F('free_throws') +
-                 F('rebound_def') + F('rebound_off') + F('passing') +
-                 F('blocking') + F('defense') + F('game_iq') +
-                 F('speed') + F('jumping') + F('strength') + F('stamina')) / 13.0
-            )
-        )
-        return squad_players
+        return with_season_stats(Player.objects.filter(team=team).select_related('team'), team)
 
 
 ## ה-View החדש והחשוב: `TeamStandingDetailView`
 
-class TeamStandingDetailView(generics.RetrieveAPIView):
+class TeamStandingDetailView(CachedResponseMixin, generics.RetrieveAPIView):
     """
     API endpoint to retrieve the season statistics (TeamSeasonStats) for a specific team.
     This view returns a single TeamSeasonStats object for the given team_id.
     Requires authentication.
     """
-    queryset = TeamSeasonStats.objects.all()
+    queryset = TeamSeasonStats.objects.select_related('team')
     serializer_class = TeamSeasonStatsSerializer
+    query_budget = 2
     permission_classes = [IsAuthenticated]
     lookup_field = 'team_id' # השדה ב-URL שישמש לחיפוש
 
+    def cache_scopes(self):
+        return (team_league_scope(self.kwargs[self.lookup_field]),)
+
     def get_object(self):
         # ה-team_id מגיע מתוך ה-URL דרך kwargs
         team_id = self.kwargs[self.lookup_field] # עדיף להשתמש ב-self.lookup_field
 
         try:
-            # נסה למצוא את ה-TeamSeasonStats עבור הקבוצה הספציפית
-            # אנו מניחים שיש רק אובייקט אחד של TeamSeasonStats לכל קבוצה לעונה נתונה.
-            # אם יש מספר אובייקטים, תצטרך להוסיף לוגיקה לבחור את הנכון (למשל, העונה הנוכחית).
-            obj = self.get_queryset().get(team__id=team_id)
+            # The team has a row per season (the rollover adds the next one):
+            # the standing is the one of its league's current season.
+            obj = self.get_queryset().get(team__id=team_id, season=F('league__current_season_year'))
             return obj
         except TeamSeasonStats.DoesNotExist:
             # אם האובייקט לא נמצא, Django מעלה DoesNotExist, ואנו ממירים זאת ל-Http404
@@ -245,9 +512,50 @@ class TeamStandingDetailView(generics.RetrieveAPIView):
         except Team.DoesNotExist:
             return Player.objects.none()
 
-class TeamTacticsView(APIView):
+
+class TeamDashboardView(CachedResponseMixin, APIView):
+    """
+    Everything the dashboard screen shows, in one response (see
+    ``dashboard.team_dashboard``). Cached until the team or its league changes.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 7
+
+    def get_team(self):
+        if not hasattr(self, '_team'):
+            self._team = Team.objects.select_related('league').filter(user=self.request.user).first()
+        return self._team
+
+    def cache_scopes(self):
+        team = self.get_team()
+        return (responsecache.team(team.id), responsecache.league(team.league_id)) if team else ()
+
+    def cache_vary(self):
+        team = self.get_team()
+        return team.id if team else None
+
+    def get(self, request):
+        if self.get_team() is None:
+            return Response({'detail': 'User is not assigned to a team.'}, status=status.HTTP_404_NOT_FOUND)
+        return self.cached_response(request, lambda: Response(dashboard.team_dashboard(self.get_team())))
+
+
+class TeamTacticsView(CachedResponseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def cache_scopes(self):
+        team = getattr(self.request.user, 'team', None)
+        return (responsecache.team(team.id),) if team else ()
+
+    def cache_vary(self):
+        team = getattr(self.request.user, 'team', None)
+        return team.id if team else None
+
     def get(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: self.tactics_response(request))
+
+    def tactics_response(self, request):
         try:
             team = request.user.team
             serializer = TeamTacticsSerializer(team)
@@ -276,7 +584,9 @@ class TeamTacticsView(APIView):
                 team.defensive_aggressiveness = data.get('defensiveAggressiveness', team.defensive_aggressiveness)
                 team.go_to_guy_id = data.get('goToGuy')
                 team.defensive_stopper_id = data.get('defensiveStopper')
-                team.save()
+                # Only the tactics: a full save would write back a stale budget.
+                team.save(update_fields=['pace', 'offensive_focus_slider', 'defensive_aggressiveness',
+                                         'go_to_guy', 'defensive_stopper'])
 
                 validated_players = player_serializer.validated_data
                 player_ids = [p['id'] for p in validated_players]
@@ -292,6 +602,8 @@ class TeamTacticsView(APIView):
                         player_obj.offensive_role = player_data['offensive_role']
                 
                 Player.objects.bulk_update(players_to_update, ['role', 'position_primary', 'assigned_minutes', 'offensive_role'])
+                transaction.on_commit(snapshot.invalidate)
+                responsecache.invalidate(teams=[team.id])
             return Response({"detail": "Tactics and rotation updated successfully."}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"detail": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -308,6 +620,7 @@ class ListPlayerForTransferView(APIView):
         player.is_on_transfer_list = True
         player.asking_price = price
         player.save()
+        responsecache.invalidate(teams=[team.id], market=True)
         return Response({
             "detail": f"{player.first_name} {player.last_name} is now on the transfer list for ${price:,}.",
             "player": FullPlayerSerializer(player).data
@@ -321,6 +634,7 @@ class UnlistPlayerFromTransferView(APIView):
         player.is_on_transfer_list = False
         player.asking_price = None
         player.save()
+        responsecache.invalidate(teams=[team.id], market=True)
         return Response({
             "detail": f"{player.first_name} {player.last_name} has been removed from the transfer list.",
             "player": FullPlayerSerializer(player).data
@@ -332,19 +646,24 @@ class ReleasePlayerView(APIView):
         team = request.user.team
         player = get_object_or_404(Player, id=player_id, team=team)
         release_cost = int(player.market_value * 0.10)
-        if team.budget < release_cost:
-            return Response({"detail": "Not enough budget to release this player."}, status=status.HTTP_400_BAD_REQUEST)
         with transaction.atomic():
-            team.budget -= release_cost
-            team.save()
+            # Debited only if the budget still covers the cost (see transfers.py).
+            debited = (Team.objects.filter(id=team.id, budget__gte=release_cost)
+                       .update(budget=F('budget') - release_cost))
+            if not debited:
+                return Response({"detail": "Not enough budget to release this player."},
+                                status=status.HTTP_400_BAD_REQUEST)
             player.team = None
             player.contract_years = 0
             player.is_on_transfer_list = False
             player.asking_price = None
-            player.save()
+            player.save(update_fields=['team', 'contract_years', 'is_on_transfer_list', 'asking_price'])
+            transaction.on_commit(snapshot.invalidate)
+            responsecache.invalidate(teams=[team.id], market=True)
+            new_budget = Team.objects.values_list('budget', flat=True).get(id=team.id)
         return Response({
-            "detail": f"{player.first_name} {player.last_name} has been released. Your new budget is ${team.budget:,}.",
-            "new_budget": team.budget,
+            "detail": f"{player.first_name} {player.last_name} has been released. Your new budget is ${new_budget:,}.",
+            "new_budget": new_budget,
             "released_player_id": player.id
         }, status=status.HTTP_200_OK)
 
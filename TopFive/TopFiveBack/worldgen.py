@@ -0,0 +1,249 @@
+# file: TopFiveBack/worldgen.py
+"""
+World generation: leagues, teams, season stats and players, in bulk.
+
+Player attributes are drawn with NumPy for a whole batch at once. Heights and
+weights are uniform within the position's range, and each skill is normal
+around ``SKILL_MEAN`` shifted by the position's ``SKILL_PROFILES`` offset,
+clipped to ``SKILL_RANGE``. Names come from pools drawn once from Faker, so
+Faker is called a few thousand times per run instead of several times per
+player. The same ``seed`` always generates the same world.
+
+Rosters follow one layout: the first five players start at PG, SG, SF, PF
+and C, the next five back them up at the same positions, and anyone beyond
+ten is a reserve at a random position. Each team's go-to guy and defensive
+stopper are picked among its starters.
+
+Rows are written with ``bulk_create`` in batches, in one transaction.
+``Player.objects.bulk_create`` fills in the stored rating and market value,
+and refreshes the teams' overall ratings.
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from faker import Faker
+
+from . import responsecache, snapshot
+from .models import League, Player, Team, TeamSeasonStats
+
+# Rows per INSERT (Django lowers it further if the backend needs it).
+BATCH_SIZE = 1000
+
+POSITIONS = (Player.POINT_GUARD, Player.SHOOTING_GUARD, Player.SMALL_FORWARD,
+             Player.POWER_FORWARD, Player.CENTER)
+# Height (m) and weight (kg) ranges per position.
+BODY_RANGES = {
+    Player.POINT_GUARD: ((1.80, 1.94), (78, 92)),
+    Player.SHOOTING_GUARD: ((1.90, 2.01), (88, 102)),
+    Player.SMALL_FORWARD: ((1.98, 2.06), (98, 110)),
+    Player.POWER_FORWARD: ((2.03, 2.10), (108, 122)),
+    Player.CENTER: ((2.08, 2.20), (115, 130)),
+}
+
+SKILL_MEAN = 78.0
+SKILL_SPREAD = 9.0
+SKILL_RANGE = (60, 99)
+# Offsets from SKILL_MEAN, in Player.SKILL_FIELDS order: shooting_2p,
+# shooting_3p, free_throws, rebound_def, rebound_off, passing, blocking,
+# defense, game_iq, speed, jumping, strength, stamina.
+SKILL_PROFILES = {
+    Player.POINT_GUARD: (0, 5, 5, -8, -10, 10, -10, 2, 5, 8, -2, -8, 3),
+    Player.SHOOTING_GUARD: (4, 8, 6, -5, -7, 2, -8, 2, 0, 5, 0, -4, 2),
+    Player.SMALL_FORWARD: (3, 2, 0, 0, -2, 0, -2, 4, 0, 2, 3, 0, 2),
+    Player.POWER_FORWARD: (2, -4, -2, 6, 6, -3, 4, 2, 0, -3, 2, 6, 0),
+    Player.CENTER: (0, -10, -6, 10, 10, -5, 10, 2, 0, -8, 2, 10, -2),
+}
+SECONDARY_POSITION_CHANCE = 0.3
+AGE_RANGE = (18, 36)
+CONTRACT_RANGE = (1, 4)
+
+BUDGET_RANGE = (25_000_000, 50_000_000)
+NICKNAMES = ('Hawks', 'Lions', 'Eagles', 'Sharks', 'Bulls', 'Rockets', 'Giants',
+             'Blazers', 'Warriors', 'Suns', 'Kings', 'Wizards', 'Spurs', 'Heat')
+HOME_COLORS = ('White', 'Yellow', 'Light Blue')
+AWAY_COLORS = ('Black', 'Dark Blue', 'Red')
+FIRST_NAME_POOL = 1000
+LAST_NAME_POOL = 2000
+
+
+@dataclass
+class WorldReport:
+    leagues: int = 0
+    teams: int = 0
+    players: int = 0
+
+
+class NamePool:
+    """First names, last names and cities drawn once from a seeded Faker."""
+
+    def __init__(self, seed=None):
+        self.fake = Faker()
+        self.fake.seed_instance(seed)
+        self.first_names = np.array([self.fake.first_name() for _ in range(FIRST_NAME_POOL)], dtype=object)
+        self.last_names = np.array([self.fake.last_name() for _ in range(LAST_NAME_POOL)], dtype=object)
+
+    def people(self, rng, count):
+        """``count`` (first name, last name) pairs."""
+        return zip(rng.choice(self.first_names, count), rng.choice(self.last_names, count))
+
+    def cities(self, count):
+        return [self.fake.unique.city() for _ in range(count)]
+
+
+def roster_layout(rng, teams, players_per_team):
+    """Positions and roles of ``teams`` rosters, as (teams, players) arrays."""
+    slots = np.arange(players_per_team)
+    positions = np.broadcast_to(slots % len(POSITIONS), (teams, players_per_team)).copy()
+    reserves = slots >= 2 * len(POSITIONS)
+    positions[:, reserves] = rng.integers(0, len(POSITIONS), (teams, int(reserves.sum())))
+    roles = np.where(slots < len(POSITIONS), Player.STARTER,
+                     np.where(slots < 2 * len(POSITIONS), Player.BENCH, Player.RESERVE))
+    return positions, np.broadcast_to(roles, (teams, players_per_team))
+
+
+def draw_players(rng, names, positions, roles, team_ids, contracts=True):
+    """
+    Unsaved players, one per entry of the flat ``positions`` (indexes into
+    ``POSITIONS``), ``roles`` and ``team_ids`` arrays. Players get no contract
+    when ``contracts`` is false.
+    """
+    count = len(positions)
+    profiles = np.array([SKILL_PROFILES[position] for position in POSITIONS], dtype=float)
+    skills = rng.normal(SKILL_MEAN, SKILL_SPREAD, (count, len(Player.SKILL_FIELDS))) + profiles[positions]
+    skills = np.rint(np.clip(skills, *SKILL_RANGE))
+
+    bounds = np.array([BODY_RANGES[position] for position in POSITIONS])[positions]
+    heights = np.round(rng.uniform(bounds[:, 0, 0], bounds[:, 0, 1]), 2)
+    weights = np.round(rng.uniform(bounds[:, 1, 0], bounds[:, 1, 1]), 1)
+    ages = rng.integers(AGE_RANGE[0], AGE_RANGE[1] + 1, count)
+    contract_years = (rng.integers(CONTRACT_RANGE[0], CONTRACT_RANGE[1] + 1, count) if contracts
+                      else np.zeros(count, dtype=int))
+    # A different position, SECONDARY_POSITION_CHANCE of the time.
+    secondary = (positions + rng.integers(1, len(POSITIONS), count)) % len(POSITIONS)
+    has_secondary = rng.random(count) < SECONDARY_POSITION_CHANCE
+
+    return [
+        Player(
+            first_name=first_name, last_name=last_name, age=int(age),
+            position_primary=POSITIONS[position],
+            position_secondary=POSITIONS[other] if flag else None,
+            team_id=team_id, role=role, height=float(height), weight=float(weight),
+            contract_years=int(years),
+            **dict(zip(Player.SKILL_FIELDS, row.tolist())),
+        )
+        for (first_name, last_name), position, other, flag, team_id, role, height, weight, age, years, row
+        in zip(names.people(rng, count), positions.tolist(), secondary.tolist(), has_secondary.tolist(),
+               team_ids, roles, heights, weights, ages, contract_years, skills)
+    ]
+
+
+def _league_names(count):
+    """``count`` unused (level, name) pairs, continuing after the deepest level."""
+    taken = set(League.objects.values_list('name', flat=True))
+    level = League.objects.aggregate(deepest=Max('level'))['deepest'] or 0
+    names = []
+    while len(names) < count:
+        level += 1
+        name = 'TopFive Super League' if level == 1 else f'TopFive Division {level}'
+        if name not in taken:
+            names.append((level, name))
+    return names
+
+
+def _team_names(rng, names, count):
+    """``count`` unused (city, team name) pairs: shuffled city x nickname combinations."""
+    taken = set(Team.objects.values_list('name', flat=True))
+    picked = []
+    while len(picked) < count:
+        cities = names.cities(math.ceil(2 * (count - len(picked)) / len(NICKNAMES)) + 1)
+        combos = [(city, f'{city} {nickname}') for city in cities for nickname in NICKNAMES]
+        picked += [combos[i] for i in rng.permutation(len(combos)) if combos[i][1] not in taken]
+    return picked[:count]
+
+
+def _create_players(rng, names, team_ids, players_per_team):
+    """Rosters for ``team_ids``, written a batch of whole teams at a time."""
+    teams_per_batch = max(1, BATCH_SIZE // max(players_per_team, 1))
+    for first in range(0, len(team_ids), teams_per_batch):
+        batch = team_ids[first:first + teams_per_batch]
+        positions, roles = roster_layout(rng, len(batch), players_per_team)
+        Player.objects.bulk_create(
+            draw_players(rng, names, positions.ravel(), roles.ravel(), np.repeat(batch, players_per_team).tolist()),
+            batch_size=BATCH_SIZE,
+        )
+    return len(team_ids) * players_per_team
+
+
+def _pick_leaders(rng, team_ids, starters):
+    """
+    Makes one of each team's ``starters`` starters (by id) its go-to guy and
+    another draw its defensive stopper. Teams that drew the same starter are
+    updated together, with a correlated subquery, rather than with one
+    ``CASE`` branch per team.
+    """
+    team_ids = np.asarray(team_ids)
+    picks = rng.integers(0, starters, (len(team_ids), 2))
+    for column, field in enumerate(('go_to_guy', 'defensive_stopper')):
+        for pick in range(starters):
+            starter = (Player.objects.filter(team=OuterRef('pk'), role=Player.STARTER)
+                       .order_by('id').values('id')[pick:pick + 1])
+            chosen = team_ids[picks[:, column] == pick].tolist()
+            for first in range(0, len(chosen), BATCH_SIZE):
+                Team.objects.filter(id__in=chosen[first:first + BATCH_SIZE]).update(**{field: Subquery(starter)})
+
+
+def generate_world(leagues=1, teams_per_league=10, players_per_team=12, seed=None, season=1):
+    """
+    Creates ``leagues`` new leagues of ``teams_per_league`` teams with full
+    rosters and a ``TeamSeasonStats`` row for ``season``. Returns a
+    ``WorldReport``.
+    """
+    rng = np.random.default_rng(seed)
+    names = NamePool(seed)
+    report = WorldReport()
+    with transaction.atomic():
+        created = League.objects.bulk_create(
+            [League(name=name, level=level, current_season_year=season, status='PRE_SEASON')
+             for level, name in _league_names(leagues)],
+            batch_size=BATCH_SIZE,
+        )
+        team_names = _team_names(rng, names, len(created) * teams_per_league)
+        coaches = list(names.people(rng, len(team_names)))
+        budgets = rng.integers(BUDGET_RANGE[0], BUDGET_RANGE[1] + 1, len(team_names))
+        colors = rng.integers(0, len(HOME_COLORS), (len(team_names), 2))
+        teams = Team.objects.bulk_create([
+            Team(name=name, league_id=created[i // teams_per_league].id,
+                 coach_name=f'{coaches[i][0]} {coaches[i][1]}', arena_name=f'{city} Arena',
+                 home_jersey_color=HOME_COLORS[colors[i, 0]], away_jersey_color=AWAY_COLORS[colors[i, 1]],
+                 budget=int(budgets[i]))
+            for i, (city, name) in enumerate(team_names)
+        ], batch_size=BATCH_SIZE)
+        TeamSeasonStats.objects.bulk_create(
+            [TeamSeasonStats(team_id=team.id, league_id=team.league_id, season=season) for team in teams],
+            batch_size=BATCH_SIZE,
+        )
+        team_ids = [team.id for team in teams]
+        report.players = _create_players(rng, names, team_ids, players_per_team)
+        if players_per_team:
+            _pick_leaders(rng, team_ids, min(players_per_team, len(POSITIONS)))
+        report.leagues, report.teams = len(created), len(teams)
+        transaction.on_commit(snapshot.invalidate)
+        responsecache.invalidate(world=True)
+    return report
+
+
+def generate_free_agents(count, seed=None):
+    """Creates ``count`` free agents (no team, no contract). Returns the number created."""
+    rng = np.random.default_rng(seed)
+    names = NamePool(seed)
+    positions = rng.integers(0, len(POSITIONS), count)
+    with transaction.atomic():
+        Player.objects.bulk_create(
+            draw_players(rng, names, positions, [Player.RESERVE] * count, [None] * count, contracts=False),
+            batch_size=BATCH_SIZE,
+        )
+        responsecache.invalidate(market=True)
+    return count
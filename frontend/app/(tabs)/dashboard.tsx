@@ -2,8 +2,8 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { View, Text, StyleSheet, ActivityIndicator, ImageBackground, Alert, Dimensions } from 'react-native';
 import { useAuth } from '../../context/AuthContext';
 import * as ScreenOrientation from 'expo-screen-orientation';
-import { getMatches, getLeagueStandings, getSquad } from '../../services/apiService';
-import { Match, TeamStanding, FullPlayer } from '../../types/entities';
+import { getDashboard } from '../../services/apiService';
+import { TeamDashboard } from '../../types/entities';
 import { LinearGradient } from 'expo-linear-gradient';
 
 import DashboardHeader from '../../components/dashboard/DashboardHeader';
@@ -18,9 +18,7 @@ const { width, height } = Dimensions.get('window');
 
 export default function DashboardScreen() {
   const { userInfo, isLoading, logout } = useAuth();
-  const [nextMatch, setNextMatch] = useState<Match | null>(null);
-  const [teamStats, setTeamStats] = useState<TeamStanding | null>(null);
-  const [squadPlayers, setSquadPlayers] = useState<FullPlayer[]>([]);
+  const [dashboard, setDashboard] = useState<TeamDashboard | null>(null);
   const [loadingData, setLoadingData] = useState(true);
 
   useEffect(() => {
@@ -33,44 +31,14 @@ export default function DashboardScreen() {
   }, []);
 
   const fetchData = useCallback(async () => {
-    if (!userInfo?.league_id || !userInfo?.team_id || !userInfo?.team_name) {
+    if (!userInfo?.team_id) {
       setLoadingData(false);
       return;
     }
 
     try {
-      // Fetch Next Match
-      const allMatches = await getMatches(userInfo.league_id);
-      const filteredMatches = (allMatches ?? []).filter(
-        m => m.home_team_name === userInfo.team_name || m.away_team_name === userInfo.team_name
-      );
-
-      const now = new Date();
-      const closestMatch: Match | null = filteredMatches.reduce((prev: Match | null, curr: Match) => {
-        const currDate = new Date(curr.match_date);
-        const prevDate = prev ? new Date(prev.match_date) : new Date(0); 
-
-        const currDiff = currDate.getTime() - now.getTime();
-        const prevDiff = prev ? prevDate.getTime() - now.getTime() : Infinity;
-
-        if (currDiff > 0 && currDiff < prevDiff) {
-          return curr;
-        } else if (prevDiff > 0) {
-          return prev;
-        } else {
-          return currDiff > 0 ? curr : null;
-        }
-      }, null);
-      setNextMatch(closestMatch);
-
-      // Fetch Team Season Stats
-      const standings = await getLeagueStandings(userInfo.league_id);
-      const myTeamStanding = standings.find(s => s.team_name === userInfo.team_name);
-      setTeamStats(myTeamStanding || null);
-
-      // Fetch Squad Players
-      const squad = await getSquad();
-      setSquadPlayers(squad);
+      // Standing, fixtures, finances and roster health in one request
+      setDashboard(await getDashboard());
 
     } catch (error) {
       console.error("Failed to fetch dashboard data:", error);
@@ -92,27 +60,19 @@ export default function DashboardScreen() {
       { text: 'Logout', style: 'destructive', onPress: logout }
     ]);
 
-  // פונקציות עזר לחישוב נתונים מתוך שחקני הסגל
-  // הן נשארות כאן כי הן משתמשות ב-squadPlayers ו-teamStats שמנוהלים בסטייט של הדשבורד הראשי
-  const getTeamMorale = useCallback(() => {
-    if (squadPlayers.length === 0) return 0;
-    const totalFitness = squadPlayers.reduce((sum, player) => sum + player.fitness, 0);
-    return Math.round(totalFitness / squadPlayers.length);
-  }, [squadPlayers]);
-
   const getTeamFitness = useCallback(() => {
-    return getTeamMorale(); // לצורך הדוגמה, נשתמש באותו מדד כמו מורל
-  }, [getTeamMorale]);
+    return dashboard?.roster_health.average_fitness ?? 0;
+  }, [dashboard]);
 
   const getTeamVibe = useCallback(() => {
-    if (teamStats) {
-      const winRate = teamStats.win_percentage;
+    if (dashboard?.standing) {
+      const winRate = dashboard.standing.win_percentage;
       if (winRate > 70) return 90;
       if (winRate > 50) return 75;
       return 60;
     }
     return 70;
-  }, [teamStats]);
+  }, [dashboard]);
 
 
   if (isLoading || loadingData) {
@@ -141,9 +101,9 @@ export default function DashboardScreen() {
 
           {/* Row 1: Next Match & Team Status */}
           <View style={styles.gridRow}>
-            <NextMatchCard nextMatch={nextMatch} teamName={userInfo?.team_name || 'N/A'} />
+            <NextMatchCard nextMatch={dashboard?.next_match ?? null} teamName={userInfo?.team_name || 'N/A'} />
             <TeamStatusCard
-              morale={getTeamMorale()}
+              morale={getTeamFitness()}
               fitness={getTeamFitness()}
               vibe={getTeamVibe()}
             />
@@ -151,9 +111,17 @@ export default function DashboardScreen() {
 
           {/* Row 2: Financial Overview, Team Stats & Alerts */}
           <View style={styles.gridRow}>
-            <FinancialSummaryCard budget={userInfo?.budget || 0} />
-            <TeamStatsCard teamStats={teamStats} squadPlayers={squadPlayers} />
-            <AlertsCard squadPlayers={squadPlayers} />
+            <FinancialSummaryCard
+              budget={dashboard?.financial.budget ?? userInfo?.budget ?? 0}
+              squadValue={dashboard?.financial.squad_value ?? 0}
+              listedValue={dashboard?.financial.listed_value ?? 0}
+            />
+            <TeamStatsCard
+              standing={dashboard?.standing ?? null}
+              topScorer={dashboard?.top_scorer ?? null}
+              injuredCount={dashboard?.roster_health.injured.length ?? 0}
+            />
+            <AlertsCard alerts={dashboard?.alerts ?? []} />
           </View>
 
         </View>
@@ -1,37 +1,68 @@
 // File: app/screens/match/[id].tsx
 
-import React from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import { View, Text, StyleSheet, Image, ImageBackground } from 'react-native';
 import { useLocalSearchParams } from 'expo-router';
 import { Match } from '../../../types/entities';
+import { subscribeToLiveMatch, LivePlay, LiveState } from '../../../services/liveMatch';
 
 const backgroundImage = require('../../../assets/half_court.png');
 const courtImage = require('../../../assets/basketball-court.png');
 
+const formatClock = (seconds: number) => {
+  const whole = Math.max(0, Math.floor(seconds));
+  return `${Math.floor(whole / 60)}:${String(whole % 60).padStart(2, '0')}`;
+};
+
 export default function MatchDetail() {
   const { match: matchParam } = useLocalSearchParams();
 
-  if (!matchParam || typeof matchParam !== 'string') {
-    return (
-      <View style={styles.centered}>
-        <Text style={{ color: 'white' }}>Match not found</Text>
-      </View>
-    );
-  }
+  const match = useMemo<Match | null>(() => {
+    if (!matchParam || typeof matchParam !== 'string') return null;
+    try {
+      return JSON.parse(matchParam);
+    } catch (e) {
+      return null;
+    }
+  }, [matchParam]);
+
+  const [live, setLive] = useState<LiveState | null>(null);
+  const [lastPlay, setLastPlay] = useState<LivePlay | null>(null);
 
-  let match: Match;
+  // Games that are not finished follow the live stream instead of polling.
+  useEffect(() => {
+    if (!match || match.completed || !match.id) return;
+    return subscribeToLiveMatch(match.id, {
+      onState: setLive,
+      onFinal: setLive,
+      onPlay: play => {
+        setLastPlay(play);
+        setLive(prev => prev && {
+          ...prev,
+          home_score: play.home_score,
+          away_score: play.away_score,
+          quarter: play.quarter,
+          clock: play.clock,
+          possession_team: play.possession_team,
+        });
+      },
+      onError: error => console.error('Live match stream error:', error),
+    });
+  }, [match]);
 
-  try {
-    match = JSON.parse(matchParam);
-  } catch (e) {
+  if (!match) {
     return (
       <View style={styles.centered}>
-        <Text style={{ color: 'white' }}>Failed to load match</Text>
+        <Text style={{ color: 'white' }}>{matchParam ? 'Failed to load match' : 'Match not found'}</Text>
       </View>
     );
   }
 
   const matchDate = new Date(match.match_date);
+  const homeScore = live ? live.home_score : match.home_team_score;
+  const awayScore = live ? live.away_score : match.away_team_score;
+  const isFinished = live ? live.status === 'final' : match.completed;
+  const isLive = live?.status === 'live';
 
   return (
     <ImageBackground source={backgroundImage} style={styles.background}>
@@ -46,22 +77,25 @@ export default function MatchDetail() {
           <View style={styles.scoreRow}>
             <View style={styles.teamBox}>
               <Text style={styles.teamName}>{match.home_team_name}</Text>
-              <Text style={styles.score}>{match.home_team_score}</Text>
+              <Text style={styles.score}>{homeScore}</Text>
             </View>
 
             <Text style={styles.vs}>VS</Text>
 
             <View style={styles.teamBox}>
               <Text style={styles.teamName}>{match.away_team_name}</Text>
-              <Text style={styles.score}>{match.away_team_score}</Text>
+              <Text style={styles.score}>{awayScore}</Text>
             </View>
           </View>
 
           <View style={styles.statusBox}>
             <Text style={styles.statusLabel}>Match Status:</Text>
             <Text style={styles.statusValue}>
-              {match.completed ? 'Finished' : 'Upcoming'}
+              {isFinished ? 'Finished' : isLive ? `Q${live!.quarter} • ${formatClock(live!.clock)}` : 'Upcoming'}
             </Text>
+            {isLive && lastPlay && (
+              <Text style={styles.finalLabel}>{lastPlay.kind.replace('_', ' ')}</Text>
+            )}
           </View>
         </View>
 
@@ -10,20 +10,26 @@ import { SortableHeader } from '../components/squad/SquadHeader';
 import { OverviewRow, SkillsRow, StatsRow } from '../components/squad/SquadRow';
 import { PlayerActionsModal } from '../components/squad/PlayerActionsModal';
 
-// Mock Data for Stats
-const generateMockStats = (players: SquadFullPlayer[]) => {
-    return players.map(p => ({
-        id: p.id, pts: parseFloat((Math.random() * 25).toFixed(1)), ast: parseFloat((Math.random() * 8).toFixed(1)),
-        reb: parseFloat((Math.random() * 10).toFixed(1)), stl: parseFloat((Math.random() * 2).toFixed(1)),
-        blk: parseFloat((Math.random() * 1.5).toFixed(1)), fg_pct: parseFloat((40 + Math.random() * 15).toFixed(1)),
-        three_p_pct: parseFloat((30 + Math.random() * 15).toFixed(1)),
-    }));
+// Per-game averages from the season stat line the squad endpoint returns.
+const perGame = (total: number, games: number) => games ? parseFloat((total / games).toFixed(1)) : 0;
+const percentage = (made: number, attempts: number) => attempts ? parseFloat((100 * made / attempts).toFixed(1)) : 0;
+
+const buildSeasonStats = (players: SquadFullPlayer[]) => {
+    return players.map(p => {
+        const s = p.season_stats;
+        if (!s) return { id: p.id, pts: 0, ast: 0, reb: 0, stl: 0, blk: 0, fg_pct: 0, three_p_pct: 0 };
+        return {
+            id: p.id, pts: s.points_per_game, ast: s.assists_per_game, reb: s.rebounds_per_game,
+            stl: perGame(s.steals, s.games_played), blk: perGame(s.blocks, s.games_played),
+            fg_pct: percentage(s.fgm, s.fga), three_p_pct: percentage(s.tpm, s.tpa),
+        };
+    });
 };
 
 const SquadScreen = () => {
     const { isLoading: isAuthLoading, updateUserInfo, userInfo } = useAuth();
     const [players, setPlayers] = useState<SquadFullPlayer[]>([]);
-    const [mockStats, setMockStats] = useState<any[]>([]);
+    const [seasonStats, setSeasonStats] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
     const [activeView, setActiveView] = useState<SquadViewType>('overview');
     const [sortConfig, setSortConfig] = useState<SortConfig>({ key: 'rating', direction: 'desc' });
@@ -42,7 +48,7 @@ const SquadScreen = () => {
             const data = await getSquad();
             const typedData = data as SquadFullPlayer[];
             setPlayers(typedData);
-            setMockStats(generateMockStats(typedData));
+            setSeasonStats(buildSeasonStats(typedData));
         } catch (error) {
             console.error("Failed to fetch squad", error);
         } finally {
@@ -85,8 +91,8 @@ const SquadScreen = () => {
 
             if (key.startsWith('stats_')) {
                 const statKey = key.substring(6);
-                aVal = mockStats.find(s => s.id === a.id)?.[statKey] ?? 0;
-                bVal = mockStats.find(s => s.id === b.id)?.[statKey] ?? 0;
+                aVal = seasonStats.find(s => s.id === a.id)?.[statKey] ?? 0;
+                bVal = seasonStats.find(s => s.id === b.id)?.[statKey] ?? 0;
             } else {
                 aVal = a[key as keyof SquadFullPlayer];
                 bVal = b[key as keyof SquadFullPlayer];
@@ -96,7 +102,7 @@ const SquadScreen = () => {
             if (aVal > bVal) return direction === 'asc' ? 1 : -1;
             return 0;
         });
-    }, [players, sortConfig, mockStats]);
+    }, [players, sortConfig, seasonStats]);
 
     const requestSort = (key: SortKey) => {
         let direction: 'asc' | 'desc' = 'desc';
@@ -184,7 +190,7 @@ const SquadScreen = () => {
     };
 
     const renderPlayerRow = ({ item }: { item: SquadFullPlayer }) => {
-        const playerStats = mockStats.find(s => s.id === item.id) || {};
+        const playerStats = seasonStats.find(s => s.id === item.id) || {};
         return (
             <TouchableOpacity onPress={() => openPlayerModal(item)}>
                 <View style={styles.playerRow}>
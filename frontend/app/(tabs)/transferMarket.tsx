@@ -21,7 +21,7 @@ import {
 } from 'react-native';
 import Slider from '@react-native-community/slider';
 import { Player } from '../../types/entities';
-import { getTransferList, buyPlayer } from '../../services/apiService'; // buyPlayer now expects contractYears
+import { getTransferList, buyPlayer, TransferMarketFilters } from '../../services/apiService'; // buyPlayer now expects contractYears
 import { useAuth } from '../../context/AuthContext';
 import { Feather } from '@expo/vector-icons';
 import FilterControls from '../../components/FilterControls';
@@ -39,6 +39,10 @@ const TransferMarketScreen = () => {
     const [sortDir, setSortDir] = useState<'asc' | 'desc'>('asc');
 
     const [maxValueFilter, setMaxValueFilter] = useState(2000000);
+    // The slider value sent to the server once the user lets go of the thumb.
+    const [appliedMaxValue, setAppliedMaxValue] = useState(2000000);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const MAX_SLIDER_VALUE = 10000000;
 
     const [appliedMinRating, setAppliedMinRating] = useState('');
@@ -47,28 +51,53 @@ const TransferMarketScreen = () => {
     const [appliedMinFitness, setAppliedMinFitness] = useState('');
     const [appliedShowHealthyOnly, setAppliedShowHealthyOnly] = useState(false);
 
+    const serverFilters = (): TransferMarketFilters => ({
+        max_price: appliedMaxValue,
+        min_rating: appliedMinRating ? parseInt(appliedMinRating) : undefined,
+        max_age: appliedMaxAge ? parseInt(appliedMaxAge) : undefined,
+    });
+
+    const withValue = (page: Player[]) => page.map(player => ({
+        ...player,
+        value: typeof player.market_value === 'number' ? player.market_value : 0
+    }));
+
+    // Loads the first page for the current server-side filters.
     const fetchPlayers = async () => {
         try {
             setLoading(true);
-            const data = await getTransferList();
-            const processedPlayers = data.map(player => ({
-                ...player,
-                value: typeof player.market_value === 'number' ? player.market_value : 0
-            }));
-            setPlayers(processedPlayers);
+            const page = await getTransferList(serverFilters());
+            setPlayers(withValue(page.results));
+            setNextCursor(page.nextCursor);
         } catch (e) {
             console.error('Error fetching players:', e);
             setPlayers([]);
+            setNextCursor(null);
         } finally {
             setLoading(false);
         }
     };
 
+    // Appends the next keyset page when the list is scrolled to the end.
+    const fetchMorePlayers = async () => {
+        if (!nextCursor || loadingMore) return;
+        try {
+            setLoadingMore(true);
+            const page = await getTransferList(serverFilters(), nextCursor);
+            setPlayers(current => [...current, ...withValue(page.results)]);
+            setNextCursor(page.nextCursor);
+        } catch (e) {
+            console.error('Error fetching more players:', e);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         if (!isAuthLoading) {
             fetchPlayers();
         }
-    }, [isAuthLoading]);
+    }, [isAuthLoading, appliedMaxValue, appliedMinRating, appliedMaxAge]);
 
     const handleSort = (key: 'rating' | 'age' | 'position_primary' | 'first_name' | 'last_name' | 'market_value' | 'fitness') => {
         if (sortKey === key) {
@@ -295,6 +324,7 @@ const TransferMarketScreen = () => {
                             step={10000}
                             value={maxValueFilter}
                             onValueChange={setMaxValueFilter}
+                            onSlidingComplete={setAppliedMaxValue}
                             minimumTrackTintColor="#FACC15"
                             maximumTrackTintColor="#CBD5E1"
                             thumbTintColor="#FACC15"
@@ -328,6 +358,9 @@ const TransferMarketScreen = () => {
                         ListHeaderComponent={renderHeader}
                         renderItem={renderItem}
                         contentContainerStyle={styles.flatListContent}
+                        onEndReached={fetchMorePlayers}
+                        onEndReachedThreshold={0.5}
+                        ListFooterComponent={loadingMore ? <ActivityIndicator color="#FBBF24" /> : null}
                         ListEmptyComponent={() => (
                             <View style={styles.emptyListContainer}>
                                 <Text style={styles.emptyListText}>No players found matching your criteria.</Text>
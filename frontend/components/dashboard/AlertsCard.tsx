@@ -2,21 +2,21 @@ import React from 'react';
 import { View, Text, StyleSheet, Dimensions } from 'react-native';
 import { Ionicons } from '@expo/vector-icons';
 import { LinearGradient } from 'expo-linear-gradient';
-import { FullPlayer } from '../../types/entities'; // ודא ייבוא נכון
+import { DashboardAlert } from '../../types/entities';
 
 const { width } = Dimensions.get('window');
 
 interface AlertsCardProps {
-  squadPlayers: FullPlayer[];
+  alerts: DashboardAlert[];
 }
 
-const AlertsCard: React.FC<AlertsCardProps> = ({ squadPlayers }) => {
-  const getInjuredPlayersCount = () => {
-    return squadPlayers.filter(player => player.is_injured).length;
-  };
-
-  const expiringContractsCount = squadPlayers.filter(p => p.contract_years <= 1).length;
+const DOT_COLORS: Record<DashboardAlert['level'], string> = {
+  danger: '#EF4444',
+  warning: '#FBBF24',
+  info: '#3B82F6',
+};
 
+const AlertsCard: React.FC<AlertsCardProps> = ({ alerts }) => {
   return (
     <LinearGradient colors={['#F97316', '#FB923C']} style={[styles.card, styles.alertsCard]}>
       <View style={styles.cardHeader}>
@@ -24,27 +24,20 @@ const AlertsCard: React.FC<AlertsCardProps> = ({ squadPlayers }) => {
         <Text style={styles.cardTitle}>Alerts</Text>
       </View>
       <View style={styles.notificationContent}>
-        {getInjuredPlayersCount() > 0 && (
+        {alerts.length === 0 && (
           <View style={styles.notificationItem}>
-            <View style={[styles.notificationDot, { backgroundColor: '#EF4444' }]} />
-            <Text style={styles.notificationText} numberOfLines={1} ellipsizeMode='tail'>
-              {getInjuredPlayersCount()} player(s) injured!
-            </Text>
+            <View style={[styles.notificationDot, { backgroundColor: '#10B981' }]} />
+            <Text style={styles.notificationText} numberOfLines={1} ellipsizeMode='tail'>All clear.</Text>
           </View>
         )}
-        {expiringContractsCount > 0 && (
-          <View style={styles.notificationItem}>
-            <View style={[styles.notificationDot, { backgroundColor: '#FBBF24' }]} />
+        {alerts.map(alert => (
+          <View key={alert.code} style={styles.notificationItem}>
+            <View style={[styles.notificationDot, { backgroundColor: DOT_COLORS[alert.level] }]} />
             <Text style={styles.notificationText} numberOfLines={1} ellipsizeMode='tail'>
-              {expiringContractsCount} contract(s) expiring soon!
+              {alert.message}
             </Text>
           </View>
-        )}
-        {/* הודעות התראה נוספות מדומות */}
-        <View style={styles.notificationItem}>
-          <View style={[styles.notificationDot, { backgroundColor: '#3B82F6' }]} />
-          <Text style={styles.notificationText} numberOfLines={1} ellipsizeMode='tail'>New scout report available.</Text>
-        </View>
+        ))}
       </View>
     </LinearGradient>
   );
@@ -7,12 +7,11 @@ const { width } = Dimensions.get('window');
 
 interface FinancialSummaryCardProps {
   budget: number;
+  squadValue: number;
+  listedValue: number;
 }
 
-const FinancialSummaryCard: React.FC<FinancialSummaryCardProps> = ({ budget }) => {
-  // הכנסות והוצאות נשארים מדומים בינתיים כיוון שאין API ייעודי
-  const income = Math.floor(Math.random() * 50000) + 25000;
-  const expenses = Math.floor(Math.random() * 30000) + 15000;
+const FinancialSummaryCard: React.FC<FinancialSummaryCardProps> = ({ budget, squadValue, listedValue }) => {
 
   return (
     <LinearGradient colors={['#059669', '#10B981']} style={[styles.card, styles.financialSummaryCard]}>
@@ -26,12 +25,12 @@ const FinancialSummaryCard: React.FC<FinancialSummaryCardProps> = ({ budget }) =
           <Text style={styles.financialValue}>${budget.toLocaleString()}</Text>
         </View>
         <View style={styles.financialItem}>
-          <Text style={styles.financialLabel}>Income (M):</Text>
-          <Text style={styles.financialValue}>+${income.toLocaleString()}</Text>
+          <Text style={styles.financialLabel}>Squad Value:</Text>
+          <Text style={styles.financialValue}>${squadValue.toLocaleString()}</Text>
         </View>
         <View style={styles.financialItem}>
-          <Text style={styles.financialLabel}>Expenses (M):</Text>
-          <Text style={styles.financialValue}>-${expenses.toLocaleString()}</Text>
+          <Text style={styles.financialLabel}>Listed For Sale:</Text>
+          <Text style={styles.financialValue}>${listedValue.toLocaleString()}</Text>
         </View>
       </View>
     </LinearGradient>
@@ -2,25 +2,17 @@ import React from 'react';
 import { View, Text, StyleSheet, Dimensions } from 'react-native';
 import { Ionicons } from '@expo/vector-icons';
 import { LinearGradient } from 'expo-linear-gradient';
-import { TeamStanding, FullPlayer } from '../../types/entities'; // ודא ייבוא נכון
+import { TeamDashboard } from '../../types/entities';
 
 const { width } = Dimensions.get('window');
 
 interface TeamStatsCardProps {
-  teamStats: TeamStanding | null;
-  squadPlayers: FullPlayer[];
+  standing: TeamDashboard['standing'];
+  topScorer: TeamDashboard['top_scorer'];
+  injuredCount: number;
 }
 
-const TeamStatsCard: React.FC<TeamStatsCardProps> = ({ teamStats, squadPlayers }) => {
-  const getTopScorer = () => {
-    if (squadPlayers.length === 0) return 'N/A';
-    const top = squadPlayers.reduce((prev, current) => (prev.shooting_2p + prev.shooting_3p > current.shooting_2p + current.shooting_3p ? prev : current));
-    return `${top.first_name} ${top.last_name}`;
-  };
-
-  const getInjuredPlayersCount = () => {
-    return squadPlayers.filter(player => player.is_injured).length;
-  };
+const TeamStatsCard: React.FC<TeamStatsCardProps> = ({ standing, topScorer, injuredCount }) => {
 
   return (
     <LinearGradient colors={['#0891B2', '#06B6D4']} style={[styles.card, styles.statsCard]}>
@@ -31,24 +23,24 @@ const TeamStatsCard: React.FC<TeamStatsCardProps> = ({ teamStats, squadPlayers }
       <View style={styles.statsContent}>
         <View style={styles.statItemRow}>
           <Text style={styles.statLabel}>Wins:</Text>
-          <Text style={styles.statValue}>{teamStats?.wins ?? 0}</Text>
+          <Text style={styles.statValue}>{standing?.wins ?? 0}</Text>
         </View>
         <View style={styles.statItemRow}>
           <Text style={styles.statLabel}>Losses:</Text>
-          <Text style={styles.statValue}>{teamStats?.losses ?? 0}</Text>
+          <Text style={styles.statValue}>{standing?.losses ?? 0}</Text>
         </View>
         <View style={styles.statItemRow}>
           <Text style={styles.statLabel}>Win %:</Text>
-          <Text style={styles.statValue}>{teamStats?.win_percentage ?? 0}%</Text>
+          <Text style={styles.statValue}>{standing?.win_percentage ?? 0}%</Text>
         </View>
         <View style={styles.statItemRow}>
           <Text style={styles.statLabel}>Top Scorer:</Text>
-          <Text style={styles.statValue} numberOfLines={1} ellipsizeMode='tail'>{getTopScorer()}</Text>
+          <Text style={styles.statValue} numberOfLines={1} ellipsizeMode='tail'>{topScorer ? `${topScorer.name} (${topScorer.points_per_game})` : 'N/A'}</Text>
         </View>
         <View style={styles.statItemRow}>
           <Text style={styles.statLabel}>Injured:</Text>
-          <Text style={[styles.statValue, { color: getInjuredPlayersCount() > 0 ? '#FEF3C7' : '#10B981' }]}>
-            {getInjuredPlayersCount()}
+          <Text style={[styles.statValue, { color: injuredCount > 0 ? '#FEF3C7' : '#10B981' }]}>
+            {injuredCount}
           </Text>
         </View>
       </View>
@@ -159,8 +159,15 @@ const processQueue = (error: AxiosError | null, token: string | null = null) =>
 // יצירת ה-instance המרכזי עם כתובת ה-API הבסיסית
 const api = axios.create({
     baseURL: 'http://10.0.2.2:8000/api',
+    // 304 is a successful revalidation, answered from the local copy below.
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 });
 
+// --- Conditional GET ---
+// The last ETag and body of every GET URL. Requests send the ETag back as
+// If-None-Match; on 304 the server sent no body and the stored one is reused.
+const etagCache = new Map<string, { etag: string; data: unknown }>();
+
 // --- Interceptor של הבקשות ---
 api.interceptors.request.use(
     async (config) => {
@@ -168,6 +175,12 @@ api.interceptors.request.use(
         if (token) {
             config.headers.Authorization = `Bearer ${token}`;
         }
+        if ((config.method ?? 'get').toLowerCase() === 'get') {
+            const cached = etagCache.get(api.getUri(config));
+            if (cached) {
+                config.headers['If-None-Match'] = cached.etag;
+            }
+        }
         return config;
     },
     (error) => Promise.reject(error)
@@ -176,6 +189,18 @@ api.interceptors.request.use(
 // --- Interceptor חדש ומשודרג של התגובות ---
 api.interceptors.response.use(
     (response) => {
+        if ((response.config.method ?? 'get').toLowerCase() !== 'get') {
+            return response;
+        }
+        const key = api.getUri(response.config);
+        if (response.status === 304) {
+            const cached = etagCache.get(key);
+            return { ...response, status: 200, data: cached?.data };
+        }
+        const etag = response.headers['etag'];
+        if (etag) {
+            etagCache.set(key, { etag, data: response.data });
+        }
         return response;
     },
     async (error: AxiosError) => {
@@ -6,7 +6,7 @@
 // ==============================================================================
 import axios, { AxiosError } from 'axios';
 import api from './api'; // ודא שזה מצביע ל-axios instance המוגדר שלך (frontend/services/api.ts)
-import { Player, TeamStanding, FullPlayer, Match } from '../types/entities'; // ודא שהטיפוסים עדכניים
+import { Player, TeamStanding, FullPlayer, Match, TeamDashboard } from '../types/entities'; // ודא שהטיפוסים עדכניים
 
 /**
  * מטפל בשגיאות Axios באופן מרכזי ומחזיר את פרטי השגיאה.
@@ -39,15 +39,41 @@ export const getLeagueStandings = async (leagueId: number): Promise<TeamStanding
   }
 };
 
+/** Server-side filters of the transfer market (all optional). */
+export interface TransferMarketFilters {
+  position?: string;
+  min_age?: number;
+  max_age?: number;
+  min_rating?: number;
+  max_price?: number;
+  limit?: number;
+}
+
+/** One keyset page of the transfer market; pass `nextCursor` back to get the next page. */
+export interface TransferMarketPage {
+  results: Player[];
+  nextCursor: string | null;
+}
+
 /**
- * שולף את רשימת השחקנים הזמינים בשוק ההעברות.
- * זה כולל שחקנים חופשיים ושחקנים המוצעים על ידי קבוצות אחרות.
- * @returns Promise שמחזיר מערך של אובייקטי Player (כולל פרטים מלאים כעת).
+ * שולף עמוד אחד של השחקנים הזמינים בשוק ההעברות.
+ * זה כולל שחקנים חופשיים ושחקנים המוצעים על ידי קבוצות אחרות, מהדירוג הגבוה לנמוך.
+ * @param filters סינון בצד השרת.
+ * @param cursor הסמן של העמוד הבא (null לעמוד הראשון).
+ * @returns Promise שמחזיר את השחקנים של העמוד ואת הסמן של העמוד הבא.
  */
-export const getTransferList = async (): Promise<Player[]> => {
+export const getTransferList = async (
+  filters: TransferMarketFilters = {},
+  cursor: string | null = null,
+): Promise<TransferMarketPage> => {
   try {
-    const response = await api.get<Player[]>('/players/transfer-market/');
-    return response.data;
+    const params = cursor ? { ...filters, cursor } : filters;
+    const response = await api.get<{ next: string | null; results: Player[] }>('/players/transfer-market/', { params });
+    const match = response.data.next?.match(/[?&]cursor=([^&]+)/);
+    return {
+      results: response.data.results,
+      nextCursor: match ? decodeURIComponent(match[1]) : null,
+    };
   } catch (error) {
     throw handleApiError(error, 'שגיאה בשליפת רשימת ההעברות');
   }
@@ -81,6 +107,19 @@ export const getSquad = async (): Promise<FullPlayer[]> => {
   }
 };
 
+/**
+ * שולף את כל נתוני הדשבורד של הקבוצה של המשתמש המחובר בבקשה אחת.
+ * @returns Promise שמחזיר אובייקט TeamDashboard.
+ */
+export const getDashboard = async (): Promise<TeamDashboard> => {
+  try {
+    const response = await api.get<TeamDashboard>('/team/dashboard/');
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error, 'שגיאה בשליפת נתוני הדשבורד');
+  }
+};
+
 /**
  * שולף משחקים עבור ליגה ספציפית.
  * @param leagueID ה-ID של הליגה עבורה יש לשלוף משחקים.
@@ -98,6 +137,49 @@ export const getMatches = async (leagueID: number): Promise<Match[] | undefined>
   }
 };
 
+/**
+ * שולף את כל משחקי הקבוצה (בית וחוץ), לפי תאריך.
+ * @param teamId ה-ID של הקבוצה.
+ * @returns Promise שמחזיר מערך של אובייקטי Match.
+ */
+export const getTeamMatches = async (teamId: number): Promise<Match[]> => {
+  try {
+    const response = await api.get<Match[]>(`/teams/${teamId}/matches/`);
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error, `שגיאה בשליפת המשחקים של קבוצה ${teamId}`);
+  }
+};
+
+/**
+ * שולף את המשחק הבא של הקבוצה (המשחק הקרוב ביותר שעוד לא הסתיים).
+ * @param teamId ה-ID של הקבוצה.
+ * @returns Promise שמחזיר את המשחק, או null אם אין משחקים נוספים.
+ */
+export const getNextMatch = async (teamId: number): Promise<Match | null> => {
+  try {
+    const response = await api.get<Match[]>(`/teams/${teamId}/matches/next/`);
+    return response.data[0] ?? null;
+  } catch (error) {
+    throw handleApiError(error, `שגיאה בשליפת המשחק הבא של קבוצה ${teamId}`);
+  }
+};
+
+/**
+ * שולף את המשחקים האחרונים שהסתיימו של הקבוצה, מהאחרון לראשון.
+ * @param teamId ה-ID של הקבוצה.
+ * @param limit מספר המשחקים (ברירת מחדל 5).
+ * @returns Promise שמחזיר מערך של אובייקטי Match.
+ */
+export const getLastMatches = async (teamId: number, limit = 5): Promise<Match[]> => {
+  try {
+    const response = await api.get<Match[]>(`/teams/${teamId}/matches/last/`, { params: { limit } });
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error, `שגיאה בשליפת המשחקים האחרונים של קבוצה ${teamId}`);
+  }
+};
+
 /**
  * שולף את הסגל (הרוסטר) של קבוצה ספציפית לפי ה-ID שלה.
  * @param teamId ה-ID של הקבוצה עבורה יש לשלוף את הסגל.
@@ -128,6 +210,34 @@ export const getTeamStandingById = async (teamId: number): Promise<TeamStanding>
     }
 };
 
+/**
+ * מגיש (או מעדכן) הצעה על שחקן בשוק ההעברות. ההצעות מותאמות בסבב תקופתי בצד השרת.
+ * @param playerId ה-ID של השחקן.
+ * @param price סכום ההצעה.
+ * @param contractYears מספר שנות החוזה המוצע (1-5).
+ * @returns Promise עם ההצעה הפתוחה.
+ */
+export const placeBid = async (playerId: number, price: number, contractYears: number) => {
+    try {
+        const response = await api.post(`/players/${playerId}/bids/`, { price, contract_years: contractYears });
+        return response.data;
+    } catch (error) {
+        throw handleApiError(error, `Failed to bid on player ${playerId}`);
+    }
+};
+
+/**
+ * מבטל את ההצעה הפתוחה של הקבוצה על שחקן.
+ * @param playerId ה-ID של השחקן.
+ */
+export const cancelBid = async (playerId: number) => {
+    try {
+        await api.delete(`/players/${playerId}/bids/`);
+    } catch (error) {
+        throw handleApiError(error, `Failed to cancel the bid on player ${playerId}`);
+    }
+};
+
 /**
  * מעמיד שחקן למכירה ברשימת ההעברות.
  * @param playerId ה-ID של השחקן.
@@ -0,0 +1,86 @@
+// ==============================================================================
+// File: frontend/services/liveMatch.ts
+// Description: Subscribes to the live play-by-play stream of a match
+//              (Server-Sent Events at /api/matches/<id>/live/).
+//              React Native has no EventSource, so the stream is read with an
+//              XMLHttpRequest and parsed as it arrives.
+// ==============================================================================
+import api from './api';
+
+export interface LiveState {
+    match_id: number;
+    status: 'scheduled' | 'live' | 'final';
+    home_score: number;
+    away_score: number;
+    quarter: number;
+    clock: number;
+    possession_team: number | null;
+}
+
+export interface LivePlay {
+    seq: number;
+    kind: string;
+    team_id: number | null;
+    player_id: number | null;
+    other_player_id: number | null;
+    points: number;
+    quarter: number;
+    clock: number;
+    home_score: number;
+    away_score: number;
+    possession_team: number | null;
+}
+
+interface LiveHandlers {
+    onState?: (state: LiveState) => void;
+    onPlay?: (play: LivePlay) => void;
+    onFinal?: (state: LiveState) => void;
+    onError?: (error: unknown) => void;
+}
+
+/**
+ * Opens the live stream for a match and returns a function that closes it.
+ */
+export const subscribeToLiveMatch = (matchId: number, handlers: LiveHandlers): (() => void) => {
+    const xhr = new XMLHttpRequest();
+    let consumed = 0;
+
+    const dispatch = (event: string, data: string) => {
+        try {
+            const payload = JSON.parse(data);
+            if (event === 'state') handlers.onState?.(payload);
+            else if (event === 'play') handlers.onPlay?.(payload);
+            else if (event === 'final') handlers.onFinal?.(payload);
+            else if (event === 'error') handlers.onError?.(payload);
+        } catch (e) {
+            handlers.onError?.(e);
+        }
+    };
+
+    const parse = () => {
+        const text = xhr.responseText;
+        // Only complete frames (terminated by a blank line) are handled.
+        const end = text.lastIndexOf('\n\n');
+        if (end < consumed) return;
+        const frames = text.slice(consumed, end).split('\n\n');
+        consumed = end + 2;
+        frames.forEach(frame => {
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (data) dispatch(event, data);
+        });
+    };
+
+    xhr.open('GET', `${api.defaults.baseURL}/matches/${matchId}/live/`);
+    xhr.setRequestHeader('Accept', 'text/event-stream');
+    xhr.onprogress = parse;
+    xhr.onload = parse;
+    xhr.onerror = () => handlers.onError?.(new Error('Live stream connection failed'));
+    xhr.send();
+
+    return () => xhr.abort();
+};
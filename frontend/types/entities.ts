@@ -46,6 +46,34 @@ export interface Player {
     jumping: number;    
     strength: number;      
     stamina: number;    
+    season_stats?: PlayerSeasonStats | null;
+}
+
+export interface PlayerSeasonStats {
+    player_id: number;
+    player_name: string | null;
+    team_id: number | null;
+    season: number;
+    games_played: number;
+    minutes: number;
+    points: number;
+    rebounds: number;
+    assists: number;
+    steals: number;
+    blocks: number;
+    turnovers: number;
+    fgm: number;
+    fga: number;
+    tpm: number;
+    tpa: number;
+    ftm: number;
+    fta: number;
+    oreb: number;
+    dreb: number;
+    points_per_game: number;
+    rebounds_per_game: number;
+    assists_per_game: number;
+    minutes_per_game: number;
 }
 
 
@@ -69,4 +97,66 @@ export interface Match {
     home_team_score: number;      // נקודות קבוצה ביתית
     away_team_score: number;      // נקודות קבוצה אורחת
     completed: boolean;           // האם המשחק הסתיים
-}
\ No newline at end of file
+}
+export interface DashboardAlert {
+    level: 'danger' | 'warning' | 'info';
+    code: string;
+    message: string;
+}
+
+export interface DashboardPlayer {
+    id: number;
+    name: string;
+    fitness?: number;
+    injury_duration?: number;
+}
+
+export interface DashboardResult {
+    match_id: number;
+    match_date: string;
+    home: boolean;
+    opponent_id: number;
+    opponent_name: string;
+    points_for: number;
+    points_against: number;
+    won: boolean;
+}
+
+export interface TeamDashboard {
+    team: {
+        id: number;
+        name: string;
+        league_id: number;
+        league_name: string;
+        season: number;
+        overall_rating: number;
+    };
+    standing: {
+        games_played: number;
+        wins: number;
+        losses: number;
+        points_for: number;
+        points_against: number;
+        points_difference: number;
+        win_percentage: number;
+        rank: number;
+        teams: number;
+    } | null;
+    next_match: Match | null;
+    last_results: DashboardResult[];
+    financial: {
+        budget: number;
+        squad_value: number;
+        squad_size: number;
+        max_squad_size: number;
+        players_listed: number;
+        listed_value: number;
+    };
+    roster_health: {
+        average_fitness: number;
+        injured: DashboardPlayer[];
+        low_fitness: DashboardPlayer[];
+    };
+    top_scorer: { id: number; name: string; points: number; points_per_game: number } | null;
+    alerts: DashboardAlert[];
+}